@@ -3,22 +3,32 @@
 import base64
 import binascii
 import datetime
+import functools
+import hashlib
 import importlib.metadata as importlib_metadata
+import itertools
 import logging
 import os
 import sys
-import threading
 import tomllib
+from collections.abc import Iterator
 from functools import wraps
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, request
 from mysql.connector import Error
 
+import cache
+import compression
 import config
 import db_utils
-import email_sender
+import email_outbox
+import idempotency
+import ledger
+import metrics
+import migrate
+import system_settings
 
 logging.basicConfig(
     level=config.api_config["log_level"],
@@ -30,6 +40,8 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config["DEBUG"] = config.api_config["flask_debug_mode"]
 app.config["JSON_AS_ASCII"] = False
+metrics.init_app(app)
+compression.init_app(app)
 
 # Konfigurationsprüfungen
 required_db_keys = ["host", "port", "user", "password", "database"]
@@ -61,11 +73,18 @@ except ValueError:
 # Initialisiere den Datenbank-Pool einmal beim Start der Anwendung # pylint: disable=R0801
 if os.environ.get("TESTING") != "True":
     try:
-        db_utils.DatabaseConnectionPool.initialize_pool(config.db_config)
+        db_utils.DatabaseConnectionPool.initialize_pool(config.db_config, config.db_pool_timeout)
     except Error as e:
         logger.info("Kritischer Fehler beim Starten der Datenbankverbindung: %s", e)
         sys.exit(1)
 
+    if config.db_auto_migrate:
+        try:
+            migrate.apply_pending()
+        except (Error, ValueError) as e:
+            logger.critical("Fehler beim Einspielen der Datenbank-Migrationen: %s", e)
+            sys.exit(1)
+
 
 def _get_version() -> str:
     """Loads version from package metadata or falls back to pyproject.toml."""
@@ -86,81 +105,27 @@ app.config.update(version=_get_version())
 logger.info("Feuerwehr-Versorgungs-Helfer API (Version %s) wurde gestartet", app.config.get("version"))
 
 
-def prepare_and_send_email(email_params: dict, smtp_cfg: dict) -> bool:
+def prepare_and_send_email(email_params: dict) -> bool:
     """
-    Bereitet eine E-Mail mit Flasks render_template vor und versendet sie im Hintergrund.
-    Die Argumente für die E-Mail-Details sind in einem Dictionary zusammengefasst.
+    Legt eine E-Mail zum Versand in der E-Mail-Outbox ab.
+
+    Die Templates werden erst vom Outbox-Worker gerendert und über eine gemeinsame
+    SMTP-Sitzung versendet (siehe email_outbox). Im Request-Pfad erfolgt nur ein INSERT.
 
     Args:
-        email_params: Ein Dictionary mit den Details für die E-Mail.
-            Erwartete Schlüssel:
-                'empfaenger_email' (str): E-Mail-Adresse des Empfängers.
+        email_params: Ein Dictionary mit den E-Mail-Parametern:
+                'empfaenger_email' (str): Empfängeradresse.
                 'betreff' (str): Betreff der E-Mail.
-                'template_name_html' (str): Dateiname des HTML-Templates (im Flask templates Ordner).
-                'template_name_text' (str): Dateiname des Text-Templates (im Flask templates Ordner).
+                'template_name_html' (str): Dateiname des HTML-Templates (im templates Ordner).
+                'template_name_text' (str): Dateiname des Text-Templates (im templates Ordner).
                 'template_context' (dict): Dictionary mit Daten für die Templates.
                 'logo_dateipfad' (str, optional): Pfad zur Logo-Datei.
-        smtp_cfg: SMTP-Konfigurationsdictionary.
 
     Returns:
-        bool: True, wenn der Hintergrund-Thread gestartet wurde, sonst False.
+        bool: True, wenn die E-Mail in die Outbox geschrieben wurde, sonst False.
     """
 
-    empfaenger_email = email_params.get("empfaenger_email")
-    betreff = email_params.get("betreff")
-    template_name_html = email_params.get("template_name_html")
-    template_name_text = email_params.get("template_name_text")
-    template_context = email_params.get("template_context", {})
-    logo_dateipfad_str = email_params.get("logo_dateipfad")
-
-    if not all([empfaenger_email, betreff, template_name_html, template_name_text]):
-        logger.error(
-            "Unvollständige E-Mail-Parameter. Benötigt: empfaenger_email, betreff, template_name_html, template_name_text."
-        )
-        return False
-
-    # Helfe Pylance mit Assertions, um den Typ zu verstehen
-    assert betreff is not None
-    assert empfaenger_email is not None
-    assert template_name_html is not None
-    assert template_name_text is not None
-
-    def _bg_send():
-        logo_exists = False
-        if logo_dateipfad_str:
-            logo_path_obj = Path(logo_dateipfad_str)
-            if logo_path_obj.is_file():
-                logo_exists = True
-            else:
-                logger.warning("Logo-Datei nicht gefunden unter: %s", logo_dateipfad_str)
-
-        try:
-            template_context_final = template_context.copy()
-            template_context_final["logo_exists_fuer_template"] = logo_exists
-
-            with app.app_context():
-                final_html_body = render_template(template_name_html, **template_context_final)
-                final_text_body = render_template(template_name_text, **template_context_final)
-
-            email_content_dict = {
-                "html": final_html_body,
-                "text": final_text_body,
-                "logo_pfad": logo_dateipfad_str if logo_exists else None,
-            }
-
-            success = email_sender.sende_formatierte_email(
-                empfaenger_email=empfaenger_email, betreff=betreff, content=email_content_dict, smtp_cfg=smtp_cfg
-            )
-            if success:
-                logger.info("E-Mail an %s erfolgreich im Hintergrund gesendet.", empfaenger_email)
-            else:
-                logger.error("Fehler beim Senden der E-Mail an %s im Hintergrund.", empfaenger_email)
-
-        except Exception as e:  # pylint: disable=W0718
-            logger.error("Fehler beim Vorbereiten/Senden der E-Mail im Hintergrund: %s", e, exc_info=True)
-
-    threading.Thread(target=_bg_send, daemon=True).start()
-    return True
+    return email_outbox.enqueue(email_params)
 
 
 # --- Hilfsfunktionen für Benachrichtigungssystem ---
@@ -190,20 +155,22 @@ def get_user_notification_preference(user_id_int: int, event_schluessel: str) ->
         return False
 
 
-def get_system_setting(einstellung_schluessel: str) -> str | None:
+def _benachrichtigung_aktiv(user_id_int: int, event_schluessel: str, praeferenzen: dict[str, bool] | None) -> bool:
     """
-    Ruft den Wert einer Systemeinstellung aus der Datenbank ab.
+    Liefert die Benachrichtigungseinstellung aus bereits geladenen Präferenzen oder fragt die Datenbank ab.
 
     Args:
-        einstellung_schluessel (str): Der Schlüssel der Systemeinstellung (z.B. 'TRANSACTION_SALDO_CHANGE').
+        user_id_int (int): Die ID des Benutzers.
+        event_schluessel (str): Der Schlüssel des Benachrichtigungstyps.
+        praeferenzen (dict[str, bool] | None): Vorab geladene Einstellungen (z.B. aus ledger.BookingResult).
 
     Returns:
-        Optional[str]: Der Wert der Einstellung als String, oder None wenn nicht gefunden oder bei Fehler.
+        bool: True, wenn die Benachrichtigung aktiviert ist.
     """
 
-    query = "SELECT einstellung_wert FROM system_einstellungen WHERE einstellung_schluessel = %s"
-    row = db_utils.fetch_one(query, (einstellung_schluessel,), dictionary=True)
-    return row["einstellung_wert"] if row else None
+    if praeferenzen is not None:
+        return praeferenzen.get(event_schluessel, False)
+    return get_user_notification_preference(user_id_int, event_schluessel)
 
 
 def get_user_details_for_notification(user_id_int: int) -> dict | None:
@@ -221,10 +188,12 @@ def get_user_details_for_notification(user_id_int: int) -> dict | None:
     return db_utils.fetch_one(query, (user_id_int,), dictionary=True)
 
 
-def _send_saldo_null_benachrichtigung(user_details: dict, aktueller_saldo: float, logo_pfad: str):
+def _send_saldo_null_benachrichtigung(
+    user_details: dict, aktueller_saldo: float, logo_pfad: str, praeferenzen: dict[str, bool] | None = None
+):
     """Hilfsfunktion zum Senden der "Saldo Null" Benachrichtigung."""
 
-    if not get_user_notification_preference(user_details["id"], "SALDO_NULL"):
+    if not _benachrichtigung_aktiv(user_details["id"], "SALDO_NULL", praeferenzen):
         return
 
     email_params = {
@@ -235,7 +204,7 @@ def _send_saldo_null_benachrichtigung(user_details: dict, aktueller_saldo: float
         "template_context": {"vorname": user_details["vorname"], "saldo": aktueller_saldo},
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info("Saldo-Null Benachrichtigung an %s (ID: %s) gesendet.", user_details["email"], user_details["id"])
     else:
         logger.error(
@@ -245,15 +214,17 @@ def _send_saldo_null_benachrichtigung(user_details: dict, aktueller_saldo: float
         )
 
 
-def _send_user_threshold_benachrichtigung(user_details: dict, aktueller_saldo: int, logo_pfad: str):
+def _send_user_threshold_benachrichtigung(
+    user_details: dict, aktueller_saldo: int, logo_pfad: str, praeferenzen: dict[str, bool] | None = None
+):
     """Hilfsfunktion zum Senden der "Saldowarnung" Benachrichtigung."""
 
     # Breche ab, wenn der aktuelle Saldo gleich dem gesetzten Limit ist und gleichzeitig größer als das Limit -5
     if not (user_details["infomail_user_threshold"] - 5) < aktueller_saldo <= user_details["infomail_user_threshold"]:
         return
 
-    if not get_user_notification_preference(
-        user_details["id"], "THRESHOLD_REMINDER"
+    if not _benachrichtigung_aktiv(
+        user_details["id"], "THRESHOLD_REMINDER", praeferenzen
     ):  # Guard clause: Wenn User es nicht will, abbrechen
         return
 
@@ -266,7 +237,7 @@ def _send_user_threshold_benachrichtigung(user_details: dict, aktueller_saldo: i
         "template_context": {"vorname": user_details["vorname"], "saldo": aktueller_saldo},
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info("Benutzer-Saldowarnung an %s (ID: %s) gesendet.", user_details["email"], user_details["id"])
     else:
         logger.error(
@@ -299,7 +270,7 @@ def _send_responsible_threshold_benachrichtigung(user_details: dict, aktueller_s
         },
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info(
             "Verantwortliche-Saldowarnung (%s %s) an Verantwortliche (%s)  gesendet.",
             user_details["vorname"],
@@ -315,51 +286,29 @@ def _send_responsible_threshold_benachrichtigung(user_details: dict, aktueller_s
         )
 
 
-def _aktuellen_saldo_pruefen(
-    target_user_id: int, saldo_aenderung: float = 0
-) -> Literal[True] | tuple[Literal[False], float, int] | Literal[False]:
-    """
-    Prüft den aktuellen Saldo eines Benutzers vor einer Transaktion.
-
-    Args:
-        target_user_id (int): Die ID des Benutzers, dessen Saldo geprüft werden soll.
-        saldo_aenderung (float, optional): Die geplante Änderung des Saldos (z.B. -1 für Abbuchung). Default: 0
-
-    Returns:
-        True: Wenn der Saldo nach der Änderung ausreichend ist.
-        tuple[Literal[False], float, int]: Ein Tupel (False, aktueller_saldo, max_negativ_saldo),
-                                            wenn der Saldo das Limit unterschreitet.
-                                            aktueller_saldo ist der tatsächliche Saldo vor Änderung.
-        False: Im Falle eines Datenbank- oder Konfigurationsfehlers.
-    """
-
-    max_negativ_saldo = 0
-
-    query = "SELECT SUM(saldo_aenderung) AS saldo FROM transactions WHERE user_id = %s"
-    row = db_utils.fetch_one(query, (target_user_id,), dictionary=True)
-    try:
-        aktueller_saldo = float(row["saldo"]) if row and row.get("saldo") is not None else 0
-    except (TypeError, ValueError) as e:
-        logger.error("Fehler beim Parsen des Saldo für User %s: %s", target_user_id, e)
-        return False
-
-    neuer_saldo = aktueller_saldo + saldo_aenderung
-    if neuer_saldo < max_negativ_saldo:
-        return (False, aktueller_saldo, max_negativ_saldo)
-    return True
-
-
-def aktuellen_saldo_pruefen_und_benachrichtigen(target_user_id: int):
+def aktuellen_saldo_pruefen_und_benachrichtigen(
+    target_user_id: int,
+    user_details: dict | None = None,
+    aktueller_saldo: int | None = None,
+    praeferenzen: dict[str, bool] | None = None,
+):
     """
     Prüft den aktuellen Saldo eines Benutzers nach einer Transaktion und versendet ggf.
     E-Mail-Benachrichtigungen an den Benutzer oder die Verantwortlichen,
     basierend auf den Benutzereinstellungen und Systemeinstellungen.
 
+    Bereits bekannte Daten (z.B. aus ledger.BookingResult) können übergeben werden,
+    dann entfallen die zusätzlichen Datenbankabfragen.
+
     Args:
         target_user_id (int): Die ID des Benutzers, dessen Saldo geprüft werden soll.
+        user_details (dict, optional): Benutzerdaten inkl. E-Mail und infomail-Schwellen.
+        aktueller_saldo (int, optional): Der Kontostand nach der Buchung.
+        praeferenzen (dict[str, bool], optional): Benachrichtigungseinstellungen des Benutzers.
     """
 
-    user_details = get_user_details_for_notification(target_user_id)
+    if user_details is None:
+        user_details = get_user_details_for_notification(target_user_id)
     if not user_details:
         logger.warning(
             "Benutzerdetails für ID %s nicht gefunden in aktuellen_saldo_pruefen_und_benachrichtigen.", target_user_id
@@ -372,34 +321,56 @@ def aktuellen_saldo_pruefen_und_benachrichtigen(target_user_id: int):
         )
         return
 
-    query = "SELECT SUM(saldo_aenderung) AS saldo FROM transactions WHERE user_id = %s"
-    row = db_utils.fetch_one(query, (target_user_id,), dictionary=True)
-    aktueller_saldo = row["saldo"] if row and row.get("saldo") is not None else 0
+    if aktueller_saldo is None:
+        aktueller_saldo = ledger.get_saldo(target_user_id)
 
     logo_pfad_str = str(Path("static/logo/logo-80x109.png"))
 
     if aktueller_saldo == 0:
-        _send_saldo_null_benachrichtigung(user_details, aktueller_saldo, logo_pfad_str)
+        _send_saldo_null_benachrichtigung(user_details, aktueller_saldo, logo_pfad_str, praeferenzen)
 
-    _send_user_threshold_benachrichtigung(user_details, aktueller_saldo, logo_pfad_str)
+    _send_user_threshold_benachrichtigung(user_details, aktueller_saldo, logo_pfad_str, praeferenzen)
 
     _send_responsible_threshold_benachrichtigung(user_details, aktueller_saldo, logo_pfad_str)
 
 
+_api_key_cache = cache.TTLCache(config.cache_config["maxsize"], config.cache_config["api_key_ttl"])
+
+
 def get_user_by_api_key(api_key_value: str) -> tuple[int, str] | None:
     """
-    Ruft den Benutzer anhand des API-Schlüssels aus der Datenbank ab.
+    Ruft den Benutzer anhand des API-Schlüssels ab.
+
+    Ergebnisse werden prozesslokal gecacht. Als Schlüssel dient der SHA-256-Hash des API-Keys
+    zusammen mit der Epoche 'api_keys', die die GUI beim Löschen von Keys erhöht. Ungültige
+    Keys werden kürzer gecacht (negatives Caching), um Brute-Force-Versuche von der Datenbank fernzuhalten.
 
     Args:
         api_key_value (str): Der API-Schlüssel des Benutzers.
 
     Returns:
         Optional[tuple[int, str]]: Ein Tupel mit (user_id, username) oder None.
+
+    Raises:
+        mysql.connector.Error: Bei Datenbankfehlern; sie werden nicht als ungültiger Key gecacht.
     """
 
+    cache_key = (cache.current_epoch("api_keys"), hashlib.sha256(api_key_value.encode("utf-8")).hexdigest())
+    cached = _api_key_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return cached
+
     query = "SELECT u.id, u.username FROM api_users u JOIN api_keys ak ON u.id = ak.user_id WHERE ak.api_key = %s"
-    user = db_utils.fetch_one(query, (api_key_value,), dictionary=False)
-    return (user[0], user[1]) if user else None
+    with db_utils.transaction() as cursor:
+        cursor.execute(query, (api_key_value,))
+        user = cursor.fetchone()
+    if user:
+        result = (user["id"], user["username"])
+        _api_key_cache.set(cache_key, result)
+        return result
+
+    _api_key_cache.set(cache_key, None, ttl=config.cache_config["negative_ttl"])
+    return None
 
 
 def api_key_required(f):
@@ -420,7 +391,11 @@ def api_key_required(f):
             logger.warning("API-Zugriff ohne API-Schlüssel.")
             return jsonify({"message": "API-Schlüssel fehlt!"}), 401
 
-        user_data = get_user_by_api_key(api_key_header)  # user_id, username
+        try:
+            user_data = get_user_by_api_key(api_key_header)  # user_id, username
+        except Error as e:
+            logger.error("Fehler beim Prüfen des API-Schlüssels: %s", e)
+            return jsonify({"error": "Fehler beim Prüfen des API-Schlüssels."}), 500
         if not user_data:
             logger.warning("API-Zugriff mit ungültigem API-Schlüssel: %s", api_key_header)
             return jsonify({"message": "Ungültiger API-Schlüssel!"}), 401
@@ -432,42 +407,59 @@ def api_key_required(f):
     return decorated
 
 
-def finde_benutzer_zu_nfc_token(token_base64: str) -> dict | None:
+# Authentifizierte Antworten: nicht in geteilten Caches ablegen, vor jeder Verwendung revalidieren
+CONDITIONAL_CACHE_CONTROL = "private, no-cache"
+
+
+def _epochen_etag(epochen: tuple[str, ...]) -> str:
     """
-    Findet einen Benutzer in der Datenbank anhand der Base64-kodierten Daten eines NFC-Tokens.
-    Beinhaltet jetzt auch die E-Mail-Adresse des Benutzers.
+    Berechnet einen starken ETag aus URL, Versionsnummer der Anwendung und den Epochen.
 
     Args:
-        token_base64 (str): Die Base64-kodierte NFC-Daten des Tokens.
+        epochen (tuple[str, ...]): Namen der Epochen, von denen die Antwort abhängt.
 
     Returns:
-        Optional[dict]: Ein Dictionary mit den Benutzerdaten (id, nachname, vorname, email, is_locked, token_id)
-                        oder None, falls kein Benutzer gefunden wird.
+        str: Der ETag (ohne Anführungszeichen).
     """
 
-    try:
-        token_bytes = base64.b64decode(token_base64)
-    except binascii.Error:
-        logger.error("Ungültiger Base64-String in finde_benutzer_zu_nfc_token: %s", token_base64)
-        return None
+    versionen = ",".join(f"{name}={cache.current_epoch(name)}" for name in epochen)
+    schluessel = f"{request.full_path}|{app.config.get('version')}|{versionen}"
+    return hashlib.sha256(schluessel.encode("utf-8")).hexdigest()[:32]
 
-    query = """
-        SELECT u.id AS id, u.nachname AS nachname, u.vorname AS vorname, u.email AS email, u.is_locked AS is_locked, t.token_id as token_id
-        FROM nfc_token AS t
-        INNER JOIN users AS u ON t.user_id = u.id
-        WHERE t.token_daten = %s
+
+def conditional_get(*epochen: str):
     """
-    user = db_utils.fetch_one(query, (token_bytes,), dictionary=True)
-    if user:
-        logger.info(
-            "Benutzer via NFC gefunden: ID %s - %s %s (TokenID: %s, Email: %s)",
-            user["id"],
-            user["vorname"],
-            user["nachname"],
-            user["token_id"],
-            user.get("email"),
-        )
-    return user
+    Versieht GET-Antworten mit einem ETag und beantwortet If-None-Match mit 304 Not Modified.
+
+    Der ETag wird vor dem Aufruf der View aus den Epochen (siehe cache.bump_epoch) berechnet,
+    nicht aus dem Body. Stimmt er mit If-None-Match überein, wird die View nicht aufgerufen und
+    die Datenbank nicht abgefragt. Änderungen aus anderen Prozessen werden nach spätestens
+    ``CACHE_EPOCH_INTERVAL`` Sekunden sichtbar. Wird unter ``api_key_required`` angewendet.
+
+    Args:
+        *epochen (str): Namen der Epochen, von denen die Antwort abhängt (z.B. 'ledger', 'users').
+
+    Returns:
+        callable: Der Decorator.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            etag = _epochen_etag(epochen)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = CONDITIONAL_CACHE_CONTROL
+            return response
+
+        return decorated
+
+    return decorator
 
 
 def _send_new_transaction_email(user_details: dict[str, Any], transaction_details: dict[str, Any]):
@@ -495,7 +487,7 @@ def _send_new_transaction_email(user_details: dict[str, Any], transaction_detail
         },
         "logo_dateipfad": str(Path("static/logo/logo-80x109.png")),
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info("Neue Transaktion E-Mail an %s (ID: %s) gesendet.", user_details["email"], user_details["id"])
     else:
         logger.error(
@@ -503,7 +495,92 @@ def _send_new_transaction_email(user_details: dict[str, Any], transaction_detail
         )
 
 
+def _transaction_saldo_change():
+    """
+    Liest die Saldo-Änderung pro Buchung aus der gecachten Systemeinstellung TRANSACTION_SALDO_CHANGE.
+
+    Returns:
+        tuple: (saldo_aenderung, None) bei Erfolg, sonst (None, Flask-Fehlerantwort).
+    """
+
+    try:
+        trans_saldo_aenderung = system_settings.get("TRANSACTION_SALDO_CHANGE")
+    except system_settings.SettingError as e:
+        logger.error("Ungültiger Wert für TRANSACTION_SALDO_CHANGE in system_einstellungen: %s", e)
+        return None, (jsonify({"error": f"TRANSACTION_SALDO_CHANGE in system_einstellungen: {e}"}), 400)
+    except Error as e:
+        logger.error("Fehler beim Laden der Systemeinstellungen: %s", e)
+        return None, (jsonify({"error": "Fehler beim Laden der Systemeinstellungen."}), 500)
+
+    if trans_saldo_aenderung is None:
+        logger.info("TRANSACTION_SALDO_CHANGE nicht konfiguriert, keine Saldo-Änderung möglich.")
+        return None, (
+            jsonify({"error": "TRANSACTION_SALDO_CHANGE nicht konfiguriert, keine Saldo-Änderung möglich."}),
+            400,
+        )
+    return trans_saldo_aenderung, None
+
+
+def _benachrichtigen_nach_buchung(
+    ergebnis: ledger.BookingResult, beschreibung: str, saldo_aenderung: int, saldo_pruefen: bool = True
+):
+    """
+    Versendet die E-Mail-Benachrichtigungen nach einer erfolgreichen Buchung.
+
+    Nutzt die von der Buchung zurückgegebenen Benutzerdaten, den neuen Saldo und die
+    Benachrichtigungseinstellungen, sodass keine weiteren Datenbankabfragen nötig sind.
+
+    Args:
+        ergebnis (ledger.BookingResult): Das Ergebnis der Buchung.
+        beschreibung (str): Beschreibung der Buchung.
+        saldo_aenderung (int): Die gebuchte Saldo-Änderung.
+        saldo_pruefen (bool): False, um die Prüfung der Saldo-Schwellen auszulassen.
+    """
+
+    benutzer = ergebnis.user
+    if not benutzer:
+        return
+
+    if benutzer.get("email") and ergebnis.benachrichtigungen.get("NEUE_TRANSAKTION"):
+        jetzt = datetime.datetime.now()
+        user_details_for_email = {
+            "email": benutzer["email"],
+            "vorname": benutzer.get("vorname", ""),
+            "id": benutzer["id"],
+        }
+        transaction_details_for_email = {
+            "beschreibung": beschreibung,
+            "saldo_aenderung": saldo_aenderung,
+            "neuer_saldo": ergebnis.neuer_saldo,
+            "datum": jetzt.strftime("%d.%m.%Y"),
+            "uhrzeit": jetzt.strftime("%H:%M"),
+        }
+        _send_new_transaction_email(user_details_for_email, transaction_details_for_email)
+
+    if not saldo_pruefen:
+        return
+    aktuellen_saldo_pruefen_und_benachrichtigen(
+        benutzer["id"],
+        user_details=benutzer,
+        aktueller_saldo=ergebnis.neuer_saldo,
+        praeferenzen=ergebnis.benachrichtigungen,
+    )
+
+
 # ------------* FLASK ROUTEN *------------
+@app.before_request
+def start_background_workers():
+    """
+    Startet die Hintergrunddienste (E-Mail-Outbox-Worker) lazy im aktuellen Prozess.
+
+    Wird vor jeder Anfrage aufgerufen, damit jeder Gunicorn-Worker nach dem Fork seinen
+    eigenen Thread erhält. Ist der Worker bereits aktiv, kostet der Aufruf nur einen PID-Vergleich.
+    """
+
+    if not app.testing:
+        email_outbox.ensure_worker_started()
+
+
 @app.route("/version", methods=["GET"])
 @api_key_required
 def get_version_route(api_user_id: int, api_username: str):
@@ -531,6 +608,18 @@ def health_unprotected_route():
     return jsonify({"message": "Healthcheck OK!"})
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """
+    Liefert Laufzeit-Metriken (u.a. Auslastung des Datenbankpools) im Prometheus-Textformat.
+
+    Returns:
+        flask.Response: Die Metriken als text/plain.
+    """
+
+    return metrics.metrics_response()
+
+
 @app.route("/health-protected", methods=["GET"])
 @api_key_required
 def health_protected_route(api_user_id: int, api_username: str):
@@ -561,6 +650,7 @@ def health_protected_route(api_user_id: int, api_username: str):
 
 @app.route("/users", methods=["GET"])
 @api_key_required
+@conditional_get("users")
 def get_all_users(api_user_id: int, api_username: str):
     """
     Gibt eine Liste aller angelegten Benutzer mit ihrem Code, Nachnamen und Vornamen zurück.
@@ -578,11 +668,181 @@ def get_all_users(api_user_id: int, api_username: str):
 
     logger.info("API-Benutzer authentifiziert: ID %s - %s. Rufe alle Benutzer ab.", api_user_id, api_username)
     query = "SELECT code, nachname, vorname FROM users ORDER BY nachname, vorname;"
-    users_list = db_utils.fetch_all(query, dictionary=True)
+    try:
+        # transaction() statt fetch_all: ein Fehler darf nicht als leere Liste (mit ETag) ankommen
+        with db_utils.transaction() as cursor:
+            cursor.execute(query)
+            users_list = cursor.fetchall()
+    except Error as e:
+        logger.error("Fehler beim Abrufen der Benutzer: %s", e)
+        return jsonify({"error": "Fehler beim Abrufen der Benutzer."}), 500
     logger.info("%s Benutzer erfolgreich aus der Datenbank abgerufen.", len(users_list))
     return jsonify(users_list), 200
 
 
+def _unbekannten_token_melden(token_base64: str, token_bytes: bytes | None, terminal: str):
+    """
+    Informiert die Verantwortlichen per E-Mail über einen unbekannten NFC-Token.
+
+    Args:
+        token_base64 (str): Der Token, wie er vom Terminal gesendet wurde.
+        token_bytes (bytes | None): Die dekodierten Rohdaten, None wenn nicht dekodierbar.
+        terminal (str): Beschreibung des Terminals.
+    """
+
+    token_hex = token_bytes.hex().upper() if token_bytes is not None else "Fehler beim Dekodieren"
+
+    email_params = {
+        "empfaenger_email": config.api_config["responsible_email"],
+        "betreff": "Unbekannter NFC-Token gescannt",
+        "template_name_html": "email_unknown_token.html",
+        "template_name_text": "email_unknown_token.txt",
+        "template_context": {
+            "token_hex": token_hex,
+            "token_base64": token_base64,
+            "zeitpunkt": datetime.datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
+            "terminal": terminal,
+            "app_name": config.app_name,
+        },
+        "logo_dateipfad": str(Path("static/logo/logo-80x109.png")),
+    }
+    prepare_and_send_email(email_params)
+
+
+def _nfc_antwort(ergebnis: ledger.BookingResult) -> tuple[dict, int]:
+    """
+    Erzeugt die Antwort an das Terminal für das Ergebnis einer NFC-Buchung.
+
+    Args:
+        ergebnis (ledger.BookingResult): Das Ergebnis der Buchung.
+
+    Returns:
+        tuple[dict, int]: Die JSON-Antwort und der HTTP-Status.
+    """
+
+    benutzer_info = ergebnis.user
+    if ergebnis.status == "unknown" or benutzer_info is None:
+        return {
+            "error": "Dieser Token wurde noch nicht registriert. Die Verantwortlichen wurden per E-Mail informiert."
+        }, 404
+
+    if ergebnis.status == "locked":
+        return {
+            "error": f"Grüße {benutzer_info['vorname']}, leider ist dein Benutzer gesperrt. Bitte wende dich an einen Verantwortlichen!"
+        }, 403
+
+    if ergebnis.status == "insufficient":
+        return {
+            "message": f"Hey {benutzer_info['vorname']}, dein Guthaben beträgt {ergebnis.saldo_vorher} € und "
+            "unterschreitet das Limit. Bitte lade dein Konto wieder auf.",
+            "action": "block",
+        }, 200
+
+    return {
+        "message": f"Prost {benutzer_info['vorname']}! Dein aktueller Kontostand beträgt: {ergebnis.neuer_saldo} €.",
+        "saldo": _saldo_json(ergebnis.neuer_saldo),
+    }, 200
+
+
+def _saldo_json(saldo) -> str | None:
+    """
+    Gibt einen Kontostand im bisherigen Antwortformat aus.
+
+    Vor ``user_balances`` kam der Kontostand als Decimal aus SUM(), das Flask als String
+    serialisiert. Die Terminals erwarten daher weiterhin einen String (z.B. "-3").
+
+    Args:
+        saldo: Der Kontostand (int) oder None.
+
+    Returns:
+        str | None: Der Kontostand als String, None bleibt None.
+    """
+
+    return None if saldo is None else str(saldo)
+
+
+def _nfc_token_dekodieren(token_base64) -> bytes | None:
+    """Dekodiert den Base64-Token eines Terminals, None bei ungültigen Daten."""
+
+    try:
+        return base64.b64decode(token_base64)
+    except (binascii.Error, ValueError, TypeError):
+        logger.error("Ungültiger Base64-String für NFC-Token: %s", token_base64)
+        return None
+
+
+def _anfrage_hash(daten) -> str:
+    """Hash aus Methode, Pfad und Body der aktuellen Anfrage (siehe ``idempotency.request_hash``)."""
+
+    return idempotency.request_hash(request.method, request.path, daten)
+
+
+def _idempotenz_pruefen(api_user_id: int, anfrage_hash: str) -> tuple[str | None, Any]:
+    """
+    Wertet den Header Idempotency-Key einer Buchungsanfrage aus.
+
+    Args:
+        api_user_id (int): Die ID des authentifizierten API-Benutzers.
+        anfrage_hash (str): Hash der aktuellen Anfrage (siehe ``_anfrage_hash``).
+
+    Returns:
+        tuple: (Schlüssel oder None, None) für eine neue bzw. nicht idempotente Anfrage,
+               sonst (Schlüssel, Antwort) mit der gespeicherten Antwort bzw. einem Fehler 400 oder 422.
+    """
+
+    schluessel = request.headers.get(idempotency.HEADER)
+    if schluessel is None:
+        return None, None
+    if not idempotency.valid_key(schluessel):
+        return schluessel, (
+            jsonify(
+                {
+                    "error": f"{idempotency.HEADER} ist ungültig "
+                    f"(1-{idempotency.SCHLUESSEL_MAX_LAENGE} druckbare ASCII-Zeichen)."
+                }
+            ),
+            400,
+        )
+    gespeichert = idempotency.get(api_user_id, schluessel)
+    if gespeichert is None:
+        return schluessel, None
+    return schluessel, _wiederholte_antwort(schluessel, gespeichert, anfrage_hash)
+
+
+def _wiederholte_antwort(schluessel: str, gespeichert: idempotency.GespeicherteAntwort, anfrage_hash: str):
+    """
+    Liefert die gespeicherte Antwort einer bereits ausgeführten Buchung erneut aus.
+
+    Gehört der Schlüssel zu einer anderen Anfrage (Methode, Pfad oder Body abweichend), gibt es
+    stattdessen einen Fehler 422.
+    """
+
+    if not idempotency.matches(gespeichert, anfrage_hash):
+        logger.warning("%s %s wurde für eine andere Anfrage wiederverwendet.", idempotency.HEADER, schluessel)
+        antwort, status_code = idempotency.conflict_response()
+        return jsonify(antwort), status_code
+
+    logger.info("Wiederholte Anfrage mit %s %s, liefere gespeicherte Antwort.", idempotency.HEADER, schluessel)
+    response = jsonify(gespeichert.antwort)
+    response.status_code = gespeichert.status_code
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _idempotenz_nach_fehler(api_user_id: int, schluessel: str | None, anfrage_hash: str, fehler: Error):
+    """
+    Prüft nach einem Datenbankfehler, ob eine parallele Anfrage denselben Schlüssel bereits gebucht hat.
+
+    Returns:
+        Die Antwort der parallelen Anfrage (bzw. ein Fehler 422 bei abweichender Anfrage) oder None.
+    """
+
+    if schluessel is None or not idempotency.is_duplicate_error(fehler):
+        return None
+    gespeichert = idempotency.get(api_user_id, schluessel)
+    return _wiederholte_antwort(schluessel, gespeichert, anfrage_hash) if gespeichert else None
+
+
 @app.route("/nfc-transaktion", methods=["PUT"])
 @api_key_required
 def nfc_transaction(api_user_id_auth: int, api_username_auth: str):
@@ -590,6 +850,8 @@ def nfc_transaction(api_user_id_auth: int, api_username_auth: str):
     Verarbeitet eine NFC-Transaktion. Ordnet die Tokendaten einem Benutzer zu,
     verbucht -1 Saldo und löst ggf. E-Mail-Benachrichtigungen aus.
 
+    Mit dem Header Idempotency-Key liefert eine Wiederholung die gespeicherte Antwort, ohne erneut zu buchen.
+
     Args:
         api_user_id_auth (int): Die ID des authentifizierten API-Benutzers.
         api_username_auth (str): Der Benutzername des authentifizierten API-Benutzers.
@@ -608,146 +870,247 @@ def nfc_transaction(api_user_id_auth: int, api_username_auth: str):
         api_username_auth,
     )
 
-    benutzer_info = finde_benutzer_zu_nfc_token(daten["token"])
-    if not benutzer_info:
-        try:
-            token_bytes = base64.b64decode(daten["token"])
-            token_hex = token_bytes.hex().upper()
-        except (binascii.Error, ValueError, TypeError):
-            token_hex = "Fehler beim Dekodieren"
-
-        email_params = {
-            "empfaenger_email": config.api_config["responsible_email"],
-            "betreff": "Unbekannter NFC-Token gescannt",
-            "template_name_html": "email_unknown_token.html",
-            "template_name_text": "email_unknown_token.txt",
-            "template_context": {
-                "token_hex": token_hex,
-                "token_base64": daten["token"],
-                "zeitpunkt": datetime.datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
-                "terminal": daten.get("beschreibung", "Unbekannt"),
-                "app_name": config.app_name,
-            },
-            "logo_dateipfad": str(Path("static/logo/logo-80x109.png")),
-        }
-        prepare_and_send_email(email_params, config.smtp_config)
+    anfrage_hash = _anfrage_hash(daten)
+    schluessel, gespeicherte_antwort = _idempotenz_pruefen(api_user_id_auth, anfrage_hash)
+    if gespeicherte_antwort:
+        return gespeicherte_antwort
 
-        return jsonify(
-            {"error": "Dieser Token wurde noch nicht registriert. Die Verantwortlichen wurden per E-Mail informiert."}
-        ), 404
-
-    if benutzer_info.get("is_locked") == 1:
-        return jsonify(
-            {
-                "error": f"Grüße {benutzer_info['vorname']}, leider ist dein Benutzer gesperrt. Bitte wende dich an einen Verantwortlichen!"
-            }
-        ), 403
+    trans_saldo_aenderung, fehler_antwort = _transaction_saldo_change()
+    if fehler_antwort:
+        return fehler_antwort
 
-    trans_saldo_aenderung_str = get_system_setting("TRANSACTION_SALDO_CHANGE")
-    if trans_saldo_aenderung_str is None:
+    token_bytes = _nfc_token_dekodieren(daten["token"])
+    if token_bytes is None:
+        ergebnis = ledger.BookingResult("unknown")
+    else:
+        idempotenz = (
+            idempotency.Anfrage(api_user_id_auth, schluessel, anfrage_hash, _nfc_antwort) if schluessel else None
+        )
+        try:
+            ergebnis = ledger.book_by_token(
+                token_bytes, daten["beschreibung"], trans_saldo_aenderung, idempotenz=idempotenz
+            )
+        except Error as e:
+            wiederholung = _idempotenz_nach_fehler(api_user_id_auth, schluessel, anfrage_hash, e)
+            if wiederholung:
+                return wiederholung
+            logger.error("Fehler bei NFC-Transaktion: DB-Fehler bei der Buchung: %s", e)
+            return jsonify({"error": "Fehler bei der Transaktionsverarbeitung."}), 500
+
+    if ergebnis.status == "unknown":
+        _unbekannten_token_melden(daten["token"], token_bytes, daten.get("beschreibung", "Unbekannt"))
+    else:
+        benutzer_info = ergebnis.user
+        assert benutzer_info is not None
         logger.info(
-            "TRANSACTION_SALDO_CHANGE nicht konfiguriert, keine Saldo-Änderung für User %s.",
+            "Benutzer via NFC gefunden: ID %s - %s %s (TokenID: %s, Email: %s)",
             benutzer_info["id"],
+            benutzer_info["vorname"],
+            benutzer_info["nachname"],
+            benutzer_info["token_id"],
+            benutzer_info.get("email"),
         )
-        return jsonify(
-            {
-                "error": f"TRANSACTION_SALDO_CHANGE nicht konfiguriert, keine Saldo-Änderung für User {benutzer_info['id']} möglich."
-            }
-        ), 400
-
-    try:
-        trans_saldo_aenderung = int(trans_saldo_aenderung_str)
-    except ValueError:
-        logger.error(
-            "Ungültiger Wert für TRANSACTION_SALDO_CHANGE ('%s') in system_einstellungen.",
-            trans_saldo_aenderung_str,
-        )
-        return jsonify(
-            {
-                "error": f"Ungültiger Wert für TRANSACTION_SALDO_CHANGE ('{trans_saldo_aenderung_str}') in system_einstellungen."
-            }
-        ), 400
 
-    saldo_pruefung = _aktuellen_saldo_pruefen(benutzer_info["id"], trans_saldo_aenderung)
-    if isinstance(saldo_pruefung, tuple):
+    if ergebnis.status == "insufficient":
         logger.warning(
             "Transaktion für User %s blockiert, da das Guthaben von %s nicht ausreichend ist",
-            benutzer_info["id"],
-            saldo_pruefung[1],
+            ergebnis.user["id"],
+            ergebnis.saldo_vorher,
         )
-        return jsonify(
-            {
-                "message": f"Hey {benutzer_info['vorname']}, dein Guthaben beträgt {saldo_pruefung[1]} € und "
-                "unterschreitet das Limit. Bitte lade dein Konto wieder auf.",
-                "action": "block",
-            }
-        ), 200
-    if saldo_pruefung is False:
-        logger.error("Fehler bei der Saldoprüfung für Benutzer %s. Aktion blockiert.", benutzer_info["id"])
-        return jsonify(
-            {
-                "message": f"Hey {benutzer_info['vorname']}, es gab ein technisches Problem bei der Überprüfung deines Saldos. "
-                "Bitte versuche es später erneut oder kontaktiere einen Verantwortlichen.",
-                "action": "error",
-            }
-        ), 200
 
-    # update nfc_token set last_used
-    db_utils.execute_commit(
-        "UPDATE nfc_token SET last_used = NOW() WHERE token_id = %s", (int(benutzer_info["token_id"]),)
+    if ergebnis.ok:
+        logger.info(
+            "Transaktion für %s (ID: %s), '%s', Saldo: %s = %s erfolgreich erstellt.",
+            ergebnis.user["vorname"],
+            ergebnis.user["id"],
+            daten["beschreibung"],
+            trans_saldo_aenderung,
+            ergebnis.neuer_saldo,
+        )
+        _benachrichtigen_nach_buchung(ergebnis, daten["beschreibung"], trans_saldo_aenderung)
+
+    antwort, status_code = _nfc_antwort(ergebnis)
+    if schluessel and token_bytes is not None:
+        idempotency.remember(
+            api_user_id_auth, schluessel, idempotency.GespeicherteAntwort(status_code, antwort, anfrage_hash)
+        )
+    return jsonify(antwort), status_code
+
+
+NFC_BATCH_MAX_SCANS = 500
+
+
+def _batch_scan_lesen(eintrag) -> tuple[ledger.TokenScan | None, str | None]:
+    """
+    Prüft einen Scan aus POST /nfc-transaktionen/batch.
+
+    Args:
+        eintrag: Das JSON-Objekt des Scans.
+
+    Returns:
+        tuple: (TokenScan, None) bei gültigen Daten, sonst (None, Fehlermeldung).
+    """
+
+    if not isinstance(eintrag, dict):
+        return None, "Scan muss ein JSON-Objekt sein."
+    if not idempotency.valid_key(eintrag.get("idempotency_key")):
+        return None, (
+            f"idempotency_key fehlt oder ist ungültig (1-{idempotency.SCHLUESSEL_MAX_LAENGE} druckbare ASCII-Zeichen)."
+        )
+    beschreibung = eintrag.get("beschreibung")
+    if not isinstance(beschreibung, str) or not beschreibung:
+        return None, "beschreibung fehlt."
+    token_bytes = _nfc_token_dekodieren(eintrag.get("token"))
+    if not token_bytes:
+        return None, "token fehlt oder ist kein gültiger Base64-String."
+    try:
+        zeitpunkt = datetime.datetime.fromisoformat(eintrag.get("timestamp"))
+    except (TypeError, ValueError):
+        return None, "timestamp fehlt oder ist kein ISO-8601-Zeitpunkt."
+
+    jetzt = datetime.datetime.now()
+    if zeitpunkt.tzinfo is not None:
+        zeitpunkt = zeitpunkt.astimezone().replace(tzinfo=None)
+    # Uhren der Terminals können vorgehen; Buchungen in der Zukunft gibt es nicht
+    zeitpunkt = min(zeitpunkt, jetzt)
+    return (
+        ledger.TokenScan(eintrag["idempotency_key"], token_bytes, beschreibung, zeitpunkt, _anfrage_hash(eintrag)),
+        None,
     )
 
-    # insert transaction
-    success, _ = db_utils.execute_commit(
-        "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung) VALUES (%s, %s, %s)",
-        (benutzer_info["id"], daten["beschreibung"], trans_saldo_aenderung),
+
+@app.route("/nfc-transaktionen/batch", methods=["POST"])
+@api_key_required
+def nfc_transaktionen_batch(api_user_id_auth: int, api_username_auth: str):
+    """
+    Bucht offline gesammelte NFC-Scans eines Terminals in einer Datenbanktransaktion.
+
+    Jeder Scan trägt einen eindeutigen Idempotenz-Schlüssel. Wird ein Stapel erneut gesendet
+    (z.B. weil die Antwort verloren ging), liefern bereits verarbeitete Scans ihre gespeicherte
+    Antwort, ohne erneut zu buchen. Ungültige Scans werden mit Status 400 abgelehnt und nicht
+    gespeichert; ein Schlüssel, der zu einem anderen Scan gehört, ergibt Status 422.
+
+    Args:
+        api_user_id_auth (int): Die ID des authentifizierten API-Benutzers.
+        api_username_auth (str): Der Benutzername des authentifizierten API-Benutzers.
+
+    Body (JSON): [{"idempotency_key": str, "token": "BASE64_TOKEN", "beschreibung": str,
+                   "timestamp": "2026-05-01T18:30:00+02:00"}, ...]
+
+    Returns:
+        flask.Response: {"ergebnisse": [{"idempotency_key", "status_code", "wiederholt", "antwort"}, ...],
+                         "gebucht": int} in der Reihenfolge der Scans; "antwort" entspricht der
+                         Antwort von PUT /nfc-transaktion.
+    """
+
+    daten = request.get_json(silent=True)
+    if not isinstance(daten, list) or not daten:
+        return jsonify({"error": "Ungültige Anfrage. Erwartet wird eine Liste von Scans."}), 400
+    if len(daten) > NFC_BATCH_MAX_SCANS:
+        return jsonify({"error": f"Höchstens {NFC_BATCH_MAX_SCANS} Scans pro Anfrage."}), 400
+
+    logger.info(
+        "NFC-Sammelbuchung mit %s Scans von API-Benutzer: ID %s - %s.", len(daten), api_user_id_auth, api_username_auth
     )
-    if not success:
-        logger.error(
-            "Fehler bei NFC-Transaktion für User %s: DB-Fehler beim Insert.", benutzer_info.get("id", "Unbekannt")
+
+    trans_saldo_aenderung, fehler_antwort = _transaction_saldo_change()
+    if fehler_antwort:
+        return fehler_antwort
+
+    ausgabe: list[dict | None] = []
+    scans: list[ledger.TokenScan] = []
+    for eintrag in daten:
+        scan, fehler = _batch_scan_lesen(eintrag)
+        if scan is None:
+            schluessel = eintrag.get("idempotency_key") if isinstance(eintrag, dict) else None
+            ausgabe.append(
+                {"idempotency_key": schluessel, "status_code": 400, "wiederholt": False, "antwort": {"error": fehler}}
+            )
+        else:
+            scans.append(scan)
+            ausgabe.append(None)
+
+    ergebnisse: list[ledger.BatchItemResult] = []
+    for versuch in range(2):
+        try:
+            ergebnisse = ledger.book_token_batch(api_user_id_auth, scans, trans_saldo_aenderung, _nfc_antwort)
+            break
+        except Error as e:
+            # derselbe Schlüssel wurde gleichzeitig von einer anderen Anfrage gespeichert: erneut lesen
+            if versuch == 0 and idempotency.is_duplicate_error(e):
+                continue
+            logger.error("Fehler bei NFC-Sammelbuchung: DB-Fehler bei der Buchung: %s", e)
+            return jsonify({"error": "Fehler bei der Transaktionsverarbeitung."}), 500
+
+    gemeldete_tokens: set[bytes] = set()
+    letzte_buchung: dict[int, ledger.BookingResult] = {}
+    for scan, item in zip(scans, ergebnisse, strict=True):
+        ergebnis = item.ergebnis
+        if ergebnis is None:
+            continue
+        if ergebnis.status == "unknown" and scan.token_bytes not in gemeldete_tokens:
+            gemeldete_tokens.add(scan.token_bytes)
+            _unbekannten_token_melden(
+                base64.b64encode(scan.token_bytes).decode("ascii"), scan.token_bytes, scan.beschreibung
+            )
+        elif ergebnis.ok:
+            _benachrichtigen_nach_buchung(ergebnis, scan.beschreibung, trans_saldo_aenderung, saldo_pruefen=False)
+            letzte_buchung[ergebnis.user["id"]] = ergebnis
+    # Schwellen nur einmal je Benutzer mit dem Kontostand nach der letzten Buchung prüfen
+    for ergebnis in letzte_buchung.values():
+        aktuellen_saldo_pruefen_und_benachrichtigen(
+            ergebnis.user["id"],
+            user_details=ergebnis.user,
+            aktueller_saldo=ergebnis.neuer_saldo,
+            praeferenzen=ergebnis.benachrichtigungen,
         )
-        return jsonify({"error": "Fehler bei der Transaktionsverarbeitung."}), 500
 
-    # select sum
-    saldo_row = db_utils.fetch_one(
-        "SELECT SUM(saldo_aenderung) AS saldo FROM transactions WHERE user_id = %s",
-        (benutzer_info["id"],),
-        dictionary=True,
-    )
-    neuer_saldo = saldo_row["saldo"] if saldo_row and saldo_row["saldo"] is not None else 0
+    items = iter(zip(scans, ergebnisse, strict=True))
+    for i, eintrag in enumerate(ausgabe):
+        if eintrag is None:
+            scan, item = next(items)
+            ausgabe[i] = {
+                "idempotency_key": scan.idempotency_key,
+                "status_code": item.status_code,
+                "wiederholt": item.wiederholt,
+                "antwort": item.antwort,
+            }
 
+    gebucht = sum(1 for item in ergebnisse if item.ergebnis is not None and item.ergebnis.ok)
     logger.info(
-        "Transaktion für %s (ID: %s), '%s', Saldo: %s = %s erfolgreich erstellt.",
-        benutzer_info["vorname"],
-        benutzer_info["id"],
-        daten["beschreibung"],
-        trans_saldo_aenderung,
-        neuer_saldo,
+        "NFC-Sammelbuchung: %s von %s Scans gebucht (API-Benutzer ID %s).", gebucht, len(daten), api_user_id_auth
     )
+    return jsonify({"ergebnisse": ausgabe, "gebucht": gebucht}), 200
 
-    if benutzer_info.get("email") and get_user_notification_preference(benutzer_info["id"], "NEUE_TRANSAKTION"):
-        jetzt = datetime.datetime.now()
-        user_details_for_email = {
-            "email": benutzer_info["email"],
-            "vorname": benutzer_info.get("vorname", ""),
-            "id": benutzer_info["id"],
-        }
-        transaction_details_for_email = {
-            "beschreibung": daten["beschreibung"],
-            "saldo_aenderung": trans_saldo_aenderung,
-            "neuer_saldo": neuer_saldo,
-            "datum": jetzt.strftime("%d.%m.%Y"),
-            "uhrzeit": jetzt.strftime("%H:%M"),
-        }
-        _send_new_transaction_email(user_details_for_email, transaction_details_for_email)
-    aktuellen_saldo_pruefen_und_benachrichtigen(benutzer_info["id"])
 
-    return jsonify(
-        {
-            "message": f"Prost {benutzer_info['vorname']}! Dein aktueller Kontostand beträgt: {neuer_saldo} €.",
-            "saldo": neuer_saldo,
-        }
-    ), 200
+def _person_antwort(ergebnis: ledger.BookingResult, code: str) -> tuple[dict, int]:
+    """
+    Erzeugt die Antwort für das Ergebnis einer Buchung über PUT /person/<code>/transaktion.
+
+    Args:
+        ergebnis (ledger.BookingResult): Das Ergebnis der Buchung.
+        code (str): Der Code der Person.
+
+    Returns:
+        tuple[dict, int]: Die JSON-Antwort und der HTTP-Status.
+    """
+
+    user_info = ergebnis.user
+    if ergebnis.status == "unknown" or user_info is None:
+        return {"error": f"Person mit Code {code} nicht gefunden."}, 404
+
+    if ergebnis.status == "locked":
+        return {
+            "message": f"Grüße {user_info['vorname']}, leider ist dein Benutzer gesperrt. "
+            "Bitte melde dich bei einem Verantwortlichen.",
+            "action": "locked",
+        }, 200
+
+    return {
+        "message": f"Prost {user_info['vorname']}! Dein aktueller Kontostand beträgt: {ergebnis.neuer_saldo} €.",
+        "saldo": _saldo_json(ergebnis.neuer_saldo),
+        "vorname": user_info["vorname"],
+    }, 200
 
 
 @app.route("/person/<string:code>/transaktion", methods=["PUT"])
@@ -757,6 +1120,8 @@ def person_transaktion_erstellen(api_user_id_auth: int, api_username_auth: str,
     Erstellt eine Transaktion für einen Benutzer anhand seines Codes.
     Löst ggf. E-Mail-Benachrichtigungen aus.
 
+    Mit dem Header Idempotency-Key liefert eine Wiederholung die gespeicherte Antwort, ohne erneut zu buchen.
+
     Args:
         api_user_id_auth (int): Die ID des authentifizierten API-Benutzers.
         api_username_auth (str): Der Benutzername des authentifizierten API-Benutzers.
@@ -772,108 +1137,88 @@ def person_transaktion_erstellen(api_user_id_auth: int, api_username_auth: str,
     if not daten or "beschreibung" not in daten:
         return jsonify({"error": "Ungültige Anfrage. Beschreibung ist erforderlich."}), 400
 
-    user_info = get_user_details_by_code(code)
-    if not user_info:
-        return jsonify({"error": f"Person mit Code {code} nicht gefunden."}), 404
-    if user_info.get("is_locked") == 1:
-        return jsonify(
-            {
-                "message": f"Grüße {user_info['vorname']}, leider ist dein Benutzer gesperrt. "
-                "Bitte melde dich bei einem Verantwortlichen.",
-                "action": "locked",
-            }
-        ), 200
-
-    trans_saldo_aenderung_str = get_system_setting("TRANSACTION_SALDO_CHANGE")
-    if trans_saldo_aenderung_str is None:
-        logger.info("TRANSACTION_SALDO_CHANGE nicht konfiguriert, keine Saldo-Änderung für User %s.", user_info["id"])
-        return jsonify(
-            {
-                "error": f"TRANSACTION_SALDO_CHANGE nicht konfiguriert, keine Saldo-Änderung für User {user_info['id']} möglich."
-            }
-        ), 400
+    anfrage_hash = _anfrage_hash(daten)
+    schluessel, gespeicherte_antwort = _idempotenz_pruefen(api_user_id_auth, anfrage_hash)
+    if gespeicherte_antwort:
+        return gespeicherte_antwort
 
-    try:
-        trans_saldo_aenderung = int(trans_saldo_aenderung_str)
-    except ValueError:
-        logger.error(
-            "Ungültiger Wert für TRANSACTION_SALDO_CHANGE ('%s') in system_einstellungen.", trans_saldo_aenderung_str
-        )
-        return jsonify(
-            {
-                "error": f"Ungültiger Wert für TRANSACTION_SALDO_CHANGE ('{trans_saldo_aenderung_str}') in system_einstellungen."
-            }
-        ), 400
+    trans_saldo_aenderung, fehler_antwort = _transaction_saldo_change()
+    if fehler_antwort:
+        return fehler_antwort
 
-    success, _ = db_utils.execute_commit(
-        "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung) VALUES (%s, %s, %s)",
-        (user_info["id"], daten["beschreibung"], trans_saldo_aenderung),
+    idempotenz = (
+        idempotency.Anfrage(api_user_id_auth, schluessel, anfrage_hash, functools.partial(_person_antwort, code=code))
+        if schluessel
+        else None
     )
-    if not success:
-        logger.error("Fehler bei Transaktion für Code %s: DB-Fehler beim Insert.", code)
+    try:
+        ergebnis = ledger.book_by_code(code, daten["beschreibung"], trans_saldo_aenderung, idempotenz=idempotenz)
+    except Error as e:
+        wiederholung = _idempotenz_nach_fehler(api_user_id_auth, schluessel, anfrage_hash, e)
+        if wiederholung:
+            return wiederholung
+        logger.error("Fehler bei Transaktion für Code %s: DB-Fehler bei der Buchung: %s", code, e)
         return jsonify({"error": "Fehler beim Erstellen der Transaktion."}), 500
 
-    logger.info(
-        "Transaktion für %s (ID: %s, Code: %s), '%s', Saldo: %s€ erfolgreich erstellt.",
-        user_info["vorname"],
-        user_info["id"],
-        code,
-        daten["beschreibung"],
-        trans_saldo_aenderung,
-    )
+    if ergebnis.ok:
+        logger.info(
+            "Transaktion für %s (ID: %s, Code: %s), '%s', Saldo: %s€ erfolgreich erstellt.",
+            ergebnis.user["vorname"],
+            ergebnis.user["id"],
+            code,
+            daten["beschreibung"],
+            trans_saldo_aenderung,
+        )
+        _benachrichtigen_nach_buchung(ergebnis, daten["beschreibung"], trans_saldo_aenderung)
 
-    saldo_row = db_utils.fetch_one(
-        "SELECT SUM(saldo_aenderung) AS saldo FROM transactions WHERE user_id = %s", (user_info["id"],), dictionary=True
-    )
-    neuer_saldo = saldo_row["saldo"] if saldo_row and saldo_row["saldo"] is not None else 0
+    antwort, status_code = _person_antwort(ergebnis, code)
+    if schluessel:
+        idempotency.remember(
+            api_user_id_auth, schluessel, idempotency.GespeicherteAntwort(status_code, antwort, anfrage_hash)
+        )
+    return jsonify(antwort), status_code
 
-    if user_info.get("email") and get_user_notification_preference(user_info["id"], "NEUE_TRANSAKTION"):
-        jetzt = datetime.datetime.now()
-        user_details_for_email = {
-            "email": user_info["email"],
-            "vorname": user_info.get("vorname", ""),
-            "id": user_info["id"],
-        }
-        transaction_details_for_email = {
-            "beschreibung": daten["beschreibung"],
-            "saldo_aenderung": trans_saldo_aenderung,
-            "neuer_saldo": neuer_saldo,
-            "datum": jetzt.strftime("%d.%m.%Y"),
-            "uhrzeit": jetzt.strftime("%H:%M"),
-        }
-        _send_new_transaction_email(user_details_for_email, transaction_details_for_email)
-    aktuellen_saldo_pruefen_und_benachrichtigen(user_info["id"])
 
-    return jsonify(
-        {
-            "message": f"Prost {user_info['vorname']}! Dein aktueller Kontostand beträgt: {neuer_saldo} €.",
-            "saldo": neuer_saldo,
-            "vorname": user_info["vorname"],
-        }
-    ), 200
+_SALDO_ALLE_QUERY = (
+    "SELECT u.id, u.nachname AS nachname, u.vorname AS vorname, b.saldo AS saldo "
+    "FROM users AS u LEFT JOIN user_balances AS b ON u.id = b.user_id ORDER BY saldo DESC, u.nachname, u.vorname"
+)
 
 
-def get_user_details_by_code(code_val: str) -> dict | None:
+def _saldo_alle_laden() -> bytes:
     """
-    Ruft ID, Vorname, E-Mail und Accountstatus (gesperrt/nicht gesperrt) eines Benutzers anhand seines Codes ab.
-
-    Args:
-        code_val (str): Der Benutzercode.
+    Berechnet die Antwort für /saldo-alle.
 
     Returns:
-        Optional[dict]: Ein Dictionary mit {'id': int, 'vorname': str, 'email': str, 'is_locked': int} oder None.
+        bytes: Der JSON-Body.
+
+    Raises:
+        mysql.connector.Error: Bei Datenbankfehlern (das Ergebnis wird dann nicht gecacht).
     """
 
-    query = "SELECT id, vorname, email, is_locked FROM users WHERE code = %s"
-    return db_utils.fetch_one(query, (code_val,), dictionary=True)
+    with db_utils.transaction() as cursor:
+        cursor.execute(_SALDO_ALLE_QUERY)
+        personen_saldo = cursor.fetchall()
+    for person in personen_saldo:
+        person["saldo"] = _saldo_json(person["saldo"])
+    body = app.json.response(personen_saldo).get_data()
+    logger.info("Saldo aller Personen wurde ermittelt (%s Einträge).", len(personen_saldo))
+    return body
+
+
+# Wird nur neu berechnet, wenn sich Buchungen oder Benutzer geändert haben
+_saldo_alle_cache = cache.VersionedValue(_saldo_alle_laden)
 
 
 @app.route("/saldo-alle", methods=["GET"])
 @api_key_required
+@conditional_get(ledger.EPOCH_NAME, "users")
 def get_alle_summe(api_user_id: int, api_username: str):
     """
     Gibt das Saldo aller Personen in der Datenbank zurück (nur für authentifizierte API-Benutzer).
 
+    Die Antwort wird pro Stand der Epochen 'ledger' und 'users' einmal berechnet und gecacht.
+
     Args:
         api_user_id (int): Die ID des authentifizierten API-Benutzers.
         api_username (str): Der Benutzername des authentifizierten API-Benutzers.
@@ -882,36 +1227,147 @@ def get_alle_summe(api_user_id: int, api_username: str):
         flask.Response: Eine JSON-Antwort mit einer Liste von Benutzern und ihrem Saldo.
     """
 
-    logger.info("API-Benutzer authentifiziert: ID %s - %s. Rufe Saldo aller Personen ab.", api_user_id, api_username)
-    query = (
-        "SELECT u.id, u.nachname AS nachname, u.vorname AS vorname, SUM(t.saldo_aenderung) AS saldo "
-        "FROM users AS u LEFT JOIN transactions AS t ON u.id = t.user_id GROUP BY u.id, u.nachname, u.vorname ORDER BY saldo DESC, u.nachname, u.vorname;"
+    logger.debug("API-Benutzer authentifiziert: ID %s - %s. Rufe Saldo aller Personen ab.", api_user_id, api_username)
+    version = (cache.current_epoch(ledger.EPOCH_NAME), cache.current_epoch("users"))
+    try:
+        body = _saldo_alle_cache.get(version)
+    except Error as e:
+        logger.error("Fehler beim Ermitteln des Saldos aller Personen: %s", e)
+        return jsonify({"error": "Fehler beim Abrufen der Salden."}), 500
+
+    return Response(body, mimetype="application/json")
+
+
+_TRANSAKTIONEN_QUERY = (
+    "SELECT t.id, u.nachname AS nachname, u.vorname AS vorname, t.beschreibung, t.timestamp "
+    "FROM transactions AS t INNER JOIN users AS u ON t.user_id = u.id"
+)
+_TRANSAKTIONEN_ORDER = " ORDER BY t.timestamp DESC, t.id DESC"
+TRANSAKTIONEN_MAX_LIMIT = 1000
+TRANSAKTIONEN_DEFAULT_LIMIT = 100
+
+
+def _stream_transaktionen(rows: Iterator[dict], ndjson: bool) -> Iterator[str]:
+    """
+    Serialisiert Transaktionen blockweise als JSON-Array bzw. NDJSON (eine Zeile pro Transaktion).
+
+    Args:
+        rows (Iterator[dict]): Die Zeilen, z.B. aus db_utils.iter_rows.
+        ndjson (bool): True für NDJSON, False für ein JSON-Array.
+
+    Yields:
+        str: Teile der Antwort.
+    """
+
+    trenner = "\n" if ndjson else ","
+    block: list[str] = []
+    erste = True
+    if not ndjson:
+        yield "["
+    for row in rows:
+        block.append(app.json.dumps(row))
+        if len(block) >= 200:
+            yield ("" if erste or ndjson else trenner) + trenner.join(block) + ("\n" if ndjson else "")
+            erste = False
+            block = []
+    if block:
+        yield ("" if erste or ndjson else trenner) + trenner.join(block) + ("\n" if ndjson else "")
+    if not ndjson:
+        yield "]"
+
+
+def _transaktionen_seite(after_id_str: str | None, limit_str: str | None):
+    """
+    Liefert eine Seite Transaktionen per Keyset-Pagination (neueste zuerst).
+
+    Die Sortierung (timestamp DESC, id DESC) nutzt den Index idx_transactions_timestamp_id;
+    der Einstiegspunkt wird über die ID der letzten Transaktion der vorherigen Seite bestimmt.
+
+    Args:
+        after_id_str (str | None): ID der letzten Transaktion der vorherigen Seite.
+        limit_str (str | None): Anzahl der Einträge pro Seite.
+
+    Returns:
+        flask.Response: {"transaktionen": [...], "next_after_id": int | null}
+    """
+
+    try:
+        limit = int(limit_str) if limit_str else TRANSAKTIONEN_DEFAULT_LIMIT
+        after_id = int(after_id_str) if after_id_str else None
+    except ValueError:
+        return jsonify({"error": "after_id und limit müssen ganze Zahlen sein."}), 400
+    if not 1 <= limit <= TRANSAKTIONEN_MAX_LIMIT:
+        return jsonify({"error": f"limit muss zwischen 1 und {TRANSAKTIONEN_MAX_LIMIT} liegen."}), 400
+
+    seiten_query = (
+        _TRANSAKTIONEN_QUERY
+        + " WHERE t.timestamp < %s OR (t.timestamp = %s AND t.id < %s)"
+        + _TRANSAKTIONEN_ORDER
+        + " LIMIT %s"
     )
-    personen_saldo = db_utils.fetch_all(query, dictionary=True)
-    logger.info("Saldo aller Personen wurde ermittelt (%s Einträge).", len(personen_saldo))
-    return jsonify(personen_saldo)
+    try:
+        # Anker und Seite in einer Transaktion; Fehler dürfen nicht als "Ende des Exports" ankommen
+        with db_utils.transaction() as cursor:
+            if after_id is None:
+                cursor.execute(_TRANSAKTIONEN_QUERY + _TRANSAKTIONEN_ORDER + " LIMIT %s", (limit + 1,))
+            else:
+                cursor.execute("SELECT timestamp FROM transactions WHERE id = %s", (after_id,))
+                anker = cursor.fetchone()
+                if not anker:
+                    return jsonify({"error": f"Transaktion {after_id} (after_id) nicht gefunden."}), 400
+                cursor.execute(seiten_query, (anker["timestamp"], anker["timestamp"], after_id, limit + 1))
+            rows = cursor.fetchall()
+    except Error as e:
+        logger.error("Fehler beim Abrufen einer Seite Transaktionen: %s", e)
+        return jsonify({"error": "Fehler beim Abrufen der Transaktionen."}), 500
+
+    next_after_id = rows[limit - 1]["id"] if len(rows) > limit else None
+    return jsonify({"transaktionen": rows[:limit], "next_after_id": next_after_id})
 
 
 @app.route("/transaktionen", methods=["GET"])
 @api_key_required
+@conditional_get(ledger.EPOCH_NAME, "users")
 def get_alle_transaktionen(api_user_id: int, api_username: str):
     """
-    Gibt alle Transaktionen in der Datenbank zurück, angereichert mit Benutzerinformationen
+    Gibt die Transaktionen in der Datenbank zurück, angereichert mit Benutzerinformationen
     (nur für authentifizierte API-Benutzer).
 
+    Ohne Parameter werden alle Transaktionen als JSON-Array gestreamt, mit ``format=ndjson``
+    als NDJSON. Mit ``limit`` und/oder ``after_id`` wird eine einzelne Seite zurückgegeben.
+
     Args:
         api_user_id (int): Die ID des authentifizierten API-Benutzers.
         api_username (str): Der Benutzername des authentifizierten API-Benutzers.
 
+    Query-Parameter:
+        after_id (int, optional): ID der letzten Transaktion der vorherigen Seite.
+        limit (int, optional): Einträge pro Seite (1-1000, Standard 100).
+        format (str, optional): "ndjson" für zeilenweises JSON beim Komplettexport.
+
     Returns:
         flask.Response: Eine JSON-Antwort mit einer Liste aller Transaktionen mit Benutzerinformationen.
     """
 
-    logger.info("API-Benutzer authentifiziert: ID %s - %s. Rufe alle Transaktionen ab.", api_user_id, api_username)
-    query = "SELECT t.id, u.nachname AS nachname, u.vorname AS vorname, t.beschreibung, t.timestamp FROM transactions AS t INNER JOIN users AS u ON t.user_id = u.id ORDER BY t.timestamp DESC;"
-    transaktionen_liste = db_utils.fetch_all(query, dictionary=True)
-    logger.info("Alle Transaktionen wurden ermittelt (%s Einträge).", len(transaktionen_liste))
-    return jsonify(transaktionen_liste)
+    logger.info("API-Benutzer authentifiziert: ID %s - %s. Rufe Transaktionen ab.", api_user_id, api_username)
+
+    if "after_id" in request.args or "limit" in request.args:
+        return _transaktionen_seite(request.args.get("after_id"), request.args.get("limit"))
+
+    ndjson = request.args.get("format") == "ndjson"
+    rows = db_utils.iter_rows(_TRANSAKTIONEN_QUERY + _TRANSAKTIONEN_ORDER, dictionary=True)
+    try:
+        # erste Zeile vorab lesen, damit Datenbankfehler noch als 500 gemeldet werden können
+        erste_zeile = next(rows, None)
+    except (Error, RuntimeError) as e:
+        logger.error("Fehler beim Abrufen der Transaktionen: %s", e)
+        return jsonify({"error": "Fehler beim Abrufen der Transaktionen."}), 500
+
+    alle_zeilen = itertools.chain([erste_zeile], rows) if erste_zeile is not None else iter(())
+    return Response(
+        _stream_transaktionen(alle_zeilen, ndjson),
+        mimetype="application/x-ndjson" if ndjson else "application/json",
+    )
 
 
 @app.route("/transaktionen", methods=["DELETE"])
@@ -929,9 +1385,7 @@ def reset_transaktionen(api_user_id: int, api_username: str):
     """
 
     logger.info("API-Benutzer authentifiziert: ID %s - %s. Lösche alle Transaktionen.", api_user_id, api_username)
-    sql = "TRUNCATE TABLE transactions;"
-    success, _ = db_utils.execute_commit(sql)
-    if success:
+    if ledger.delete_all_transactions():
         logger.info("Alle Transaktionen wurden gelöscht.")
         return jsonify({"message": "Alle Transaktionen wurden gelöscht."}), 200
     return jsonify({"error": "Fehler beim Leeren der Tabelle transactions."}), 500
@@ -976,6 +1430,7 @@ def create_person(api_user_id: int, api_username: str):
     werte = (code_val, nachname_val, vorname_val, password_val)
     success, _ = db_utils.execute_commit(sql, werte)
     if success:
+        cache.bump_epoch("users")
         logger.info("Person mit Code %s erfolgreich hinzugefügt.", code_val)
         return jsonify({"message": f"Person mit Code {code_val} erfolgreich hinzugefügt."}), 200
     logger.error("Fehler beim Hinzufügen der Person mit Code %s.", code_val)
@@ -1001,6 +1456,7 @@ def delete_person(api_user_id: int, api_username: str, code: str):
     sql = "DELETE FROM users WHERE code = %s"
     success, _ = db_utils.execute_commit(sql, (code,))
     if success:
+        cache.bump_epoch("users")
         logger.info("Person mit Code %s erfolgreich gelöscht.", code)
         return jsonify({"message": f"Person mit Code {code} erfolgreich gelöscht."}), 200
     logger.warning("Keine Person mit dem Code %s zum Löschen gefunden oder Fehler.", code)
@@ -1009,6 +1465,7 @@ def delete_person(api_user_id: int, api_username: str, code: str):
 
 @app.route("/person/existent/<string:code>", methods=["GET"])
 @api_key_required
+@conditional_get("users")
 def person_exists_by_code(api_user_id: int, api_username: str, code: str):
     """
     Prüft anhand ihres 10-stelligen Codes, ob eine Person existiert (nur für authentifizierte API-Benutzer).
@@ -1039,6 +1496,7 @@ def person_exists_by_code(api_user_id: int, api_username: str, code: str):
 
 @app.route("/person/<string:code>", methods=["GET"])
 @api_key_required
+@conditional_get(ledger.EPOCH_NAME, "users")
 def get_person_by_code(api_user_id: int, api_username: str, code: str):
     """
     Gibt Daten einer Person anhand ihres 10-stelligen Codes zurück (nur für authentifizierte API-Benutzer).
@@ -1055,20 +1513,20 @@ def get_person_by_code(api_user_id: int, api_username: str, code: str):
 
     logger.info("Abfrage für Person mit Code %s von API-Benutzer: ID %s - %s.", code, api_user_id, api_username)
     person_info = db_utils.fetch_one(
-        "SELECT id, nachname, vorname FROM users WHERE code = %s", (code,), dictionary=True
+        "SELECT u.id, u.nachname, u.vorname, COALESCE(b.saldo, 0) AS saldo "
+        "FROM users AS u LEFT JOIN user_balances AS b ON u.id = b.user_id WHERE u.code = %s",
+        (code,),
+        dictionary=True,
     )
     if not person_info:
         logger.info("Person mit Code %s nicht gefunden.", code)
         return jsonify({"error": "Person nicht gefunden."}), 404
 
-    saldo_data = db_utils.fetch_one(
-        "SELECT SUM(saldo_aenderung) AS saldo FROM transactions WHERE user_id = %s",
-        (person_info["id"],),
-        dictionary=True,
-    )
-    aktueller_saldo = saldo_data["saldo"] if saldo_data and saldo_data["saldo"] is not None else 0
-
-    response_data = {"nachname": person_info["nachname"], "vorname": person_info["vorname"], "saldo": aktueller_saldo}
+    response_data = {
+        "nachname": person_info["nachname"],
+        "vorname": person_info["vorname"],
+        "saldo": _saldo_json(person_info["saldo"]),
+    }
     logger.info(
         "Person mit Code %s gefunden: %s, %s - Saldo %s€",
         code,
@@ -1103,8 +1561,7 @@ def person_transaktionen_loeschen(api_user_id: int, api_username: str, code: str
         return jsonify({"error": "Person mit diesem Code nicht gefunden."}), 404
 
     target_user_id_for_delete = user_data_row[0]
-    success, _ = db_utils.execute_commit("DELETE FROM transactions WHERE user_id = %s", (target_user_id_for_delete,))
-    if success:
+    if ledger.delete_user_transactions(target_user_id_for_delete):
         logger.info(
             "Transaktionen für Benutzer mit Code %s (ID: %s) erfolgreich gelöscht.", code, target_user_id_for_delete
         )
@@ -0,0 +1,126 @@
+"""
+Etikettenbögen (A4) mit den QR-Codes mehrerer Benutzer zum Ausdrucken.
+
+Je Benutzer wird ein Etikett mit Name sowie den QR-Codes "Transaktion buchen" und "Kontostand"
+gedruckt, acht Etiketten pro Seite. Bereits gerenderte QR-Codes kommen aus dem Cache in
+``qr_codes``; fehlende werden parallel im gemeinsamen Prozess-Pool (``process_pool``) gerendert
+und anschließend im Cache abgelegt. fpdf2 erzeugt das PDF vollständig im Speicher.
+"""
+
+import io
+import logging
+from collections.abc import Iterable
+
+from fpdf import FPDF
+
+import pdf_reports
+import process_pool
+import qr_codes
+
+logger = logging.getLogger(__name__)
+
+SPALTEN = 2
+ZEILEN = 4
+RAND = 10
+ETIKETT_BREITE = (210 - 2 * RAND) / SPALTEN
+ETIKETT_HOEHE = (297 - 2 * RAND) / ZEILEN
+QR_HOEHE = 50
+
+# so wenige fehlende QR-Codes werden direkt gerendert, der Pool lohnt sich erst darüber
+_MIN_PARALLEL = 8
+
+
+def load_qr_codes(usercodes: Iterable[str]) -> dict[tuple[str, str], bytes]:
+    """
+    Liefert beide QR-Codes für jeden Benutzercode, fehlende werden parallel gerendert.
+
+    Args:
+        usercodes (Iterable[str]): Die Codes der Benutzer.
+
+    Returns:
+        dict[tuple[str, str], bytes]: (Benutzercode, Aktion) -> PNG.
+    """
+
+    ergebnis = {}
+    fehlend = []
+    for usercode in usercodes:
+        for aktion in qr_codes.AKTIONEN:
+            png_bytes = qr_codes.cached(*qr_codes.benutzer_daten(usercode, aktion))
+            if png_bytes is None:
+                fehlend.append((usercode, aktion))
+            else:
+                ergebnis[(usercode, aktion)] = png_bytes
+
+    if not fehlend:
+        return ergebnis
+
+    daten = [qr_codes.benutzer_daten(usercode, aktion) for usercode, aktion in fehlend]
+    if len(fehlend) >= _MIN_PARALLEL:
+        gerendert = process_pool.run_all(qr_codes.render_png, daten, chunksize=16)
+    else:
+        gerendert = [qr_codes.render_png(*eintrag) for eintrag in daten]
+
+    for schluessel, eintrag, png_bytes in zip(fehlend, daten, gerendert, strict=True):
+        qr_codes.remember(*eintrag, png_bytes)
+        ergebnis[schluessel] = png_bytes
+    logger.info(
+        "%s QR-Codes für Etikettenbögen gerendert, %s aus dem Cache.", len(fehlend), len(ergebnis) - len(fehlend)
+    )
+    return ergebnis
+
+
+def _neues_pdf() -> tuple[FPDF, str]:
+    pdf, font_name = pdf_reports.new_pdf()
+    pdf.set_auto_page_break(False)
+    pdf.set_margins(RAND, RAND)
+    return pdf, font_name
+
+
+def _etikett(pdf: FPDF, font_name: str, position: tuple[float, float], benutzer: dict, pngs: tuple[bytes, bytes]):
+    """Zeichnet ein Etikett mit Schnittrahmen, Name und beiden QR-Codes an ``position`` (x, y in mm)."""
+
+    x, y = position
+
+    pdf.set_draw_color(200, 200, 200)
+    pdf.rect(x, y, ETIKETT_BREITE, ETIKETT_HOEHE)
+
+    name = pdf_reports.unicode_text(f"{benutzer['vorname']} {benutzer['nachname']}", font_name)
+    pdf.set_xy(x, y + 3)
+    pdf.set_font(font_name, style="B", size=11)
+    pdf.cell(ETIKETT_BREITE, 6, name, align="C")
+
+    qr_y = y + 11
+    qr_breite = (ETIKETT_BREITE - 6) / 2
+    for i, png_bytes in enumerate(pngs):
+        # keep_aspect_ratio zentriert das Bild im Feld, auch wenn längere Codes breitere QR-Codes ergeben
+        pdf.image(
+            io.BytesIO(png_bytes), x=x + 3 + i * qr_breite, y=qr_y, w=qr_breite, h=QR_HOEHE, keep_aspect_ratio=True
+        )
+
+    pdf.set_xy(x, y + ETIKETT_HOEHE - 6)
+    pdf.set_font(font_name, size=8)
+    pdf.cell(ETIKETT_BREITE, 4, f"Code: {benutzer['code']}", align="C")
+
+
+def create_pdf(benutzer: list[dict]) -> bytes:
+    """
+    Erzeugt die Etikettenbögen für die Benutzer.
+
+    Args:
+        benutzer (list[dict]): Benutzer mit 'code', 'vorname' und 'nachname', in Druckreihenfolge.
+
+    Returns:
+        bytes: Das PDF.
+    """
+
+    pngs = load_qr_codes(b["code"] for b in benutzer)
+    pdf, font_name = _neues_pdf()
+    pro_seite = SPALTEN * ZEILEN
+    for i, b in enumerate(benutzer):
+        platz = i % pro_seite
+        if platz == 0:
+            pdf.add_page()
+        x = RAND + (platz % SPALTEN) * ETIKETT_BREITE
+        y = RAND + (platz // SPALTEN) * ETIKETT_HOEHE
+        _etikett(pdf, font_name, (x, y), b, (pngs[(b["code"], "a")], pngs[(b["code"], "k")]))
+    return bytes(pdf.output())
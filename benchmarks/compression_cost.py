@@ -0,0 +1,156 @@
+"""
+Benchmark: CPU-Kosten der HTTP-Komprimierung gegenüber eingesparten Bytes.
+
+Erzeugt Antworten in realistischer Größe und schickt sie durch compression.compress_response:
+
+* transaktionen:        GET /transaktionen (komplett, JSON-Array in einem Stück)
+* transaktionen_stream: dasselbe gestreamt in Blöcken zu 200 Zeilen (wie api._stream_transaktionen)
+* transaktionen_seite:  GET /transaktionen?limit=100
+* saldo_alle:           GET /saldo-alle mit 200 Benutzern
+* benutzer_html:        Transaktionstabelle aus web_admin_user_modification.html
+
+Für jede Kombination aus Verfahren und Stufe werden Größe, Kompressionsrate und CPU-Zeit
+(bestes von ``--wiederholungen`` Läufen) ausgegeben, mit ``--json`` maschinenlesbar.
+
+    python3 benchmarks/compression_cost.py
+    python3 benchmarks/compression_cost.py --zeilen 1000000 --json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import jinja2
+from flask import Flask, Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import compression
+import config
+
+ROOT = Path(__file__).resolve().parent.parent
+BESCHREIBUNGEN = ["Getränk", "Kaffee", "Bratwurst", "Einzahlung", "Wasser", "Eis", "Korrektur Strichliste"]
+NAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann"]
+VORNAMEN = ["Anna", "Ben", "Clara", "David", "Eva", "Felix", "Greta", "Hannes", "Ida", "Jonas"]
+
+app = Flask(__name__)
+
+
+def _transaktionen(anzahl: int) -> list[dict]:
+    zufall = random.Random(42)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": anzahl - i,
+            "nachname": zufall.choice(NAMEN),
+            "vorname": zufall.choice(VORNAMEN),
+            "beschreibung": zufall.choice(BESCHREIBUNGEN),
+            "timestamp": (start + timedelta(minutes=anzahl - i)).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        }
+        for i in range(anzahl)
+    ]
+
+
+def _benutzer_html(anzahl: int) -> bytes:
+    """Rendert die Transaktionstabelle mit dem Markup aus dem echten Template."""
+
+    template = (ROOT / "templates" / "web_admin_user_modification.html").read_text(encoding="utf-8")
+    start = template.index('<table class="zebra-table">')
+    tabelle = template[start : template.index("</table>", start) + len("</table>")]
+    zufall = random.Random(7)
+    transactions = [
+        {
+            "beschreibung": zufall.choice(BESCHREIBUNGEN),
+            "saldo_aenderung": zufall.choice([-1, -1, -1.5, -2, 20]),
+            "timestamp": datetime(2024, 1, 1) + timedelta(minutes=i * 37),
+        }
+        for i in range(anzahl)
+    ]
+    return jinja2.Template(tabelle).render(transactions=transactions).encode("utf-8")
+
+
+def _payloads(zeilen: int) -> dict[str, tuple[str, object]]:
+    transaktionen = _transaktionen(zeilen)
+    saldo = [{"id": i, "nachname": NAMEN[i % 10], "vorname": VORNAMEN[i % 7], "saldo": 50 - i % 90} for i in range(200)]
+    bloecke = [transaktionen[i : i + 200] for i in range(0, len(transaktionen), 200)]
+    return {
+        "transaktionen": ("application/json", app.json.dumps(transaktionen).encode()),
+        "transaktionen_stream": (
+            "application/json",
+            ["[", *(",".join(app.json.dumps(row) for row in block) for block in bloecke), "]"],
+        ),
+        "transaktionen_seite": ("application/json", app.json.dumps(transaktionen[:100]).encode()),
+        "saldo_alle": ("application/json", app.json.dumps(saldo).encode()),
+        "benutzer_html": ("text/html", _benutzer_html(2000)),
+    }
+
+
+def _messen(mimetype: str, body, encoding: str) -> tuple[int, int, float]:
+    """Liefert (Bytes unkomprimiert, Bytes komprimiert, CPU-Sekunden)."""
+
+    with app.test_request_context(headers={"Accept-Encoding": encoding}):
+        if isinstance(body, list):
+            response = Response(iter(body), mimetype=mimetype)
+            roh = sum(len(teil.encode()) for teil in body)
+        else:
+            response = Response(body, mimetype=mimetype)
+            roh = len(body)
+        start = time.process_time()
+        response = compression.compress_response(response)
+        komprimiert = sum(len(teil) for teil in response.iter_encoded())
+        dauer = time.process_time() - start
+    return roh, komprimiert, dauer
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="CPU-Kosten der HTTP-Komprimierung messen.")
+    parser.add_argument("--zeilen", type=int, default=100_000, help="Anzahl Transaktionen (Standard 100000)")
+    parser.add_argument("--wiederholungen", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    verfahren = [("gzip", stufe) for stufe in (1, 6, 9)]
+    if compression.brotli is not None:
+        verfahren += [("br", stufe) for stufe in (1, 4, 11)]
+
+    config.compression_config.update(enabled=True, min_size=0)
+    ergebnisse = []
+    for name, (mimetype, body) in _payloads(args.zeilen).items():
+        for encoding, stufe in verfahren:
+            config.compression_config["gzip_level" if encoding == "gzip" else "brotli_quality"] = stufe
+            laeufe = [_messen(mimetype, body, encoding) for _ in range(args.wiederholungen)]
+            roh, komprimiert, _ = laeufe[0]
+            cpu = min(dauer for _, _, dauer in laeufe)
+            ergebnisse.append(
+                {
+                    "payload": name,
+                    "encoding": encoding,
+                    "stufe": stufe,
+                    "bytes": roh,
+                    "bytes_komprimiert": komprimiert,
+                    "rate": round(komprimiert / roh, 4),
+                    "cpu_ms": round(cpu * 1000, 2),
+                    "cpu_ms_pro_mb": round(cpu * 1000 / (roh / 1_000_000), 2),
+                }
+            )
+
+    if args.json:
+        print(json.dumps(ergebnisse, indent=2))
+        return 0
+    print(
+        f"{'Payload':<22}{'Verf.':>6}{'Stufe':>6}{'Bytes':>12}{'komprimiert':>13}{'Rate':>8}{'CPU ms':>10}{'ms/MB':>9}"
+    )
+    for e in ergebnisse:
+        print(
+            f"{e['payload']:<22}{e['encoding']:>6}{e['stufe']:>6}{e['bytes']:>12}{e['bytes_komprimiert']:>13}"
+            f"{e['rate']:>8.1%}{e['cpu_ms']:>10.2f}{e['cpu_ms_pro_mb']:>9.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
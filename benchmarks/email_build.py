@@ -0,0 +1,90 @@
+"""
+Benchmark: Kosten für den Aufbau einer E-Mail (Templates rendern + MIME-Nachricht erstellen).
+
+Vergleicht zwei Durchläufe mit je N Nachrichten:
+
+* kalt: Logo-Cache wird vor jeder Nachricht geleert und Templates werden bei jedem Zugriff
+  auf Änderungen geprüft (entspricht dem Verhalten vor dem Caching).
+* warm: Logo-MIME-Teil und kompilierte Templates werden wiederverwendet.
+
+Es wird nichts versendet und keine Datenbank benötigt.
+
+Aufruf (im Projektverzeichnis):
+    python3 benchmarks/email_build.py [-n 1000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import email_outbox
+import email_sender
+
+LOGO_PFAD = str(Path(__file__).resolve().parent.parent / "static/logo/logo-80x109.png")
+
+ROW = {
+    "id": 1,
+    "empfaenger": "max@example.org",
+    "betreff": "Neue Transaktion auf deinem Konto",
+    "template_html": "email_neue_transaktion.html",
+    "template_text": "email_neue_transaktion.txt",
+    "context": json.dumps(
+        {
+            "vorname": "Max",
+            "beschreibung_transaktion": "Terminal Gerätehaus",
+            "saldo_aenderung": -1,
+            "neuer_saldo": 12,
+            "datum": "01.01.2026",
+            "uhrzeit": "12:00",
+        }
+    ),
+    "logo_pfad": LOGO_PFAD,
+    "versuche": 0,
+}
+
+
+def _baue_nachricht(serialisieren: bool):
+    nachricht = email_outbox._render(ROW)  # pylint: disable=protected-access
+    content = dict(nachricht["content"], smtp_sender_for_header="fvh@example.org")
+    msg = email_sender._create_mime_message(  # pylint: disable=protected-access
+        nachricht["empfaenger_email"], nachricht["betreff"], content
+    )
+    if serialisieren:
+        msg.as_string()
+
+
+def messen(anzahl: int, kalt: bool, serialisieren: bool) -> float:
+    """Baut ``anzahl`` Nachrichten und liefert die Dauer pro Nachricht in Millisekunden."""
+
+    email_outbox._jinja_env.auto_reload = kalt  # pylint: disable=protected-access
+    email_sender._logo_mime_part.cache_clear()  # pylint: disable=protected-access
+    _baue_nachricht(serialisieren)  # Templates einmal kompilieren
+
+    start = time.perf_counter()
+    for _ in range(anzahl):
+        if kalt:
+            email_sender._logo_mime_part.cache_clear()  # pylint: disable=protected-access
+        _baue_nachricht(serialisieren)
+    return (time.perf_counter() - start) / anzahl * 1000
+
+
+def main():
+    """Führt alle Durchläufe aus und gibt das Ergebnis aus."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=1000, help="Anzahl Nachrichten pro Durchlauf (Standard: 1000)")
+    args = parser.parse_args()
+
+    print(f"{args.n} Nachrichten, Angaben in ms/Nachricht")
+    for titel, serialisieren in (("Aufbau", False), ("Aufbau + as_string()", True)):
+        kalt = messen(args.n, kalt=True, serialisieren=serialisieren)
+        warm = messen(args.n, kalt=False, serialisieren=serialisieren)
+        print(f"{titel:<22} kalt: {kalt:.3f}  warm: {warm:.3f}  ({(1 - warm / kalt) * 100:.0f} % schneller)")
+
+
+if __name__ == "__main__":
+    main()
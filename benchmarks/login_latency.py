@@ -0,0 +1,139 @@
+"""
+Benchmark: Login-Latenz eines gevent-Workers, während derselbe Worker PDFs erzeugt.
+
+Simuliert einen gunicorn-gevent-Worker (``monkey.patch_all``) ohne Datenbank und Netzwerk:
+Mehrere Greenlets erzeugen fortlaufend Transaktionsberichte, ein weiteres Greenlet prüft in
+regelmäßigen Abständen ein Passwort wie ``POST /login``. Gemessen wird die Zeit von der
+geplanten Ankunft eines Logins bis zum Ende der Passwortprüfung, inklusive Wartezeit auf die
+blockierte Event-Loop.
+
+* leerlauf: Login ohne parallele PDFs (Referenz).
+* vorher:   PDFs und Passwort-Hashes werden im Worker gerechnet (``PROCESS_POOL_WORKERS=0``).
+* nachher:  beides läuft im Prozess-Pool (``process_pool``), der Worker wartet kooperativ.
+
+Aufruf (im Projektverzeichnis):
+    python3 benchmarks/login_latency.py [--pdfs 2] [--buchungen 300] [--dauer 10] [--workers 2]
+"""
+
+# ruff: noqa: E402
+# pylint: disable=wrong-import-position
+from gevent import monkey
+
+# wie im gunicorn-gevent-Worker: vor allen anderen Imports
+monkey.patch_all()
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import gevent
+from werkzeug.security import check_password_hash, generate_password_hash
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+import pdf_reports
+import process_pool
+
+PASSWORT = "benchmark-passwort"
+BENUTZER = {"vorname": "Max", "nachname": "Mustermann", "code": "1000000000"}
+LOGIN_ABSTAND = 0.5
+# Pause zwischen zwei PDFs eines Greenlets (nächster Request desselben Benutzers)
+PDF_ABSTAND = 0.05
+
+
+def _transaktionen(anzahl: int) -> list[dict]:
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            "id": i,
+            "beschreibung": f"Getränk {i % 7}",
+            "saldo_aenderung": -1.5,
+            "timestamp": start + timedelta(minutes=i),
+        }
+        for i in range(anzahl)
+    ]
+
+
+def _durchlauf(pdfs: int, transaktionen: list[dict], dauer: float, passwort_hash: str) -> tuple[list[float], int]:
+    """Liefert die Login-Latenzen (Sekunden) und die Anzahl erzeugter PDFs."""
+
+    beginn = time.perf_counter()
+    ende = beginn + dauer
+    erzeugt = [0]
+    latenzen = []
+
+    def pdf_schleife():
+        while time.perf_counter() < ende:
+            process_pool.run(
+                pdf_reports.transaction_report,
+                BENUTZER,
+                transaktionen,
+                -1.5,
+                pdf_reports.ReportOptions(),
+                False,
+                lang=True,
+            )
+            erzeugt[0] += 1
+            gevent.sleep(PDF_ABSTAND)
+
+    def login_schleife():
+        # feste Ankunftszeiten: die Latenz zählt ab der geplanten Ankunft, auch wenn die
+        # Event-Loop blockiert war und das Greenlet erst später an die Reihe kommt
+        ankunft = beginn
+        while ankunft < ende:
+            gevent.sleep(max(0.0, ankunft - time.perf_counter()))
+            assert process_pool.run(check_password_hash, passwort_hash, PASSWORT)
+            latenzen.append(time.perf_counter() - ankunft)
+            ankunft = max(ankunft + LOGIN_ABSTAND, time.perf_counter())
+
+    gevent.joinall([gevent.spawn(pdf_schleife) for _ in range(pdfs)] + [gevent.spawn(login_schleife)])
+    return latenzen, erzeugt[0]
+
+
+def _zeile(name: str, latenzen: list[float], erzeugt: int, dauer: float):
+    latenzen = sorted(latenzen)
+    p95 = latenzen[min(len(latenzen) - 1, int(len(latenzen) * 0.95))]
+    print(
+        f"{name:<10}{len(latenzen):>8}{statistics.median(latenzen) * 1000:>10.0f}{p95 * 1000:>10.0f}"
+        f"{latenzen[-1] * 1000:>10.0f}{erzeugt / dauer:>10.1f}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Login-Latenz bei parallel erzeugten PDFs messen.")
+    parser.add_argument("--pdfs", type=int, default=2, help="Gleichzeitig erzeugte PDFs (Standard 2)")
+    parser.add_argument("--buchungen", type=int, default=300, help="Buchungen je PDF (Standard 300)")
+    parser.add_argument("--dauer", type=float, default=10, help="Sekunden je Durchlauf (Standard 10)")
+    parser.add_argument("--workers", type=int, default=2, help="Prozesse im Pool für 'nachher' (Standard 2)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    transaktionen = _transaktionen(args.buchungen)
+    passwort_hash = generate_password_hash(PASSWORT)
+    pdf_reports.preload()
+
+    config.process_pool_config["workers"] = 0
+    leerlauf = _durchlauf(0, transaktionen, args.dauer, passwort_hash)
+    vorher = _durchlauf(args.pdfs, transaktionen, args.dauer, passwort_hash)
+
+    config.process_pool_config["workers"] = args.workers
+    # Pool starten und die Prozesse PDF-Vorlage und werkzeug laden lassen, bevor gemessen wird
+    process_pool.run_all(pdf_reports.preload, [()] * args.workers)
+    process_pool.run_all(check_password_hash, [(passwort_hash, PASSWORT)] * args.workers)
+    nachher = _durchlauf(args.pdfs, transaktionen, args.dauer, passwort_hash)
+    process_pool.shutdown()
+
+    print(f"{'Durchlauf':<10}{'Logins':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'PDF/s':>10}")
+    _zeile("leerlauf", *leerlauf, args.dauer)
+    _zeile("vorher", *vorher, args.dauer)
+    _zeile("nachher", *nachher, args.dauer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark: QR-Codes pro Sekunde für ``GET /qr_code``.
+
+Vergleicht drei Durchläufe mit je N QR-Codes (abwechselnd Aktion 'a' und 'k'):
+
+* vorher:     Schriftart wird bei jedem QR-Code gesucht und geladen, kein PNG-Cache
+              (entspricht dem Verhalten vor dem Caching).
+* gerendert:  Schriftart einmal geladen, jeder QR-Code wird neu gerendert (Cache-Miss,
+              z.B. erster Aufruf eines Benutzers).
+* gecacht:    PNG-Bytes aus dem prozesslokalen Cache.
+
+Es wird keine Datenbank benötigt.
+
+Aufruf (im Projektverzeichnis):
+    python3 benchmarks/qr_render.py [-n 500] [--benutzer 50]
+"""
+
+import argparse
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+import qr_codes
+
+
+def _vorher(usercode: str, aktion: str) -> bytes:
+    qr_codes._schriftart.cache_clear()
+    puffer = io.BytesIO()
+    qr_codes.erzeuge_qr_code(usercode + aktion, qr_codes.AKTIONEN[aktion]).save(puffer, "PNG")
+    return puffer.getvalue()
+
+
+def _gerendert(usercode: str, aktion: str) -> bytes:
+    qr_codes.clear_cache()
+    return qr_codes.png_fuer_benutzer(usercode, aktion)
+
+
+def _messen(funktion, anzahl: int, benutzer: int) -> float:
+    """Liefert QR-Codes pro Sekunde."""
+
+    start = time.perf_counter()
+    for i in range(anzahl):
+        funktion(f"{1000000000 + i % benutzer}", "ak"[i % 2])
+    return anzahl / (time.perf_counter() - start)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="QR-Code-Erzeugung pro Sekunde messen.")
+    parser.add_argument("-n", type=int, default=500, help="Anzahl QR-Codes je Durchlauf (Standard 500)")
+    parser.add_argument("--benutzer", type=int, default=50, help="Anzahl verschiedener Benutzer (Standard 50)")
+    args = parser.parse_args(argv)
+
+    # die Fehlermeldungen für nicht gefundene Schriftarten würden die Messung verfälschen
+    logging.disable(logging.CRITICAL)
+    config.qr_config["cache_dir"] = None
+
+    vorher = _messen(_vorher, args.n, args.benutzer)
+    gerendert = _messen(_gerendert, args.n, args.benutzer)
+    qr_codes.clear_cache()
+    _messen(qr_codes.png_fuer_benutzer, 2 * args.benutzer, args.benutzer)  # Cache vorwärmen
+    gecacht = _messen(qr_codes.png_fuer_benutzer, args.n, args.benutzer)
+
+    print(f"{'Durchlauf':<12}{'QR/s':>12}{'Faktor':>10}")
+    for name, rate in (("vorher", vorher), ("gerendert", gerendert), ("gecacht", gecacht)):
+        print(f"{name:<12}{rate:>12.1f}{rate / vorher:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+Lasttest für die Buchungs- und Abfrage-Endpunkte der API.
+
+Startet api.py unter Gunicorn/gevent gegen eine Wegwerf-Datenbank und misst Latenz
+(p50/p95/p99) und Durchsatz für:
+
+* nfc:           PUT /nfc-transaktion
+* person:        PUT /person/<code>/transaktion
+* saldo_alle:    GET /saldo-alle
+* transaktionen: GET /transaktionen?limit=...
+
+Das Ergebnis wird als JSON ausgegeben, damit Läufe verschiedener Commits verglichen werden können.
+
+Ablauf (im Projektverzeichnis):
+    docker compose -f benchmarks/docker-compose.yml up -d --wait
+    python3 benchmarks/terminal_load.py seed
+    python3 benchmarks/terminal_load.py run -c 20 -d 30 -o vorher.json
+    python3 benchmarks/terminal_load.py compare vorher.json nachher.json
+
+``seed`` lädt docker-init/schema.sql (alle Tabellen werden neu angelegt!) und erzeugt
+200 Benutzer, 500 NFC-Token und 1 Mio. Buchungen.
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mysql.connector
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import migrate
+
+ROOT = Path(__file__).resolve().parent.parent
+API_KEY = "benchmark-0123456789abcdef"
+BENUTZER_ID_START = 2  # ID 1 ist der Default-Admin aus schema.sql
+STARTGUTHABEN = 1_000_000
+SZENARIEN = ["nfc", "person", "saldo_alle", "transaktionen"]
+
+
+def _codes(anzahl: int) -> list[str]:
+    return [f"{4200000000 + i}" for i in range(anzahl)]
+
+
+def _tokens(anzahl: int) -> list[bytes]:
+    return [b"\x04" + i.to_bytes(4, "big") + b"\xbe\x0c" for i in range(anzahl)]
+
+
+def _verbinden(args):
+    return mysql.connector.connect(
+        host=args.host, port=args.port, user=args.user, password=args.password, database=args.database
+    )
+
+
+def seed(args):
+    """Legt das Schema neu an und füllt es mit Testdaten."""
+
+    rng = random.Random(42)
+    cnx = _verbinden(args)
+    cursor = cnx.cursor()
+
+    print("Lade docker-init/schema.sql ...")
+    for statement in migrate.split_statements((ROOT / "docker-init" / "schema.sql").read_text(encoding="utf-8")):
+        cursor.execute(statement)
+
+    user_ids = list(range(BENUTZER_ID_START, BENUTZER_ID_START + args.users))
+    cursor.executemany(
+        "INSERT INTO users (id, code, nachname, vorname, password, email, acc_duties, acc_privacy_policy) "
+        "VALUES (%s, %s, %s, %s, '', %s, 1, 1)",
+        [
+            (user_id, code, f"Nachname{user_id}", f"Vorname{user_id}", f"bench{user_id}@example.org")
+            for user_id, code in zip(user_ids, _codes(args.users), strict=True)
+        ],
+    )
+    cursor.executemany(
+        "INSERT INTO benutzer_benachrichtigungseinstellungen (benutzer_id, typ_id, email_aktiviert) "
+        "VALUES (%s, %s, %s)",
+        [(user_id, typ_id, int(rng.random() < 0.3)) for user_id in user_ids for typ_id in (1, 2, 3)],
+    )
+    cursor.executemany(
+        "INSERT INTO nfc_token (token_id, user_id, token_name, token_daten) VALUES (%s, %s, %s, %s)",
+        [(i + 1, user_ids[i % len(user_ids)], f"Token {i + 1}", token) for i, token in enumerate(_tokens(args.tokens))],
+    )
+    cursor.execute("INSERT INTO api_users (id, username) VALUES (1, 'benchmark')")
+    cursor.execute(
+        "INSERT INTO api_keys (id, user_id, api_key_name, api_key) VALUES (1, 1, 'benchmark', %s)", (API_KEY,)
+    )
+    cnx.commit()
+
+    # Startguthaben, damit die Buchungen im Lasttest nicht am Limit scheitern
+    beginn = datetime.now() - timedelta(days=3 * 365)
+    cursor.executemany(
+        "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung, timestamp) VALUES (%s, %s, %s, %s)",
+        [(user_id, "Startguthaben", STARTGUTHABEN, beginn) for user_id in user_ids],
+    )
+    schritt = timedelta(days=3 * 365) / max(args.transactions, 1)
+    batch = 10_000
+    for start in range(0, args.transactions, batch):
+        cursor.executemany(
+            "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung, timestamp) VALUES (%s, %s, %s, %s)",
+            [
+                (rng.choice(user_ids), "Terminal Gerätehaus", -1, beginn + schritt * i)
+                for i in range(start, min(start + batch, args.transactions))
+            ],
+        )
+        cnx.commit()
+        print(f"\r{min(start + batch, args.transactions):>9} Buchungen", end="", flush=True)
+    print()
+
+    cursor.execute(
+        "INSERT INTO user_balances (user_id, saldo) "
+        "SELECT user_id, SUM(saldo_aenderung) FROM transactions GROUP BY user_id"
+    )
+    cnx.commit()
+    cursor.execute("ANALYZE TABLE transactions, users, user_balances, nfc_token")
+    cursor.fetchall()
+    cursor.close()
+    cnx.close()
+    print(f"{args.users} Benutzer, {args.tokens} Token, {args.transactions} Buchungen angelegt.")
+
+
+def _server_starten(args) -> tuple[subprocess.Popen, Path]:
+    """Startet api.py unter Gunicorn mit der Konfiguration aus gunicorn_config.py."""
+
+    env = dict(
+        os.environ,
+        MYSQL_HOST=args.host,
+        MYSQL_PORT=str(args.port),
+        MYSQL_USER=args.user,
+        MYSQL_PASSWORD=args.password,
+        MYSQL_DB=args.database,
+        MYSQL_POOL_SIZE=str(args.pool_size),
+        SMTP_HOST="localhost",
+        SMTP_PORT="25",
+        SMTP_USER="benchmark",
+        SMTP_PASSWORD="benchmark",
+        SMTP_SENDER="benchmark@example.org",
+        EMAIL_OUTBOX_WORKER="external",  # E-Mails nur einreihen, nicht versenden
+        API_LOG_LEVEL="WARNING",
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="fvh-bench-metrics-"),
+    )
+    env.pop("TESTING", None)
+    with tempfile.NamedTemporaryFile(prefix="fvh-bench-gunicorn-", suffix=".log", delete=False) as log:
+        log_datei = Path(log.name)
+        prozess = subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "--config",
+                "gunicorn_config.py",
+                "--bind",
+                f"127.0.0.1:{args.server_port}",
+                "--workers",
+                str(args.workers),
+                "--access-logfile",
+                os.devnull,
+                "api:app",
+            ],
+            cwd=ROOT,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+    frist = time.monotonic() + 60
+    while time.monotonic() < frist:
+        if prozess.poll() is not None:
+            break
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", args.server_port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return prozess, log_datei
+        except OSError:
+            pass
+        time.sleep(0.5)
+    prozess.kill()
+    raise SystemExit(f"Gunicorn ist nicht gestartet, siehe {log_datei}")
+
+
+# werden in run() passend zu --users/--tokens befüllt
+_TOKENS: list[bytes] = []
+_CODES: list[str] = []
+
+
+def _anfrage_bauen(szenario: str, rng: random.Random, args) -> tuple[str, str, bytes | None]:
+    if szenario == "nfc":
+        token = rng.choice(_TOKENS)
+        body = {"token": base64.b64encode(token).decode("ascii"), "beschreibung": "Benchmark"}
+        return "PUT", "/nfc-transaktion", json.dumps(body).encode()
+    if szenario == "person":
+        return "PUT", f"/person/{rng.choice(_CODES)}/transaktion", b'{"beschreibung": "Benchmark"}'
+    if szenario == "saldo_alle":
+        return "GET", "/saldo-alle", None
+    return "GET", f"/transaktionen?limit={args.transaktionen_limit}", None
+
+
+def _perzentil(werte: list[float], p: int) -> float:
+    if len(werte) < 2:
+        return werte[0] if werte else 0.0
+    return statistics.quantiles(werte, n=100, method="inclusive")[p - 1]
+
+
+def lasttest(szenario: str, host: str, port: int, args) -> dict:
+    """
+    Sendet ``args.concurrency`` Anfragen parallel, bis ``args.duration`` Sekunden vergangen sind.
+
+    Die ersten ``args.warmup`` Sekunden werden nicht gewertet.
+    """
+
+    latenzen: list[float] = []
+    status: dict[str, int] = {}
+    lock = threading.Lock()
+    beginn = time.monotonic()
+    wertung_ab = beginn + args.warmup
+    ende = wertung_ab + args.duration
+    headers = {"X-API-Key": API_KEY, "Content-Type": "application/json"}
+
+    def arbeiter(nummer: int):
+        rng = random.Random(nummer)
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        eigene: list[tuple[float, str]] = []
+        while (jetzt := time.monotonic()) < ende:
+            methode, pfad, body = _anfrage_bauen(szenario, rng, args)
+            start = time.perf_counter()
+            try:
+                conn.request(methode, pfad, body=body, headers=headers)
+                antwort = conn.getresponse()
+                antwort.read()
+                code = str(antwort.status)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+                code = "fehler"
+            if jetzt >= wertung_ab:
+                eigene.append((time.perf_counter() - start, code))
+        conn.close()
+        with lock:
+            for dauer, code in eigene:
+                latenzen.append(dauer * 1000)
+                status[code] = status.get(code, 0) + 1
+
+    threads = [threading.Thread(target=arbeiter, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    fehler = sum(anzahl for code, anzahl in status.items() if not code.startswith("2"))
+    return {
+        "anfragen": len(latenzen),
+        "fehler": fehler,
+        "status": dict(sorted(status.items())),
+        "durchsatz_rps": round(len(latenzen) / args.duration, 1),
+        "latenz_ms": {
+            "p50": round(_perzentil(latenzen, 50), 2),
+            "p95": round(_perzentil(latenzen, 95), 2),
+            "p99": round(_perzentil(latenzen, 99), 2),
+            "max": round(max(latenzen, default=0.0), 2),
+            "mittel": round(statistics.fmean(latenzen), 2) if latenzen else 0.0,
+        },
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unbekannt"
+
+
+def run(args):
+    """Startet den Server (falls keine --url angegeben ist) und führt die Szenarien nacheinander aus."""
+
+    _TOKENS.extend(_tokens(args.tokens))
+    _CODES.extend(_codes(args.users))
+
+    prozess = None
+    if args.url:
+        host, _, port = args.url.removeprefix("http://").partition(":")
+        port = int(port or 80)
+    else:
+        prozess, log_datei = _server_starten(args)
+        host, port = "127.0.0.1", args.server_port
+        print(f"Gunicorn läuft (PID {prozess.pid}, Log: {log_datei}).", file=sys.stderr)
+
+    ergebnisse = {}
+    try:
+        for szenario in args.scenarios:
+            print(f"{szenario}: {args.concurrency} parallel, {args.duration}s ...", file=sys.stderr)
+            ergebnisse[szenario] = lasttest(szenario, host, port, args)
+    finally:
+        if prozess:
+            prozess.terminate()
+            prozess.wait(timeout=30)
+
+    bericht = {
+        "meta": {
+            "commit": _commit(),
+            "zeitpunkt": datetime.now().isoformat(timespec="seconds"),
+            "concurrency": args.concurrency,
+            "dauer_s": args.duration,
+            "gunicorn_workers": None if args.url else args.workers,
+            "pool_size": None if args.url else args.pool_size,
+            "python": platform.python_version(),
+        },
+        "ergebnisse": ergebnisse,
+    }
+    ausgabe = json.dumps(bericht, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(ausgabe + "\n", encoding="utf-8")
+    print(ausgabe)
+
+
+def compare(args):
+    """Stellt Durchsatz und Latenzen zweier Läufe gegenüber."""
+
+    alt = json.loads(Path(args.alt).read_text(encoding="utf-8"))
+    neu = json.loads(Path(args.neu).read_text(encoding="utf-8"))
+    print(f"{alt['meta']['commit']} -> {neu['meta']['commit']}")
+    print(f"{'Szenario':<15}{'rps':^25}{'p50 ms':^25}{'p95 ms':^25}{'p99 ms':^25}")
+
+    def spalte(a: float, b: float) -> str:
+        delta = f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+        return f"{a:>8} -> {b:<8}{delta:>5}"
+
+    for szenario in neu["ergebnisse"]:
+        if szenario not in alt["ergebnisse"]:
+            continue
+        a, b = alt["ergebnisse"][szenario], neu["ergebnisse"][szenario]
+        zeile = f"{szenario:<15}{spalte(a['durchsatz_rps'], b['durchsatz_rps'])}"
+        for p in ("p50", "p95", "p99"):
+            zeile += spalte(a["latenz_ms"][p], b["latenz_ms"][p])
+        print(zeile)
+
+
+def main():
+    """Kommandozeilen-Einstieg."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    db = argparse.ArgumentParser(add_help=False)
+    db.add_argument("--host", default="127.0.0.1")
+    db.add_argument("--port", type=int, default=3308)
+    db.add_argument("--user", default="root")
+    db.add_argument("--password", default="bench")
+    db.add_argument("--database", default="fvh_bench")
+    db.add_argument("--users", type=int, default=200, help="Anzahl Benutzer (Standard: 200)")
+    db.add_argument("--tokens", type=int, default=500, help="Anzahl NFC-Token (Standard: 500)")
+
+    sub = parser.add_subparsers(dest="befehl", required=True)
+    seed_parser = sub.add_parser("seed", parents=[db], help="Schema anlegen und Testdaten erzeugen")
+    seed_parser.add_argument("--transactions", type=int, default=1_000_000, help="Anzahl Buchungen")
+    seed_parser.set_defaults(func=seed)
+
+    run_parser = sub.add_parser("run", parents=[db], help="Lasttest ausführen")
+    run_parser.add_argument("-c", "--concurrency", type=int, default=10, help="Parallele Clients (Standard: 10)")
+    run_parser.add_argument("-d", "--duration", type=float, default=20, help="Sekunden je Szenario (Standard: 20)")
+    run_parser.add_argument("--warmup", type=float, default=2, help="Nicht gewertete Sekunden zu Beginn")
+    run_parser.add_argument("-s", "--scenarios", nargs="+", choices=SZENARIEN, default=SZENARIEN)
+    run_parser.add_argument("--transaktionen-limit", type=int, default=100, help="Seitengröße für /transaktionen")
+    run_parser.add_argument("--workers", type=int, default=4, help="Gunicorn-Worker (Standard: 4)")
+    run_parser.add_argument("--pool-size", type=int, default=10, help="MYSQL_POOL_SIZE je Worker")
+    run_parser.add_argument("--server-port", type=int, default=5050, help="Port für den gestarteten Gunicorn")
+    run_parser.add_argument("--url", help="Bereits laufende API verwenden (z.B. http://127.0.0.1:5000)")
+    run_parser.add_argument("-o", "--output", help="Ergebnis zusätzlich in diese Datei schreiben")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="Zwei Ergebnisdateien vergleichen")
+    compare_parser.add_argument("alt")
+    compare_parser.add_argument("neu")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
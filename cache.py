@@ -0,0 +1,260 @@
+"""Prozesslokale Caches mit TTL/LRU und datenbankgestützter Invalidierung über Epochen."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import config
+import db_utils
+
+logger = logging.getLogger(__name__)
+
+# Marker für "nicht im Cache", damit auch None (negatives Ergebnis) gecacht werden kann
+MISSING = object()
+
+# Versuche und Wartezeit (Sekunden, wächst je Versuch), um eine Epoche in der Datenbank zu erhöhen
+_BUMP_VERSUCHE = 3
+_BUMP_PAUSE = 0.05
+
+
+class TTLCache:
+    """
+    Threadsicherer, größenbegrenzter Cache mit Ablaufzeit pro Eintrag.
+
+    Bei Überschreiten von ``maxsize`` (bzw. ``maxbytes``) wird der am längsten nicht genutzte
+    Eintrag verdrängt (LRU).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, maxbytes: int | None = None):
+        """
+        Args:
+            maxsize (int): Maximale Anzahl Einträge.
+            ttl (float): Standard-Lebensdauer eines Eintrags in Sekunden.
+            maxbytes (int, optional): Maximale Gesamtgröße der Werte (``len``), z.B. für PDFs.
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._daten: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _groesse(self, value: Any) -> int:
+        return len(value) if self.maxbytes is not None else 0
+
+    def _entfernen(self, key: Hashable):
+        _, wert = self._daten.pop(key)
+        self._bytes -= self._groesse(wert)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Liefert den Wert zu ``key`` oder ``default``, falls er fehlt oder abgelaufen ist.
+
+        Args:
+            key (Hashable): Der Schlüssel.
+            default (Any): Rückgabewert bei Cache-Miss. Standard: ``MISSING``.
+
+        Returns:
+            Any: Der gecachte Wert oder ``default``.
+        """
+
+        with self._lock:
+            eintrag = self._daten.get(key)
+            if eintrag is None:
+                return default
+            ablauf, wert = eintrag
+            if ablauf <= time.monotonic():
+                self._entfernen(key)
+                return default
+            self._daten.move_to_end(key)
+            return wert
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """
+        Speichert einen Wert.
+
+        Args:
+            key (Hashable): Der Schlüssel.
+            value (Any): Der Wert (auch None für negatives Caching).
+            ttl (float, optional): Abweichende Lebensdauer in Sekunden.
+        """
+
+        ablauf = time.monotonic() + (self.ttl if ttl is None else ttl)
+        groesse = self._groesse(value)
+        with self._lock:
+            if key in self._daten:
+                self._entfernen(key)
+            if self.maxbytes is not None and groesse > self.maxbytes:
+                return
+            self._daten[key] = (ablauf, value)
+            self._bytes += groesse
+            while len(self._daten) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._entfernen(next(iter(self._daten)))
+
+    def invalidate(self, key: Hashable):
+        """Entfernt einen einzelnen Eintrag."""
+
+        with self._lock:
+            if key in self._daten:
+                self._entfernen(key)
+
+    def clear(self):
+        """Leert den Cache."""
+
+        with self._lock:
+            self._daten.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._daten)
+
+
+class VersionedValue:
+    """
+    Hält einen berechneten Wert zusammen mit der Version, für die er berechnet wurde.
+
+    Ändert sich die Version, wird der Wert genau einmal neu berechnet: Gleichzeitige Anfragen
+    warten auf die laufende Berechnung und verwenden deren Ergebnis (Request-Coalescing).
+    """
+
+    def __init__(self, loader: Callable[[], Any]):
+        """
+        Args:
+            loader (Callable): Berechnet den Wert. Exceptions werden weitergereicht und nicht gecacht.
+        """
+
+        self._loader = loader
+        self._eintrag: tuple[Hashable, Any] | None = None
+        self._lock = threading.Lock()
+
+    def get(self, version: Hashable) -> Any:
+        """
+        Liefert den Wert für ``version`` und berechnet ihn bei Bedarf neu.
+
+        Args:
+            version (Hashable): Die aktuelle Version der zugrunde liegenden Daten.
+
+        Returns:
+            Any: Der (ggf. neu berechnete) Wert.
+        """
+
+        eintrag = self._eintrag
+        if eintrag is not None and eintrag[0] == version:
+            return eintrag[1]
+        with self._lock:
+            eintrag = self._eintrag
+            if eintrag is not None and eintrag[0] == version:
+                return eintrag[1]
+            wert = self._loader()
+            self._eintrag = (version, wert)
+            return wert
+
+    def invalidate(self):
+        """Verwirft den gespeicherten Wert."""
+
+        with self._lock:
+            self._eintrag = None
+
+
+class EpochTracker:
+    """
+    Liest Versionszähler (Epochen) aus der Tabelle ``cache_epochs``.
+
+    Jeder Prozess (API, GUI, Gunicorn-Worker) hält eigene Caches. Ändert ein Prozess Daten,
+    erhöht er die Epoche in der Datenbank; die anderen Prozesse bemerken das spätestens nach
+    ``interval`` Sekunden. Caches nehmen die Epoche in ihren Schlüssel auf, sodass alte Einträge
+    nach einer Erhöhung nicht mehr getroffen werden.
+    """
+
+    def __init__(self, interval: float):
+        """
+        Args:
+            interval (float): Mindestabstand zwischen zwei Abfragen der Tabelle in Sekunden.
+        """
+
+        self.interval = interval
+        self._versionen: dict[str, int] = {}
+        self._geladen_um = 0.0
+        self._lock = threading.Lock()
+
+    def _laden(self):
+        """Lädt alle Epochen. Versionen werden nur erhöht, nie zurückgesetzt (z.B. bei DB-Fehlern)."""
+
+        try:
+            rows = db_utils.fetch_all("SELECT name, version FROM cache_epochs")
+        except RuntimeError as e:
+            logger.debug("Cache-Epochen konnten nicht geladen werden: %s", e)
+            rows = []
+        for row in rows:
+            self._versionen[row["name"]] = max(self._versionen.get(row["name"], 0), int(row["version"]))
+        self._geladen_um = time.monotonic()
+
+    def current(self, name: str) -> int:
+        """
+        Liefert die aktuelle Epoche ``name``; fragt die Datenbank höchstens alle ``interval`` Sekunden ab.
+
+        Args:
+            name (str): Name der Epoche (z.B. 'api_keys').
+
+        Returns:
+            int: Die Version (0, falls noch keine existiert).
+        """
+
+        with self._lock:
+            if time.monotonic() - self._geladen_um >= self.interval:
+                self._laden()
+            return self._versionen.get(name, 0)
+
+    def bump(self, name: str) -> bool:
+        """
+        Erhöht die Epoche ``name`` in der Datenbank und danach auch lokal.
+
+        Der Schreibzugriff wird bei Fehlern bis zu ``_BUMP_VERSUCHE`` Mal versucht. Schlägt er
+        endgültig fehl, bleibt auch die lokale Epoche unverändert, damit dieser Prozess nicht von
+        einer Invalidierung ausgeht, die die anderen Prozesse nie erreicht.
+
+        Args:
+            name (str): Name der Epoche.
+
+        Returns:
+            bool: True bei Erfolg, False bei Datenbankfehler.
+        """
+
+        for versuch in range(1, _BUMP_VERSUCHE + 1):
+            success, _ = db_utils.execute_commit(
+                "INSERT INTO cache_epochs (name, version) VALUES (%s, 1) ON DUPLICATE KEY UPDATE version = version + 1",
+                (name,),
+            )
+            if success:
+                break
+            if versuch < _BUMP_VERSUCHE:
+                time.sleep(_BUMP_PAUSE * versuch)
+        else:
+            logger.error("Cache-Epoche '%s' konnte nach %s Versuchen nicht erhöht werden.", name, _BUMP_VERSUCHE)
+            return False
+
+        with self._lock:
+            self._versionen[name] = self._versionen.get(name, 0) + 1
+            # beim nächsten Zugriff den tatsächlichen Stand aus der Datenbank übernehmen
+            self._geladen_um = 0.0
+        return True
+
+
+epochs = EpochTracker(config.cache_config["epoch_interval"])
+
+
+def current_epoch(name: str) -> int:
+    """Liefert die aktuelle Epoche ``name`` (siehe ``EpochTracker.current``)."""
+
+    return epochs.current(name)
+
+
+def bump_epoch(name: str) -> bool:
+    """Erhöht die Epoche ``name`` und invalidiert damit die zugehörigen Caches aller Prozesse."""
+
+    return epochs.bump(name)
@@ -0,0 +1,154 @@
+"""
+Komprimierung von HTTP-Antworten (gzip, optional Brotli).
+
+Große JSON-Antworten (z.B. ``/transaktionen``) und HTML-Seiten der GUI werden komprimiert,
+wenn der Client es per ``Accept-Encoding`` anbietet. Die Funktion ist standardmäßig aus und
+wird mit ``HTTP_COMPRESSION=True`` aktiviert. Brotli wird nur verwendet, wenn das Paket
+``brotli`` installiert ist.
+
+Gestreamte Antworten werden blockweise komprimiert; jeder Block wird sofort an den Client
+weitergegeben (``Z_SYNC_FLUSH``), sodass der Client die Daten nicht erst am Ende erhält.
+"""
+
+import logging
+import zlib
+from collections.abc import Iterable, Iterator
+
+from flask import Flask, Response, request
+
+import config
+
+try:
+    import brotli
+except ImportError:  # optionale Abhängigkeit
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Kompressor:
+    """Komprimiert einen Datenstrom mit gzip oder Brotli."""
+
+    def __init__(self, encoding: str):
+        """
+        Args:
+            encoding (str): 'gzip' oder 'br'.
+        """
+
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=config.compression_config["brotli_quality"])
+        else:
+            self._gz = zlib.compressobj(config.compression_config["gzip_level"], zlib.DEFLATED, 31)
+
+    def block(self, daten: bytes) -> bytes:
+        """Komprimiert ``daten`` und gibt alles bisher Komprimierte sofort aus."""
+
+        if self.encoding == "br":
+            return self._br.process(daten) + self._br.flush()
+        return self._gz.compress(daten) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def ende(self) -> bytes:
+        """Schließt den Datenstrom ab."""
+
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+    def komplett(self, daten: bytes) -> bytes:
+        """Komprimiert einen vollständigen Body in einem Schritt."""
+
+        if self.encoding == "br":
+            return self._br.process(daten) + self._br.finish()
+        return self._gz.compress(daten) + self._gz.flush(zlib.Z_FINISH)
+
+
+def choose_encoding(accept_encodings) -> str | None:
+    """
+    Wählt das Verfahren anhand des Accept-Encoding-Headers.
+
+    Args:
+        accept_encodings (werkzeug.datastructures.Accept): ``request.accept_encodings``.
+
+    Returns:
+        str | None: 'br', 'gzip' oder None, wenn keins von beiden akzeptiert wird.
+    """
+
+    gzip_q = accept_encodings.quality("gzip")
+    if brotli is not None:
+        br_q = accept_encodings.quality("br")
+        if br_q > 0 and br_q >= gzip_q:
+            return "br"
+    return "gzip" if gzip_q > 0 else None
+
+
+def _komprimiert_streamen(kompressor: _Kompressor, bloecke: Iterable[bytes]) -> Iterator[bytes]:
+    for daten in bloecke:
+        if daten:
+            yield kompressor.block(daten)
+    yield kompressor.ende()
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Komprimiert die Antwort, falls Konfiguration, Content-Type und Client es zulassen.
+
+    Args:
+        response (Response): Die fertige Antwort.
+
+    Returns:
+        Response: Dieselbe Antwort, ggf. mit komprimiertem Body und ``Content-Encoding``.
+    """
+
+    konfig = config.compression_config
+    if (
+        not konfig["enabled"]
+        or request.method == "HEAD"
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in konfig["mimetypes"]
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    kompressor = _Kompressor(encoding)
+    if response.is_streamed:
+        original = response.response
+        response.response = _komprimiert_streamen(kompressor, response.iter_encoded())
+        if hasattr(original, "close"):
+            response.call_on_close(original.close)
+        response.headers.pop("Content-Length", None)
+    else:
+        daten = response.get_data()
+        if len(daten) < konfig["min_size"]:
+            return response
+        response.set_data(kompressor.komplett(daten))
+
+    response.headers["Content-Encoding"] = encoding
+    # der komprimierte Body ist nicht byte-identisch, ein starker ETag gilt daher nur noch schwach
+    etag, schwach = response.get_etag()
+    if etag and not schwach:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app: Flask):
+    """
+    Aktiviert die Komprimierung für alle Antworten der Flask-App.
+
+    Args:
+        app (Flask): Die Anwendung.
+    """
+
+    app.after_request(compress_response)
+    if config.compression_config["enabled"]:
+        logger.info(
+            "HTTP-Komprimierung aktiv (%s, ab %s Bytes).",
+            "brotli, gzip" if brotli is not None else "gzip",
+            config.compression_config["min_size"],
+        )
@@ -15,12 +15,20 @@ db_config = {
     "pool_size": int(os.getenv("MYSQL_POOL_SIZE", "10")),
 }
 
+# Sekunden, die bei erschöpftem Verbindungspool auf eine freie Verbindung gewartet wird
+db_pool_timeout = float(os.getenv("MYSQL_POOL_TIMEOUT", "5"))
+
+# Ausstehende Migrationen aus migrations/ beim Start von API/GUI einspielen
+db_auto_migrate = os.getenv("DB_AUTO_MIGRATE", "True").lower() in ["true", "1", "yes"]
+
 smtp_config = {
     "host": os.getenv("SMTP_HOST"),
     "port": os.getenv("SMTP_PORT"),
     "user": os.getenv("SMTP_USER"),
     "password": os.getenv("SMTP_PASSWORD"),
     "sender": os.getenv("SMTP_SENDER"),
+    "pool_size": int(os.getenv("SMTP_POOL_SIZE", "2")),
+    "max_idle": int(os.getenv("SMTP_MAX_IDLE", "60")),
 }
 
 # nur relevant wenn nicht über uWSGI gestartet
@@ -42,5 +50,75 @@ gui_config = {
     "static_url_prefix": os.getenv("STATIC_URL_PREFIX"),
 }
 
+cache_config = {
+    "maxsize": int(os.getenv("CACHE_MAXSIZE", "1024")),
+    "api_key_ttl": int(os.getenv("CACHE_API_KEY_TTL", "300")),
+    "negative_ttl": int(os.getenv("CACHE_NEGATIVE_TTL", "30")),
+    "epoch_interval": int(os.getenv("CACHE_EPOCH_INTERVAL", "5")),
+    "settings_ttl": int(os.getenv("CACHE_SETTINGS_TTL", "60")),
+}
+
+email_outbox_config = {
+    # "embedded": Worker-Thread in API/GUI, "external": separater Prozess (python3 email_outbox.py)
+    "embedded_worker": os.getenv("EMAIL_OUTBOX_WORKER", "embedded").lower() == "embedded",
+    "batch_size": int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20")),
+    "poll_interval": int(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "5")),
+    "max_attempts": int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "8")),
+    "backoff_seconds": int(os.getenv("EMAIL_OUTBOX_BACKOFF", "30")),
+    "max_backoff_seconds": int(os.getenv("EMAIL_OUTBOX_MAX_BACKOFF", "3600")),
+    "lease_seconds": int(os.getenv("EMAIL_OUTBOX_LEASE", "300")),
+    "retention_days": int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "7")),
+}
+
+query_debug_config = {
+    # alle Datenbankabfragen einer Anfrage sammeln und zusammengefasst loggen (im Flask-Debug-Modus immer aktiv)
+    "enabled": os.getenv("DB_QUERY_DEBUG", "False").lower() in ["true", "1", "yes"],
+    # ab so vielen Ausführungen derselben Abfrage innerhalb einer Anfrage wird gewarnt (N+1)
+    "repeat_threshold": int(os.getenv("DB_QUERY_REPEAT_THRESHOLD", "3")),
+    "server_timing": os.getenv("SERVER_TIMING_HEADER", "False").lower() in ["true", "1", "yes"],
+}
+
+idempotency_config = {
+    # so lange (Sekunden) liefert ein Idempotency-Key mindestens die gespeicherte Antwort
+    "ttl": int(os.getenv("IDEMPOTENCY_TTL", "86400")),
+    # zusätzlich prozesslokal gecacht, damit schnelle Wiederholungen die Datenbank nicht fragen
+    "memory_ttl": int(os.getenv("IDEMPOTENCY_MEMORY_TTL", "300")),
+}
+
+qr_config = {
+    # Anzahl QR-Codes (PNG), die je Prozess im Speicher gehalten werden
+    "cache_size": int(os.getenv("QR_CACHE_SIZE", "512")),
+    # optionales Verzeichnis, in dem gerenderte QR-Codes prozessübergreifend abgelegt werden
+    "cache_dir": os.getenv("QR_CACHE_DIR") or None,
+    # maximale Anzahl Dateien in cache_dir, die ältesten werden gelöscht
+    "cache_max_files": int(os.getenv("QR_CACHE_MAX_FILES", "2000")),
+}
+
+pdf_config = {
+    # Gesamtgröße (MB) der je Prozess zwischengespeicherten Transaktionsberichte
+    "cache_mb": int(os.getenv("PDF_CACHE_MB", "32")),
+}
+
+process_pool_config = {
+    # Prozesse je GUI-Worker für PDFs, QR-Codes und Passwort-Hashes; 0 rechnet im Worker selbst
+    "workers": int(os.getenv("PROCESS_POOL_WORKERS", "2")),
+}
+
+compression_config = {
+    "enabled": os.getenv("HTTP_COMPRESSION", "False").lower() in ["true", "1", "yes"],
+    # kleinere Antworten werden unverändert gesendet
+    "min_size": int(os.getenv("HTTP_COMPRESSION_MIN_SIZE", "1024")),
+    "gzip_level": int(os.getenv("HTTP_COMPRESSION_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("HTTP_COMPRESSION_BROTLI_QUALITY", "4")),
+    "mimetypes": [
+        typ.strip()
+        for typ in os.getenv(
+            "HTTP_COMPRESSION_TYPES",
+            "application/json,application/x-ndjson,text/html,text/css,text/plain,application/javascript",
+        ).split(",")
+        if typ.strip()
+    ],
+}
+
 app_name = os.getenv("APP_NAME")
 app_slogan = os.getenv("APP_SLOGAN")
@@ -0,0 +1,200 @@
+"""
+Daten des Admin-Dashboards als fertig formatierter Schnappschuss.
+
+Benutzer und Kontostände kommen aus einer Abfrage (``users`` mit ``user_balances``), danach
+folgen die neuesten Buchungen; die Systemeinstellungen stammen aus dem Einstellungs-Cache.
+
+Alle Werte werden hier einmal für die Anzeige formatiert, das Template rechnet nicht mehr.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from mysql.connector import Error
+
+import db_utils
+import system_settings
+
+logger = logging.getLogger(__name__)
+
+_BENUTZER_QUERY = """
+    SELECT u.id, u.code, u.nachname, u.vorname, u.email, u.kommentar, u.is_locked, u.is_admin,
+           COALESCE(b.saldo, 0) AS saldo
+    FROM users u
+    LEFT JOIN user_balances b ON b.user_id = u.id
+    ORDER BY u.nachname, u.vorname
+"""
+
+_BUCHUNGEN_QUERY = (
+    "SELECT t.id, t.user_id, u.nachname AS nachname, u.vorname AS vorname, "
+    "t.beschreibung, t.saldo_aenderung, t.timestamp "
+    "FROM transactions t LEFT JOIN users u ON t.user_id = u.id "
+    "ORDER BY t.timestamp DESC LIMIT %s"
+)
+
+
+@dataclass(frozen=True)
+class UserRow:
+    """
+    Ein Benutzer in der Übersicht.
+
+    Attributes:
+        id: Benutzer-ID.
+        code: Benutzercode.
+        name: "Nachname, Vorname".
+        email: E-Mail-Adresse oder ''.
+        kommentar: Kommentar oder ''.
+        is_locked: Benutzer ist gesperrt.
+        is_admin: Benutzer ist Admin.
+        saldo_display: Kontostand, z.B. "-3.00 €".
+        saldo_negativ: Kontostand ist kleiner als 0.
+    """
+
+    id: int
+    code: str
+    name: str
+    email: str
+    kommentar: str
+    is_locked: bool
+    is_admin: bool
+    saldo_display: str
+    saldo_negativ: bool
+
+
+@dataclass(frozen=True)
+class TransactionRow:
+    """
+    Eine Buchung in der Liste der neuesten Buchungen.
+
+    Attributes:
+        timestamp_display: Zeitpunkt, z.B. "01.02.2026 12:00".
+        benutzer: "Nachname, Vorname" oder '-' für gelöschte Benutzer.
+        beschreibung: Beschreibung oder ''.
+        betrag_display: Betrag mit Vorzeichen, z.B. "+10.00 €".
+        betrag_negativ: Betrag ist kleiner als 0.
+    """
+
+    timestamp_display: str
+    benutzer: str
+    beschreibung: str
+    betrag_display: str
+    betrag_negativ: bool
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """
+    Alle Daten des Admin-Dashboards.
+
+    Attributes:
+        users: Benutzer, sortiert nach Namen.
+        saldo_gesamt_display: Summe aller Kontostände.
+        recent_transactions: Die neuesten Buchungen, neueste zuerst.
+        system_settings: einstellung_schluessel -> {'wert', 'beschreibung'}.
+    """
+
+    users: tuple[UserRow, ...]
+    saldo_gesamt_display: str
+    recent_transactions: tuple[TransactionRow, ...]
+    system_settings: dict[str, dict]
+
+
+def _betrag(wert) -> str:
+    return f"{wert:.2f} €"
+
+
+def _name(nachname, vorname) -> str:
+    if not nachname and not vorname:
+        return "-"
+    return f"{nachname}, {vorname}" if vorname else str(nachname)
+
+
+def load_users() -> list[dict]:
+    """
+    Lädt alle Benutzer mit Kontostand in einer Abfrage.
+
+    Returns:
+        list[dict]: Benutzer (id, code, nachname, vorname, email, kommentar, is_locked, is_admin,
+                    saldo), sortiert nach Namen. Leere Liste bei Fehlern.
+    """
+
+    return db_utils.fetch_all(_BENUTZER_QUERY, dictionary=True)
+
+
+def load_recent_transactions(limit: int = 10) -> list[dict]:
+    """
+    Lädt die neuesten Buchungen mit Namen des Benutzers.
+
+    Args:
+        limit (int): Maximale Anzahl der Buchungen.
+
+    Returns:
+        list[dict]: Buchungen (id, user_id, nachname, vorname, beschreibung, saldo_aenderung,
+                    timestamp), neueste zuerst. Leere Liste bei Fehlern.
+    """
+
+    return db_utils.fetch_all(_BUCHUNGEN_QUERY, (limit,), dictionary=True)
+
+
+def load_settings() -> dict[str, dict]:
+    """
+    Lädt die Systemeinstellungen aus dem Einstellungs-Cache.
+
+    Returns:
+        dict[str, dict]: einstellung_schluessel -> {'wert', 'beschreibung'}. Leeres Dictionary bei Fehlern.
+    """
+
+    try:
+        return system_settings.get_all()
+    except Error as e:
+        logger.error("Fehler beim Laden der Systemeinstellungen: %s", e)
+        return {}
+
+
+def _user_row(row: dict) -> UserRow:
+    saldo = row["saldo"] or 0
+    return UserRow(
+        id=row["id"],
+        code=row["code"],
+        name=f"{row['nachname']}, {row['vorname']}",
+        email=row["email"] or "",
+        kommentar=row["kommentar"] or "",
+        is_locked=bool(row["is_locked"]),
+        is_admin=bool(row["is_admin"]),
+        saldo_display=_betrag(saldo),
+        saldo_negativ=saldo < 0,
+    )
+
+
+def _transaction_row(row: dict) -> TransactionRow:
+    betrag = row["saldo_aenderung"] or 0
+    timestamp = row["timestamp"]
+    return TransactionRow(
+        timestamp_display=timestamp.strftime("%d.%m.%Y %H:%M")
+        if hasattr(timestamp, "strftime")
+        else str(timestamp or ""),
+        benutzer=_name(row["nachname"], row["vorname"]),
+        beschreibung=row["beschreibung"] or "",
+        betrag_display=("+" if betrag > 0 else "") + _betrag(betrag),
+        betrag_negativ=betrag < 0,
+    )
+
+
+def load(limit: int = 10) -> DashboardSnapshot:
+    """
+    Lädt alle Daten des Admin-Dashboards.
+
+    Args:
+        limit (int): Anzahl der neuesten Buchungen.
+
+    Returns:
+        DashboardSnapshot: Der formatierte Schnappschuss. Fehlgeschlagene Abfragen ergeben leere Listen.
+    """
+
+    users = load_users()
+    return DashboardSnapshot(
+        users=tuple(_user_row(row) for row in users),
+        saldo_gesamt_display=_betrag(sum(row["saldo"] or 0 for row in users)),
+        recent_transactions=tuple(_transaction_row(row) for row in load_recent_transactions(limit)),
+        system_settings=load_settings(),
+    )
@@ -9,6 +9,8 @@ import time
 import mysql.connector
 from mysql.connector import Error, pooling
 
+import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,9 +25,14 @@ class DatabaseConnectionPool:
     """
 
     _connection_pool = None  # Klassenvariable zur Speicherung des Verbindungspools
+    _slots = None  # Semaphore mit einem Platz je Pool-Verbindung, um bei erschöpftem Pool zu warten
+    _pool_size = 0
+    _in_use = 0
+    _in_use_lock = threading.Lock()
+    checkout_timeout = 5.0  # Sekunden, die auf eine freie Verbindung gewartet wird
 
     @classmethod
-    def initialize_pool(cls, database_config):
+    def initialize_pool(cls, database_config, checkout_timeout=None):
         """
         Initialisiert den Datenbankverbindungspool.
 
@@ -36,19 +43,62 @@ class DatabaseConnectionPool:
         Args:
             database_config (dict): Ein Dictionary, das die Konfigurationsparameter für die
                              Datenbankverbindung enthält (z.B. host, user, password, database).
+            checkout_timeout (float, optional): Maximale Wartezeit auf eine freie Verbindung in Sekunden.
 
         Raises:
             mysql.connector.Error: Wenn beim Initialisieren des Pools ein Fehler auftritt.
         """
 
+        if checkout_timeout is not None:
+            cls.checkout_timeout = checkout_timeout
         if cls._connection_pool is None:
             try:
                 cls._connection_pool = pooling.MySQLConnectionPool(pool_name="dbpool", **database_config)
+                cls._pool_size = cls._connection_pool.pool_size
+                cls._slots = threading.BoundedSemaphore(cls._pool_size)
+                cls._in_use = 0
+                cls._update_gauges()
                 logger.info("Datenbankverbindungspool erfolgreich initialisiert.")
             except mysql.connector.Error as e:
                 logger.error("Fehler beim Initialisieren des Datenbankverbindungspools: %s", e)
                 raise  # Wirf den Fehler weiter, damit die Anwendung reagieren kann
 
+    @classmethod
+    def _update_gauges(cls):
+        metrics.DB_POOL_IN_USE.set(cls._in_use)
+        metrics.DB_POOL_IDLE.set(cls._pool_size - cls._in_use)
+
+    @classmethod
+    def _slot_belegen(cls) -> bool:
+        """
+        Reserviert einen Platz im Pool und wartet dafür höchstens ``checkout_timeout`` Sekunden.
+
+        Returns:
+            bool: True, wenn ein Platz frei wurde, False bei Zeitüberschreitung.
+        """
+
+        if cls._slots.acquire(blocking=False):
+            return True
+        metrics.DB_POOL_WAITS.inc()
+        logger.debug("Datenbankpool erschöpft, warte bis zu %ss auf eine freie Verbindung.", cls.checkout_timeout)
+        if cls._slots.acquire(timeout=cls.checkout_timeout):
+            return True
+        metrics.DB_POOL_TIMEOUTS.inc()
+        logger.error(
+            "Keine freie Datenbankverbindung innerhalb von %ss (Pool-Größe %s).", cls.checkout_timeout, cls._pool_size
+        )
+        return False
+
+    @classmethod
+    def _slot_freigeben(cls):
+        with cls._in_use_lock:
+            cls._in_use = max(cls._in_use - 1, 0)
+            cls._update_gauges()
+        try:
+            cls._slots.release()
+        except ValueError:
+            logger.debug("Pool-Platz wurde bereits freigegeben.")
+
     @classmethod
     def _health_check_loop(cls):
         """
@@ -131,10 +181,15 @@ class DatabaseConnectionPool:
                                         Wird benötigt, um den Pool zu initialisieren, wenn er noch nicht
                                         initialisiert ist. Defaults to None.
 
+        Ist der Pool erschöpft, wird bis zu ``checkout_timeout`` Sekunden auf eine freie
+        Verbindung gewartet. Wartezeit, Auslastung und Zeitüberschreitungen werden in
+        ``metrics`` erfasst.
+
         Returns:
             mysql.connector.connection_cext.CMySQLConnection: Eine Datenbankverbindung,
                                                             falls erfolgreich. None, falls kein Pool initialisiert
-                                                            werden konnte und auch keine Verbindung abgerufen werden konnte.
+                                                            werden konnte und auch keine Verbindung abgerufen werden konnte
+                                                            oder innerhalb des Timeouts keine Verbindung frei wurde.
 
         Raises:
             RuntimeError: Wenn der Datenbankverbindungspool nicht initialisiert wurde und kein
@@ -152,12 +207,20 @@ class DatabaseConnectionPool:
             raise RuntimeError(
                 "Datenbankverbindungspool wurde nicht initialisiert."
             )  # Fehler, wenn Pool nicht initialisiert
+        start = time.perf_counter()
+        if not cls._slot_belegen():
+            return None
         try:
             cnx = cls._connection_pool.get_connection()
-            return cnx
         except mysql.connector.Error as e:
+            cls._slots.release()
             logger.error("Fehler beim Abrufen einer Verbindung aus dem Pool: %s", e)
             return None
+        metrics.DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+        with cls._in_use_lock:
+            cls._in_use += 1
+            cls._update_gauges()
+        return cnx
 
     @classmethod
     def close_connection(cls, cnx):
@@ -175,7 +238,10 @@ class DatabaseConnectionPool:
                                                                     wird, wird die Methode beendet.
         """
         if cnx:
-            cnx.close()
+            try:
+                cnx.close()
+            finally:
+                cls._slot_freigeben()
 
     @classmethod
     @contextlib.contextmanager
@@ -197,6 +263,38 @@ class DatabaseConnectionPool:
             if cnx:
                 cls.close_connection(cnx)
 
+    @classmethod
+    @contextlib.contextmanager
+    def transaction(cls, dictionary=True):
+        """
+        Kontextmanager für mehrere Statements in einer gemeinsamen Datenbanktransaktion.
+
+        Stellt einen Cursor auf einer einzelnen Pool-Verbindung bereit. Beim fehlerfreien
+        Verlassen des Blocks wird committet, bei jeder Exception zurückgerollt und die
+        Exception weitergereicht.
+
+        Verwendung:
+            with DatabaseConnectionPool.transaction() as cursor:
+                cursor.execute("INSERT ...", (...))
+                cursor.execute("UPDATE ...", (...))
+
+        Raises:
+            mysql.connector.Error: Wenn keine Verbindung verfügbar ist oder ein Statement fehlschlägt.
+        """
+        with metrics.db_operation("transaction"), cls.connection_manager() as cnx:
+            if not cnx:
+                raise Error(msg="Keine Datenbankverbindung aus dem Pool verfügbar.")
+            try:
+                with cnx.cursor(dictionary=dictionary, buffered=True) as cursor:
+                    yield cursor
+                cnx.commit()
+            except BaseException:
+                try:
+                    cnx.rollback()
+                except Error as rb_err:
+                    logger.debug("Rollback fehlgeschlagen: %s", rb_err)
+                raise
+
     @classmethod
     def fetch_all(cls, query, params=None, dictionary=True):
         """Führt eine SELECT-Abfrage aus und gibt alle Zeilen zurück.
@@ -204,7 +302,7 @@ class DatabaseConnectionPool:
         Gibt eine leere Liste bei Fehlern zurück.
         """
         try:
-            with cls.connection_manager(database_config=None) as cnx:
+            with metrics.db_operation("fetch_all", query, params), cls.connection_manager() as cnx:
                 if not cnx:
                     return []
                 with cnx.cursor(dictionary=dictionary) as cursor:
@@ -218,7 +316,7 @@ class DatabaseConnectionPool:
     def fetch_one(cls, query, params=None, dictionary=True):
         """Führt eine SELECT-Abfrage aus und gibt die erste Zeile zurück oder None bei Fehlern."""
         try:
-            with cls.connection_manager(database_config=None) as cnx:
+            with metrics.db_operation("fetch_one", query, params), cls.connection_manager() as cnx:
                 if not cnx:
                     return None
                 with cnx.cursor(dictionary=dictionary) as cursor:
@@ -228,6 +326,43 @@ class DatabaseConnectionPool:
             logger.error("fetch_one Fehler: %s | Query: %s | Params: %s", e, query, params)
             return None
 
+    @classmethod
+    def iter_rows(cls, query, params=None, dictionary=True, batch_size=500):
+        """Führt eine SELECT-Abfrage mit ungepuffertem Cursor aus und liefert die Zeilen einzeln.
+
+        Die Zeilen werden in Blöcken von ``batch_size`` vom Server gelesen, sodass auch große
+        Ergebnismengen nicht vollständig im Speicher liegen. Die Verbindung bleibt belegt, bis
+        der Generator erschöpft oder geschlossen ist.
+
+        Raises:
+            mysql.connector.Error: Wenn keine Verbindung verfügbar ist oder die Abfrage fehlschlägt.
+        """
+        with cls.connection_manager(database_config=None) as cnx:
+            if not cnx:
+                raise Error(msg="Keine Datenbankverbindung aus dem Pool verfügbar.")
+            cursor = cnx.cursor(dictionary=dictionary, buffered=False)
+            erschoepft = False
+            try:
+                with metrics.db_operation("iter_rows", query, params):
+                    cursor.execute(query, params or ())
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        erschoepft = True
+                        break
+                    yield from rows
+            finally:
+                if not erschoepft:
+                    # ungelesene Zeilen verwerfen, sonst kann die Verbindung nicht zurück in den Pool
+                    try:
+                        cnx.consume_results()
+                    except Error as e:
+                        logger.debug("Verwerfen ungelesener Zeilen fehlgeschlagen: %s", e)
+                try:
+                    cursor.close()
+                except Error as e:
+                    logger.debug("Schließen des Cursors fehlgeschlagen: %s", e)
+
     @classmethod
     def execute_commit(cls, query, params=None):
         """Führt ein INSERT/UPDATE/DELETE aus, committet und gibt Cursor-Infos zurück.
@@ -236,7 +371,7 @@ class DatabaseConnectionPool:
         """
         cnx = None
         try:
-            with cls.connection_manager(database_config=None) as cnx:
+            with metrics.db_operation("execute_commit", query, params), cls.connection_manager() as cnx:
                 if not cnx:
                     return False, None
                 with cnx.cursor() as cursor:
@@ -260,3 +395,5 @@ class DatabaseConnectionPool:
 fetch_one = DatabaseConnectionPool.fetch_one
 fetch_all = DatabaseConnectionPool.fetch_all
 execute_commit = DatabaseConnectionPool.execute_commit
+transaction = DatabaseConnectionPool.transaction
+iter_rows = DatabaseConnectionPool.iter_rows
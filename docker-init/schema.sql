@@ -29,6 +29,40 @@ CREATE TABLE benutzer_benachrichtigungseinstellungen (
   email_aktiviert tinyint(1) NOT NULL DEFAULT '0'
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+DROP TABLE IF EXISTS cache_epochs;
+CREATE TABLE cache_epochs (
+  name varchar(50) COLLATE utf8mb4_unicode_ci NOT NULL,
+  version bigint NOT NULL DEFAULT '0'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TABLE IF EXISTS email_outbox;
+CREATE TABLE email_outbox (
+  id bigint NOT NULL,
+  empfaenger varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  betreff varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  template_html varchar(100) COLLATE utf8mb4_unicode_ci NOT NULL,
+  template_text varchar(100) COLLATE utf8mb4_unicode_ci NOT NULL,
+  context mediumtext COLLATE utf8mb4_unicode_ci NOT NULL,
+  logo_pfad varchar(255) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  status enum('pending','sending','sent','failed') COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT 'pending',
+  versuche int NOT NULL DEFAULT '0',
+  naechster_versuch datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  gesperrt_bis datetime DEFAULT NULL,
+  letzter_fehler varchar(1000) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  erstellt_am datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  gesendet_am datetime DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TABLE IF EXISTS idempotency_keys;
+CREATE TABLE idempotency_keys (
+  api_user_id int NOT NULL,
+  schluessel varchar(128) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  anfrage_hash char(64) CHARACTER SET ascii COLLATE ascii_bin DEFAULT NULL,
+  status_code smallint NOT NULL,
+  antwort text COLLATE utf8mb4_unicode_ci NOT NULL,
+  erstellt_am datetime NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 DROP TABLE IF EXISTS nfc_token;
 CREATE TABLE nfc_token (
   token_id int NOT NULL,
@@ -46,6 +80,13 @@ CREATE TABLE password_reset_tokens (
   expires_at datetime NOT NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+DROP TABLE IF EXISTS schema_version;
+CREATE TABLE schema_version (
+  version int NOT NULL,
+  name varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  applied_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 DROP TABLE IF EXISTS system_einstellungen;
 CREATE TABLE system_einstellungen (
   einstellung_schluessel varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
@@ -62,6 +103,13 @@ CREATE TABLE transactions (
   timestamp datetime NOT NULL DEFAULT CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+DROP TABLE IF EXISTS user_balances;
+CREATE TABLE user_balances (
+  user_id int NOT NULL,
+  saldo int NOT NULL DEFAULT '0',
+  updated_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 DROP TABLE IF EXISTS users;
 CREATE TABLE users (
   id int NOT NULL,
@@ -96,6 +144,10 @@ ALTER TABLE benutzer_benachrichtigungseinstellungen
   ADD PRIMARY KEY (benutzer_id,typ_id),
   ADD KEY typ_id (typ_id);
 
+ALTER TABLE idempotency_keys
+  ADD PRIMARY KEY (api_user_id, schluessel),
+  ADD KEY idx_idempotency_keys_erstellt_am (erstellt_am);
+
 ALTER TABLE nfc_token
   ADD PRIMARY KEY (token_id),
   ADD UNIQUE KEY token_daten (token_daten) USING BTREE,
@@ -106,12 +158,26 @@ ALTER TABLE password_reset_tokens
   ADD UNIQUE KEY token_UNIQUE (token),
   ADD KEY fk_user_id_idx (user_id);
 
+ALTER TABLE schema_version
+  ADD PRIMARY KEY (version);
+
 ALTER TABLE system_einstellungen
   ADD PRIMARY KEY (einstellung_schluessel);
 
 ALTER TABLE transactions
   ADD PRIMARY KEY (id),
-  ADD KEY user_id (user_id);
+  ADD KEY idx_transactions_user_ts_saldo (user_id, timestamp, saldo_aenderung),
+  ADD KEY idx_transactions_timestamp_id (timestamp, id);
+
+ALTER TABLE user_balances
+  ADD PRIMARY KEY (user_id);
+
+ALTER TABLE cache_epochs
+  ADD PRIMARY KEY (name);
+
+ALTER TABLE email_outbox
+  ADD PRIMARY KEY (id),
+  ADD KEY idx_email_outbox_faellig (status, naechster_versuch);
 
 ALTER TABLE users
   ADD PRIMARY KEY (id),
@@ -127,6 +193,9 @@ ALTER TABLE api_users
 ALTER TABLE benachrichtigungstypen
   MODIFY id int NOT NULL AUTO_INCREMENT;
 
+ALTER TABLE email_outbox
+  MODIFY id bigint NOT NULL AUTO_INCREMENT;
+
 ALTER TABLE nfc_token
   MODIFY token_id int NOT NULL AUTO_INCREMENT;
 
@@ -155,6 +224,9 @@ ALTER TABLE password_reset_tokens
 ALTER TABLE transactions
   ADD CONSTRAINT transactions_ibfk_1 FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE RESTRICT;
 
+ALTER TABLE user_balances
+  ADD CONSTRAINT user_balances_ibfk_1 FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE;
+
 INSERT INTO users (id, code, nachname, vorname, password, email, kommentar, infomail_user_threshold, infomail_responsible_threshold, acc_duties, acc_privacy_policy, is_locked, is_admin) VALUES
 (1, '9876543210', 'Admin', 'Admin', 'scrypt:32768:8:1$IYudZaaf6cnGNisf$eb1afcc60e85d6b3b88741544c2c19ca7588794313022c5323db740b83213a65740290ada3aa31ea28132323b7a269dd278d26286b958ef3911a5deb6815c620', '', 'Default-Admin', 5, 5, 1, 1, 0, 1);
 
@@ -165,3 +237,14 @@ INSERT INTO `benachrichtigungstypen` (`id`, `event_schluessel`, `beschreibung`)
 
 INSERT INTO `system_einstellungen` (`einstellung_schluessel`, `einstellung_wert`, `beschreibung`) VALUES
 ('TRANSACTION_SALDO_CHANGE', '-1', 'Dieser Betrag wird beim Scan eines NFC-Token oder QR-Codes vom Saldo abgezogen');
+
+-- Dieses Schema enthält bereits alle Migrationen aus migrations/
+INSERT INTO schema_version (version, name) VALUES
+(1, 'user_balances'),
+(2, 'cache_epochs'),
+(3, 'email_outbox'),
+(4, 'transactions_timestamp_index'),
+(5, 'transactions_user_timestamp_index'),
+(6, 'idempotency_keys'),
+(7, 'idempotency_request_hash'),
+(8, 'transactions_drop_user_id_index');
@@ -0,0 +1,389 @@
+"""
+Persistente Warteschlange für ausgehende E-Mails (Tabelle email_outbox).
+
+Der Request-Pfad legt eine E-Mail nur per INSERT ab (``enqueue``). Ein Worker holt fällige
+Einträge stapelweise ab (``SELECT ... FOR UPDATE SKIP LOCKED``), rendert die Templates,
+versendet den Stapel über eine gemeinsame SMTP-Sitzung und markiert die Einträge als gesendet
+oder plant sie mit exponentiellem Backoff neu ein. Mehrere Worker (z.B. je Gunicorn-Worker
+einer) können parallel laufen, ohne dieselbe E-Mail doppelt zu versenden.
+
+Der Worker läuft entweder eingebettet als Hintergrund-Thread der API/GUI oder separat:
+
+    python3 email_outbox.py
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemLoader, TemplateError, select_autoescape
+from mysql.connector import Error
+
+import config
+import db_utils
+import email_sender
+import metrics
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+# auto_reload=False: kompilierte Templates bleiben im Speicher, ohne bei jedem Aufruf die Datei zu prüfen
+_jinja_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html", "htm", "xml"]),
+    auto_reload=False,
+)
+_jinja_env.globals.update(app_name=config.app_name, app_slogan=config.app_slogan)
+
+_wecker = threading.Event()
+_worker_lock = threading.Lock()
+_worker_state: dict[str, int | None] = {"pid": None}
+
+
+_INSERT_SQL = """
+    INSERT INTO email_outbox (empfaenger, betreff, template_html, template_text, context, logo_pfad)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+_PFLICHTFELDER = ["empfaenger_email", "betreff", "template_name_html", "template_name_text"]
+
+
+def _outbox_zeile(email_params: dict) -> tuple | None:
+    """
+    Prüft die E-Mail-Parameter und bereitet die Werte für das INSERT vor.
+
+    Returns:
+        tuple | None: Die Spaltenwerte oder None, wenn die Parameter unvollständig bzw. nicht serialisierbar sind.
+    """
+
+    if not all(isinstance(email_params.get(feld), str) and email_params.get(feld) for feld in _PFLICHTFELDER):
+        logger.error("Unvollständige E-Mail-Parameter. Benötigt: %s.", ", ".join(_PFLICHTFELDER))
+        return None
+
+    try:
+        context_json = json.dumps(email_params.get("template_context", {}), default=str)
+    except (TypeError, ValueError) as e:
+        logger.error(
+            "Template-Kontext für E-Mail an %s ist nicht serialisierbar: %s", email_params["empfaenger_email"], e
+        )
+        return None
+
+    return (
+        email_params["empfaenger_email"],
+        email_params["betreff"],
+        email_params["template_name_html"],
+        email_params["template_name_text"],
+        context_json,
+        email_params.get("logo_dateipfad"),
+    )
+
+
+def enqueue(email_params: dict) -> bool:
+    """
+    Legt eine E-Mail in der Outbox ab. Gerendert und versendet wird sie vom Worker.
+
+    Args:
+        email_params (dict): Ein Dictionary mit den E-Mail-Parametern:
+                'empfaenger_email' (str): Empfängeradresse.
+                'betreff' (str): Betreff der E-Mail.
+                'template_name_html' (str): Dateiname des HTML-Templates.
+                'template_name_text' (str): Dateiname des Text-Templates.
+                'template_context' (dict): Daten für die Templates (muss JSON-serialisierbar sein).
+                'logo_dateipfad' (str, optional): Pfad zur Logo-Datei.
+
+    Returns:
+        bool: True, wenn die E-Mail gespeichert wurde, sonst False.
+    """
+
+    zeile = _outbox_zeile(email_params)
+    if zeile is None:
+        return False
+
+    success, _ = db_utils.execute_commit(_INSERT_SQL, zeile)
+    if not success:
+        logger.error("E-Mail an %s konnte nicht in die Outbox geschrieben werden.", email_params["empfaenger_email"])
+        return False
+
+    _wecker.set()
+    return True
+
+
+def enqueue_many(email_params_liste: list[dict]) -> int:
+    """
+    Legt mehrere E-Mails mit einem einzigen INSERT in der Outbox ab (z.B. bei Sammelbuchungen).
+
+    Ungültige Einträge werden übersprungen und geloggt.
+
+    Args:
+        email_params_liste (list[dict]): E-Mail-Parameter wie bei ``enqueue``.
+
+    Returns:
+        int: Anzahl der gespeicherten E-Mails (0 bei Datenbankfehler).
+    """
+
+    zeilen = [zeile for zeile in map(_outbox_zeile, email_params_liste) if zeile is not None]
+    if not zeilen:
+        return 0
+
+    try:
+        with db_utils.transaction() as cursor:
+            cursor.executemany(_INSERT_SQL, zeilen)
+    except Error as e:
+        logger.error("%s E-Mail(s) konnten nicht in die Outbox geschrieben werden: %s", len(zeilen), e)
+        return 0
+
+    _wecker.set()
+    return len(zeilen)
+
+
+def _warteschlange() -> dict[str, float]:
+    """Liefert die Anzahl der Outbox-Einträge je Status (für ``/metrics``)."""
+
+    rows = db_utils.fetch_all("SELECT status, COUNT(*) AS anzahl FROM email_outbox GROUP BY status")
+    return {row["status"]: row["anzahl"] for row in rows}
+
+
+metrics.register_scrape_gauge("fvh_email_outbox_messages", "E-Mails in der Outbox je Status.", "status", _warteschlange)
+
+
+def _claim_batch(limit: int) -> list[dict]:
+    """
+    Reserviert bis zu ``limit`` fällige E-Mails für diesen Worker.
+
+    Fällig sind wartende Einträge, deren nächster Versuch erreicht ist, sowie Einträge im Status
+    'sending', deren Reservierung abgelaufen ist (z.B. weil ein Worker abgestürzt ist).
+    """
+
+    with db_utils.transaction() as cursor:
+        cursor.execute(
+            """
+            SELECT id, empfaenger, betreff, template_html, template_text, context, logo_pfad, versuche
+            FROM email_outbox
+            WHERE (status = 'pending' AND naechster_versuch <= NOW())
+               OR (status = 'sending' AND gesperrt_bis < NOW())
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (limit,),
+        )
+        rows = cursor.fetchall()
+        if rows:
+            platzhalter = ", ".join(["%s"] * len(rows))
+            cursor.execute(
+                f"UPDATE email_outbox SET status = 'sending', versuche = versuche + 1, "
+                f"gesperrt_bis = NOW() + INTERVAL %s SECOND WHERE id IN ({platzhalter})",
+                (config.email_outbox_config["lease_seconds"], *[row["id"] for row in rows]),
+            )
+    return rows
+
+
+def _render(row: dict) -> dict[str, Any]:
+    """
+    Rendert die Templates eines Outbox-Eintrags.
+
+    Returns:
+        dict: Nachricht im Format von ``email_sender.sende_formatierte_emails``.
+
+    Raises:
+        jinja2.TemplateError, ValueError: Wenn Templates oder Kontext fehlerhaft sind.
+    """
+
+    context = json.loads(row["context"]) if row["context"] else {}
+    logo_pfad = row["logo_pfad"]
+    logo_exists = email_sender.logo_verfuegbar(logo_pfad)
+    if logo_pfad and not logo_exists:
+        logger.warning("Logo-Datei nicht gefunden unter: %s", logo_pfad)
+    context["logo_exists_fuer_template"] = logo_exists
+
+    return {
+        "empfaenger_email": row["empfaenger"],
+        "betreff": row["betreff"],
+        "content": {
+            "html": _jinja_env.get_template(row["template_html"]).render(**context),
+            "text": _jinja_env.get_template(row["template_text"]).render(**context),
+            "logo_pfad": logo_pfad if logo_exists else None,
+        },
+    }
+
+
+def warm_templates() -> int:
+    """
+    Kompiliert alle E-Mail-Templates (email_*.html/txt) vorab, damit der erste Versand nicht darauf wartet.
+
+    Returns:
+        int: Anzahl der geladenen Templates.
+    """
+
+    anzahl = 0
+    for name in _jinja_env.list_templates(filter_func=lambda n: n.startswith("email_")):
+        try:
+            _jinja_env.get_template(name)
+            anzahl += 1
+        except TemplateError as e:
+            logger.error("E-Mail-Template %s konnte nicht kompiliert werden: %s", name, e)
+    return anzahl
+
+
+def _backoff_sekunden(versuche: int) -> int:
+    """Wartezeit bis zum nächsten Versuch: verdoppelt sich je Fehlversuch, begrenzt nach oben."""
+
+    basis = config.email_outbox_config["backoff_seconds"]
+    return min(basis * 2 ** max(versuche - 1, 0), config.email_outbox_config["max_backoff_seconds"])
+
+
+def _mark_sent(ids: list[int]):
+    if not ids:
+        return
+    platzhalter = ", ".join(["%s"] * len(ids))
+    db_utils.execute_commit(
+        f"UPDATE email_outbox SET status = 'sent', gesendet_am = NOW(), gesperrt_bis = NULL, letzter_fehler = NULL "
+        f"WHERE id IN ({platzhalter})",
+        tuple(ids),
+    )
+
+
+def _mark_failed(row: dict, fehler: str, endgueltig: bool = False):
+    versuche = int(row["versuche"]) + 1  # beim Reservieren bereits hochgezählt
+    if endgueltig or versuche >= config.email_outbox_config["max_attempts"]:
+        logger.error("E-Mail %s an %s endgültig fehlgeschlagen: %s", row["id"], row["empfaenger"], fehler)
+        db_utils.execute_commit(
+            "UPDATE email_outbox SET status = 'failed', gesperrt_bis = NULL, letzter_fehler = %s WHERE id = %s",
+            (fehler[:1000], row["id"]),
+        )
+        return
+
+    wartezeit = _backoff_sekunden(versuche)
+    logger.warning(
+        "E-Mail %s an %s fehlgeschlagen (Versuch %s), neuer Versuch in %s s: %s",
+        row["id"],
+        row["empfaenger"],
+        versuche,
+        wartezeit,
+        fehler,
+    )
+    db_utils.execute_commit(
+        "UPDATE email_outbox SET status = 'pending', gesperrt_bis = NULL, letzter_fehler = %s, "
+        "naechster_versuch = NOW() + INTERVAL %s SECOND WHERE id = %s",
+        (fehler[:1000], wartezeit, row["id"]),
+    )
+
+
+def process_batch(limit: int | None = None) -> int:
+    """
+    Reserviert, rendert und versendet einen Stapel fälliger E-Mails.
+
+    Args:
+        limit (int, optional): Maximale Stapelgröße. Standard: ``EMAIL_OUTBOX_BATCH_SIZE``.
+
+    Returns:
+        int: Anzahl der bearbeiteten Einträge (0, wenn nichts fällig war).
+    """
+
+    rows = _claim_batch(limit or config.email_outbox_config["batch_size"])
+    if not rows:
+        return 0
+
+    zu_senden: list[tuple[dict, dict]] = []
+    for row in rows:
+        try:
+            zu_senden.append((row, _render(row)))
+        except (TemplateError, ValueError) as e:
+            _mark_failed(row, f"Fehler beim Rendern: {e}", endgueltig=True)
+
+    ergebnisse = email_sender.sende_formatierte_emails([nachricht for _, nachricht in zu_senden], config.smtp_config)
+
+    gesendet = []
+    for (row, _), ok in zip(zu_senden, ergebnisse, strict=True):
+        if ok:
+            gesendet.append(row["id"])
+        else:
+            _mark_failed(row, "SMTP-Versand fehlgeschlagen")
+    _mark_sent(gesendet)
+    logger.info("E-Mail-Outbox: %s von %s E-Mails gesendet.", len(gesendet), len(rows))
+    return len(rows)
+
+
+def purge_sent(tage: int | None = None) -> bool:
+    """Löscht gesendete E-Mails, die älter als ``tage`` Tage sind (Standard: ``EMAIL_OUTBOX_RETENTION_DAYS``)."""
+
+    success, _ = db_utils.execute_commit(
+        "DELETE FROM email_outbox WHERE status = 'sent' AND gesendet_am < NOW() - INTERVAL %s DAY",
+        (tage if tage is not None else config.email_outbox_config["retention_days"],),
+    )
+    return success
+
+
+def run_worker(stop_event: threading.Event | None = None):
+    """
+    Verarbeitet die Outbox fortlaufend.
+
+    Ist nichts fällig, wartet der Worker bis zu ``EMAIL_OUTBOX_POLL_INTERVAL`` Sekunden
+    oder bis ``enqueue`` im selben Prozess eine neue E-Mail meldet.
+
+    Args:
+        stop_event (threading.Event, optional): Beendet die Schleife, sobald es gesetzt ist.
+    """
+
+    stop_event = stop_event or threading.Event()
+    poll_interval = config.email_outbox_config["poll_interval"]
+    letzte_bereinigung = 0.0
+    warm_templates()
+    logger.info("E-Mail-Outbox-Worker gestartet (PID %s).", os.getpid())
+
+    while not stop_event.is_set():
+        bearbeitet = 0
+        try:
+            bearbeitet = process_batch()
+            if time.monotonic() - letzte_bereinigung >= 3600:
+                purge_sent()
+                letzte_bereinigung = time.monotonic()
+        except (Error, RuntimeError) as e:
+            logger.error("E-Mail-Outbox-Worker: Datenbankfehler: %s", e)
+        except Exception as e:  # pylint: disable=W0718
+            logger.error("E-Mail-Outbox-Worker: Unerwarteter Fehler: %s", e, exc_info=True)
+
+        if bearbeitet == 0:
+            _wecker.wait(poll_interval)
+            _wecker.clear()
+
+
+def ensure_worker_started() -> bool:
+    """
+    Startet den eingebetteten Worker-Thread, falls er in diesem Prozess noch nicht läuft.
+
+    Der Thread wird pro Prozess-ID gestartet, damit er auch nach einem Fork
+    (Gunicorn mit ``preload_app``) in jedem Worker läuft.
+
+    Returns:
+        bool: True, wenn der Worker in diesem Prozess läuft.
+    """
+
+    if not config.email_outbox_config["embedded_worker"]:
+        return False
+    if _worker_state["pid"] == os.getpid():
+        return True
+    with _worker_lock:
+        if _worker_state["pid"] != os.getpid():
+            threading.Thread(target=run_worker, name="email-outbox", daemon=True).start()
+            _worker_state["pid"] = os.getpid()
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=config.api_config["log_level"],
+        format="%(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stderr)],
+    )
+    db_utils.DatabaseConnectionPool.initialize_pool(config.db_config, config.db_pool_timeout)
+    try:
+        run_worker()
+    except KeyboardInterrupt:
+        logger.info("E-Mail-Outbox-Worker beendet.")
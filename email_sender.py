@@ -1,8 +1,12 @@
 """Versendet schön formatierte HTML-Mails mit einem optionalen Logo und Text-Fallback."""
 
+import functools
 import logging
+import os
 import re
 import smtplib
+import threading
+import time
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -27,18 +31,55 @@ def _validate_smtp_config(smtp_cfg: dict[str, Any]) -> bool:
     return True
 
 
+_LOGO_CID = "logoimage_cid_01"
+_LOGO_IMG_RE = re.compile(r'<img[^>]*src\s*=\s*["\']cid:logo["\'][^>]*>', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=8)
+def _logo_mime_part(logo_pfad: str) -> MIMEImage | None:
+    """
+    Liest das Logo einmal pro Prozess und baut daraus den (base64-kodierten) MIME-Teil.
+
+    Der zurückgegebene Teil wird von allen Nachrichten gemeinsam verwendet und darf nicht verändert werden.
+
+    Args:
+        logo_pfad (str): Pfad zur Logo-Datei.
+
+    Returns:
+        MIMEImage | None: Der MIME-Teil oder None, wenn die Datei nicht existiert oder nicht lesbar ist.
+    """
+
+    logo_file = Path(logo_pfad)
+    try:
+        img = MIMEImage(logo_file.read_bytes(), name=logo_file.name)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # pylint: disable=W0718
+        logger.error("Fehler beim Einbetten des Logos '%s': %s.", logo_pfad, e, exc_info=True)
+        return None
+    img.add_header("Content-ID", f"<{_LOGO_CID}>")
+    img.add_header("Content-Disposition", "inline", filename=logo_file.name)
+    return img
+
+
+def logo_verfuegbar(logo_pfad: str | None) -> bool:
+    """Prüft (gecacht), ob unter ``logo_pfad`` ein einbettbares Logo liegt."""
+
+    return bool(logo_pfad) and _logo_mime_part(str(logo_pfad)) is not None
+
+
 def _prepare_html_with_logo(html_content: str, logo_pfad_content: str | None, logo_cid: str) -> str:
     """Bereitet den HTML-Inhalt vor, ersetzt ggf. Logo-CID oder entfernt Logo-Referenz."""
 
     html_to_send = html_content
-    if logo_pfad_content and Path(logo_pfad_content).is_file():
+    if logo_verfuegbar(logo_pfad_content):
         html_to_send = html_to_send.replace("cid:logo", f"cid:{logo_cid}")
     elif "cid:logo" in html_to_send:
         logger.warning(
             "Logo-Platzhalter 'cid:logo' im HTML gefunden, aber kein gültiger logo_pfad ('%s') oder Datei nicht gefunden. Logo-Referenz wird entfernt.",
             logo_pfad_content,
         )
-        html_to_send = re.sub(r'<img[^>]*src\s*=\s*["\']cid:logo["\'][^>]*>', "", html_content, flags=re.IGNORECASE)
+        html_to_send = _LOGO_IMG_RE.sub("", html_content)
     return html_to_send
 
 
@@ -56,66 +97,223 @@ def _create_mime_message(empfaenger_email: str, betreff: str, content: dict[str,
     text_part = MIMEText(content.get("text", ""), "plain", "utf-8")
     msg_alternative.attach(text_part)
 
-    logo_cid = "logoimage_cid_01"
     logo_pfad_content = content.get("logo_pfad")
 
-    html_final_content = _prepare_html_with_logo(content.get("html", ""), logo_pfad_content, logo_cid)
+    html_final_content = _prepare_html_with_logo(content.get("html", ""), logo_pfad_content, _LOGO_CID)
     html_part = MIMEText(html_final_content, "html", "utf-8")
     msg_alternative.attach(html_part)
 
     if logo_pfad_content:
-        logo_file = Path(logo_pfad_content)
-        if logo_file.is_file():
-            try:
-                with open(logo_file, "rb") as fp:
-                    img = MIMEImage(fp.read(), name=logo_file.name)
-                img.add_header("Content-ID", f"<{logo_cid}>")
-                img.add_header("Content-Disposition", "inline", filename=logo_file.name)
-                msg.attach(img)
-            except FileNotFoundError:
-                logger.warning("Logo-Datei nicht gefunden unter %s (trotz vorheriger Prüfung).", logo_pfad_content)
-            except Exception as e:  # pylint: disable=W0718
-                logger.error("Fehler beim Einbetten des Logos '%s': %s.", logo_pfad_content, e, exc_info=True)
-        else:
-            pass
+        logo_part = _logo_mime_part(str(logo_pfad_content))
+        if logo_part is not None:
+            msg.attach(logo_part)
     return msg
 
 
-def _send_email_via_smtp(msg: MIMEMultipart, smtp_cfg: dict[str, Any], empfaenger_email: str) -> bool:
-    """Stellt die SMTP-Verbindung her und sendet die vorbereitete E-Mail."""
+def _log_smtp_fehler(e: Exception, smtp_cfg: dict[str, Any]):
+    """Schreibt eine passende Fehlermeldung für eine beim SMTP-Versand aufgetretene Exception."""
 
-    try:
-        with smtplib.SMTP(smtp_cfg["host"], int(smtp_cfg["port"])) as server:
-            server.starttls()
-            server.login(smtp_cfg["user"], smtp_cfg["password"])
-            server.sendmail(smtp_cfg["sender"], empfaenger_email, msg.as_string())
-        # logger.info("E-Mail erfolgreich an %s gesendet!", empfaenger_email)
-        return True
-    except smtplib.SMTPAuthenticationError:
+    if isinstance(e, smtplib.SMTPAuthenticationError):
         logger.error("SMTP Authentifizierungsfehler für Benutzer %s. Überprüfe Anmeldedaten.", smtp_cfg.get("user"))
-    except smtplib.SMTPServerDisconnected:
+    elif isinstance(e, smtplib.SMTPServerDisconnected):
         logger.error("Die Verbindung zum SMTP-Server wurde unerwartet getrennt.")
-    except smtplib.SMTPConnectError as e:
+    elif isinstance(e, smtplib.SMTPConnectError):
         logger.error(
             "Fehler beim Verbinden mit dem SMTP-Server %s:%s. Fehler: %s", smtp_cfg.get("host"), smtp_cfg.get("port"), e
         )
-    except smtplib.SMTPHeloError as e:
+    elif isinstance(e, smtplib.SMTPHeloError):
         logger.error("Der Server hat auf HELO/EHLO nicht korrekt geantwortet: %s", e)
-    except smtplib.SMTPRecipientsRefused as e:
+    elif isinstance(e, smtplib.SMTPRecipientsRefused):
         logger.error("Alle Empfänger wurden abgelehnt: %s", e.recipients)  # type: ignore
-    except smtplib.SMTPSenderRefused as e:
+    elif isinstance(e, smtplib.SMTPSenderRefused):
         logger.error("Die Absenderadresse wurde abgelehnt: %s", e.sender)
-    except smtplib.SMTPDataError as e:
+    elif isinstance(e, smtplib.SMTPDataError):
         logger.error("Der Server hat die Nachrichtendaten nicht akzeptiert: %s - %s", e.smtp_code, e.smtp_error)
-    except ConnectionRefusedError:
+    elif isinstance(e, ConnectionRefusedError):
         logger.error(
             "Verbindung zu %s:%s wurde abgelehnt. Läuft der Server und ist der Port korrekt?",
             smtp_cfg.get("host"),
             smtp_cfg.get("port"),
         )
-    except Exception as e:  # pylint: disable=W0718
+    else:
         logger.error("Ein unerwarteter Fehler ist beim E-Mail-Versand aufgetreten: %s", e, exc_info=True)
-    return False
+
+
+# Fehler, die nur die einzelne Nachricht betreffen; die Verbindung bleibt nutzbar
+_NACHRICHTEN_FEHLER = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def _smtp_verbinden(smtp_cfg: dict[str, Any]) -> smtplib.SMTP:
+    """Öffnet eine SMTP-Verbindung inkl. STARTTLS und Anmeldung."""
+
+    server = smtplib.SMTP(smtp_cfg["host"], int(smtp_cfg["port"]))
+    try:
+        server.starttls()
+        server.login(smtp_cfg["user"], smtp_cfg["password"])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _smtp_schliessen(server: smtplib.SMTP):
+    """Beendet eine SMTP-Verbindung, notfalls ohne QUIT."""
+
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+class SMTPConnectionPool:
+    """
+    Hält bis zu ``size`` angemeldete SMTP-Verbindungen offen und verwendet sie wieder.
+
+    Vor der Wiederverwendung wird eine Verbindung per NOOP geprüft; zu lange unbenutzte oder
+    vom Server getrennte Verbindungen werden verworfen und transparent neu aufgebaut. Damit
+    fallen TLS-Handshake und Anmeldung nicht mehr für jede einzelne E-Mail an.
+    """
+
+    def __init__(self, smtp_cfg: dict[str, Any], size: int = 2, max_idle: float = 60):
+        """
+        Args:
+            smtp_cfg (dict): Die SMTP-Konfiguration (host, port, user, password, sender).
+            size (int): Maximale Anzahl gleichzeitig geöffneter Verbindungen.
+            max_idle (float): Sekunden, nach denen eine unbenutzte Verbindung verworfen wird.
+        """
+
+        self.smtp_cfg = smtp_cfg
+        self.size = size
+        self.max_idle = max_idle
+        self._frei: list[tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _verbindung_pruefen(self, server: smtplib.SMTP, zuletzt_genutzt: float) -> bool:
+        if time.monotonic() - zuletzt_genutzt > self.max_idle:
+            return False
+        try:
+            code, _ = server.noop()
+        except (smtplib.SMTPException, OSError):
+            return False
+        return code == 250
+
+    def _holen(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._frei:
+                    break
+                server, zuletzt_genutzt = self._frei.pop()
+            if self._verbindung_pruefen(server, zuletzt_genutzt):
+                return server
+            logger.debug("Verwerfe veraltete SMTP-Verbindung.")
+            _smtp_schliessen(server)
+        return _smtp_verbinden(self.smtp_cfg)
+
+    def _zurueckgeben(self, server: smtplib.SMTP):
+        with self._lock:
+            self._frei.append((server, time.monotonic()))
+
+    def _senden(self, server: smtplib.SMTP, empfaenger_email: str, msg_string: str) -> smtplib.SMTP:
+        """Sendet eine Nachricht; bei getrennter Verbindung wird einmal neu verbunden und wiederholt."""
+
+        try:
+            server.sendmail(self.smtp_cfg["sender"], empfaenger_email, msg_string)
+            return server
+        except smtplib.SMTPServerDisconnected:
+            logger.info("SMTP-Verbindung wurde getrennt, baue sie neu auf.")
+            server.close()
+            server = _smtp_verbinden(self.smtp_cfg)
+            server.sendmail(self.smtp_cfg["sender"], empfaenger_email, msg_string)
+            return server
+
+    def send(self, msg: MIMEMultipart, empfaenger_email: str) -> bool:
+        """
+        Sendet eine vorbereitete E-Mail über eine Verbindung aus dem Pool.
+
+        Returns:
+            bool: True bei Erfolg, sonst False.
+        """
+
+        return self.send_many([(msg, empfaenger_email)])[0]
+
+    def send_many(self, messages: list[tuple[MIMEMultipart, str]]) -> list[bool]:
+        """
+        Sendet mehrere vorbereitete E-Mails über eine gemeinsame Sitzung.
+
+        Wird eine einzelne Nachricht abgelehnt, wird mit der nächsten fortgefahren. Bei einem
+        Verbindungsfehler gelten die restlichen Nachrichten als nicht gesendet.
+
+        Args:
+            messages: Liste von Tupeln (MIME-Nachricht, Empfängeradresse).
+
+        Returns:
+            list[bool]: Pro Nachricht True, wenn sie erfolgreich gesendet wurde.
+        """
+
+        ergebnisse = [False] * len(messages)
+        if not messages:
+            return ergebnisse
+
+        try:
+            with self._slots:
+                server = self._holen()
+                try:
+                    for index, (msg, empfaenger_email) in enumerate(messages):
+                        try:
+                            server = self._senden(server, empfaenger_email, msg.as_string())
+                            ergebnisse[index] = True
+                        except _NACHRICHTEN_FEHLER as e:
+                            _log_smtp_fehler(e, self.smtp_cfg)
+                except BaseException:
+                    _smtp_schliessen(server)
+                    raise
+                self._zurueckgeben(server)
+        except Exception as e:  # pylint: disable=W0718
+            _log_smtp_fehler(e, self.smtp_cfg)
+        return ergebnisse
+
+    def close_all(self):
+        """Schließt alle freien Verbindungen des Pools."""
+
+        with self._lock:
+            freie, self._frei = self._frei, []
+        for server, _ in freie:
+            _smtp_schliessen(server)
+
+
+_pools: dict[tuple, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(smtp_cfg: dict[str, Any]) -> SMTPConnectionPool:
+    """
+    Liefert den SMTP-Pool für die übergebene Konfiguration.
+
+    Pools werden pro Prozess geführt, damit nach einem Fork keine Sockets geteilt werden.
+
+    Args:
+        smtp_cfg (dict): Die SMTP-Konfiguration. Optional: 'pool_size', 'max_idle'.
+
+    Returns:
+        SMTPConnectionPool: Der Pool.
+    """
+
+    schluessel = (os.getpid(), smtp_cfg["host"], str(smtp_cfg["port"]), smtp_cfg["user"])
+    with _pools_lock:
+        pool = _pools.get(schluessel)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                smtp_cfg, size=int(smtp_cfg.get("pool_size") or 2), max_idle=float(smtp_cfg.get("max_idle") or 60)
+            )
+            _pools[schluessel] = pool
+    return pool
+
+
+def _send_email_via_smtp(msg: MIMEMultipart, smtp_cfg: dict[str, Any], empfaenger_email: str) -> bool:
+    """Sendet die vorbereitete E-Mail über eine Verbindung aus dem SMTP-Pool."""
+
+    return get_pool(smtp_cfg).send(msg, empfaenger_email)
 
 
 def sende_formatierte_email(
@@ -147,3 +345,29 @@ def sende_formatierte_email(
     msg = _create_mime_message(empfaenger_email, betreff, content_with_sender)
 
     return _send_email_via_smtp(msg, smtp_cfg, empfaenger_email)
+
+
+def sende_formatierte_emails(nachrichten: list[dict[str, Any]], smtp_cfg: dict[str, Any]) -> list[bool]:
+    """
+    Versendet mehrere formatierte E-Mails über eine gemeinsame SMTP-Sitzung aus dem Pool.
+
+    Args:
+        nachrichten: Liste von Dictionaries mit 'empfaenger_email', 'betreff' und 'content'
+                     (siehe ``sende_formatierte_email``).
+        smtp_cfg: Ein Dictionary mit den SMTP-Serverdetails.
+
+    Returns:
+        list[bool]: Pro Nachricht True, wenn sie erfolgreich gesendet wurde.
+    """
+
+    if not nachrichten or not _validate_smtp_config(smtp_cfg):
+        return [False] * len(nachrichten)
+
+    mime_nachrichten = []
+    for nachricht in nachrichten:
+        content_with_sender = nachricht["content"].copy()
+        content_with_sender["smtp_sender_for_header"] = smtp_cfg["sender"]
+        msg = _create_mime_message(nachricht["empfaenger_email"], nachricht["betreff"], content_with_sender)
+        mime_nachrichten.append((msg, nachricht["empfaenger_email"]))
+
+    return get_pool(smtp_cfg).send_many(mime_nachrichten)
@@ -14,10 +14,9 @@ import tomllib
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
-import qrcode
-import qrcode.constants
 from flask import (  # pigar: required-packages=uWSGI
     Flask,
+    Response,
     flash,
     redirect,
     render_template,
@@ -26,16 +25,23 @@ from flask import (  # pigar: required-packages=uWSGI
     session,
     url_for,
 )
-from fpdf import FPDF
-from jinja2 import TemplateError
 from mysql.connector import Error
-from PIL import Image, ImageDraw, ImageFont
-from qrcode.image.pil import PilImage
 from werkzeug.security import check_password_hash, generate_password_hash
 
+import badges
+import cache
+import compression
 import config
+import dashboard
 import db_utils
-import email_sender
+import email_outbox
+import ledger
+import metrics
+import migrate
+import pdf_reports
+import process_pool
+import qr_codes
+import system_settings
 import utils
 
 logging.basicConfig(
@@ -59,6 +65,8 @@ if not app.config["SECRET_KEY"]:
 app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=7)
 app.config["DEBUG"] = config.api_config["flask_debug_mode"]
 app.config["JSON_AS_ASCII"] = False
+metrics.init_app(app)
+compression.init_app(app)
 
 if "BASE_URL" in os.environ:
     BASE_URL = os.environ.get("BASE_URL", "/")
@@ -83,11 +91,21 @@ except ValueError:
 # Initialisiere den Datenbank-Pool einmal beim Start der Anwendung # pylint: disable=R0801
 if os.environ.get("TESTING") != "True":
     try:
-        db_utils.DatabaseConnectionPool.initialize_pool(config.db_config)
+        db_utils.DatabaseConnectionPool.initialize_pool(config.db_config, config.db_pool_timeout)
     except Error:
         logger.critical("Fehler beim Starten der Datenbankverbindung.")
         sys.exit(1)
 
+    if config.db_auto_migrate:
+        try:
+            migrate.apply_pending()
+        except (Error, ValueError) as e:
+            logger.critical("Fehler beim Einspielen der Datenbank-Migrationen: %s", e)
+            sys.exit(1)
+
+    # Schriftarten für PDFs prüfen und das Logo einmal laden
+    pdf_reports.preload()
+
 # Starte den Health-Check-Thread, nachdem der Pool initialisiert wurde
 # db_utils.DatabaseConnectionPool.start_health_check_thread()
 
@@ -114,86 +132,6 @@ logger.info("Feuerwehr-Versorgungs-Helfer GUI (Version %s) wurde gestartet", app
 # Benachrichtigungseinstellungen
 
 
-def erzeuge_qr_code(daten, text):
-    """
-    Erzeugt einen QR-Code mit zusätzlichem Infotext als PNG-Datei.
-
-    Args:
-        daten (str): Die zu codierenden Daten, hier unser User-Code.
-        text (str): Wird als zusätzlicher Text unterhalb des QR-Codes hinzugefügt.
-
-    Returns:
-        ImageDraw: Bilddaten
-    """
-
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-
-    qr.add_data(daten)
-    qr.make(fit=True)
-
-    img = qr.make_image(image_factory=PilImage, fill_color="black", back_color="white").convert("RGBA")
-
-    qr_breite, qr_hoehe = img.size
-    text_farbe = "black"
-    hintergrund_farbe = "white"
-    text_abstand_unten = 40
-    schriftgroesse = 22
-    font_names = ["Hack-Bold.ttf", "DejaVuSans-Bold.ttf", "NotoSans-Bold.ttf"]
-    schriftart = None
-
-    for font_name in font_names:
-        try:
-            schriftart = ImageFont.truetype(font_name, schriftgroesse)
-            logger.info("Schriftart '%s' geladen.", font_name)
-            break
-        except OSError:
-            logger.error("Schriftart '%s' nicht gefunden.", font_name)
-
-    if schriftart is None:
-        logger.error("Keine der bevorzugten Schriftarten gefunden. Lade Standardschriftart.")
-        schriftart = ImageFont.load_default(size=schriftgroesse)
-
-    zeichne_temp = ImageDraw.Draw(Image.new("RGB", (1, 1)))
-
-    # textbbox((0,0)...) gibt (x1, y1, x2, y2) relativ zum Ankerpunkt (0,0)
-    # Standardanker für textbbox ist 'la' (left-ascent), d.h. (0,0) ist links auf der Grundlinie.
-    # text_box[1] ist der y-Wert des höchsten Pixels (negativ für Aufstrich).
-    # text_box[3] ist der y-Wert des tiefsten Pixels (positiv für Abstriche).
-    text_box = zeichne_temp.textbbox((0, 0), text, font=schriftart)
-    text_breite_val = text_box[2] - text_box[0]
-    text_hoehe_val = text_box[3] - text_box[1]  # Gesamthöhe des Textes
-
-    tatsaechliche_gesamthoehe_textbereich = max(text_abstand_unten, text_hoehe_val)
-
-    # Berechne den Abstand über dem Text, um ihn im tatsaechliche_gesamthoehe_textbereich zu zentrieren.
-    # Wenn tatsaechliche_gesamthoehe_textbereich == text_hoehe_val, ist dieser Abstand 0.
-    abstand_ueber_text = (tatsaechliche_gesamthoehe_textbereich - text_hoehe_val) // 15
-
-    # Neue Gesamthöhe des Bildes
-    neue_bild_hoehe = qr_hoehe + tatsaechliche_gesamthoehe_textbereich
-
-    # Neues Bild erstellen
-    neues_bild = Image.new("RGBA", (qr_breite, neue_bild_hoehe), hintergrund_farbe)
-    neues_bild.paste(img, (0, 0))  # QR-Code auf das neue Bild kopieren
-
-    # Text auf das neue Bild zeichnen
-    zeichne_neu = ImageDraw.Draw(neues_bild)
-
-    text_x = (qr_breite - text_breite_val) // 2
-    # text_y ist die y-Koordinate für die Oberkante des Textes.
-    # Die text() Funktion von Pillow (ohne expliziten Anker) erwartet die obere linke Ecke.
-    text_y = qr_hoehe + abstand_ueber_text
-
-    zeichne_neu.text((text_x, text_y), text, fill=text_farbe, font=schriftart)
-
-    return neues_bild
-
-
 # Benachrichtigungseinstellungen
 def get_all_notification_types():
     """
@@ -313,7 +251,7 @@ def update_user_notification_settings(user_id, active_notification_type_ids_int)
 # Systemeinstellungen (Admin)
 def get_all_system_settings():
     """
-    Ruft alle Systemeinstellungen aus der Datenbank ab.
+    Ruft alle Systemeinstellungen aus dem Einstellungs-Cache ab.
 
     Returns:
         dict: Ein Dictionary, wobei der Schlüssel der 'einstellung_schluessel' ist
@@ -321,17 +259,11 @@ def get_all_system_settings():
               Gibt ein leeres Dictionary zurück bei Fehlern oder wenn keine Einstellungen vorhanden sind.
     """
 
-    query = "SELECT einstellung_schluessel, einstellung_wert, beschreibung FROM system_einstellungen"
-    rows = db_utils.fetch_all(query, dictionary=True)
-    settings = (
-        {
-            row["einstellung_schluessel"]: {"wert": row["einstellung_wert"], "beschreibung": row["beschreibung"]}
-            for row in rows
-        }
-        if rows
-        else {}
-    )
-    return settings
+    try:
+        return system_settings.get_all()
+    except Error as err:
+        logger.error("Datenbankfehler beim Laden der Systemeinstellungen: %s", err)
+        return {}
 
 
 def update_system_setting(einstellung_schluessel, einstellung_wert):
@@ -352,6 +284,8 @@ def update_system_setting(einstellung_schluessel, einstellung_wert):
     success = result[0] if result else False
     if not success:
         flash(f"Datenbankfehler beim Speichern der Einstellung '{einstellung_schluessel}'.", "error")
+        return success
+    system_settings.invalidate()
     return success
 
 
@@ -484,6 +418,22 @@ def _handle_delete_user_nfc_token_admin(form_data, target_user_id):
         flash("NFC-Token erfolgreich entfernt.", "success")
 
 
+def _epoche_erhoehen(name: str):
+    """
+    Erhöht eine Cache-Epoche (siehe ``cache.bump_epoch``) und warnt den Admin, wenn das nicht gelingt.
+
+    Args:
+        name (str): Name der Epoche, z.B. 'users' oder 'api_keys'.
+    """
+
+    if not cache.bump_epoch(name):
+        flash(
+            "Die Änderung ist gespeichert, konnte aber nicht an alle Prozesse gemeldet werden. "
+            "Dort können gecachte Daten (z.B. gelöschte API-Keys) noch eine Weile gelten.",
+            "warning",
+        )
+
+
 # Benutzerfunktionen
 def delete_user(user_id):
     """
@@ -492,7 +442,9 @@ def delete_user(user_id):
     query = "DELETE FROM users WHERE id = %s"
     result = db_utils.execute_commit(query, (user_id,))
     success = result[0] if result else False
-    if not success:
+    if success:
+        _epoche_erhoehen("users")
+    else:
         logger.error("Fehler beim Löschen des Benutzers (ID: %s)", user_id)
     return success
 
@@ -620,34 +572,13 @@ def get_saldo_for_user(user_id):
         int: Das Saldo oder 0, falls kein Benutzer gefunden wird oder keine Transaktionen vorhanden sind.
     """
 
-    query = "SELECT SUM(saldo_aenderung) FROM transactions WHERE user_id = %s"
     try:
-        result = db_utils.fetch_one(query, (user_id,), dictionary=False)
-        return result[0] if result and result[0] is not None else 0
+        return ledger.get_saldo(user_id)
     except Error as err:
         logger.error("Datenbankfehler beim Berechnen des Saldos: %s", err)
         return 0
 
 
-def get_saldo_by_user():
-    """
-    Berechnet das Saldo für jeden Benutzer.
-
-    Returns:
-        dict: Ein Dictionary, wobei der Schlüssel die Benutzer-ID und der Wert das Saldo ist.
-              Enthält alle Benutzer, auch solche ohne Transaktionen (Wert dann 0).
-    """
-
-    query = """
-        SELECT u.id, SUM(t.saldo_aenderung) AS saldo
-        FROM users u
-        LEFT JOIN transactions t ON u.id = t.user_id
-        GROUP BY u.id
-    """
-    rows = db_utils.fetch_all(query, dictionary=True)
-    return {row["id"]: row["saldo"] or 0 for row in rows} if rows else {}
-
-
 def get_all_users():
     """
     Ruft alle Benutzer aus der Datenbank ab, sortiert nach Namen.
@@ -711,20 +642,36 @@ def get_api_keys_for_api_user(api_user_id):
     return db_utils.fetch_all(query, (api_user_id,), dictionary=True)
 
 
-def get_user_transactions(user_id):
+def get_user_transactions(user_id, von=None, bis=None, limit=None, offset=0):
     """
-    Ruft alle Transaktionen für einen bestimmten Benutzer ab, sortiert nach Zeitstempel (neueste zuerst).
+    Ruft die Transaktionen für einen bestimmten Benutzer ab, sortiert nach Zeitstempel (neueste zuerst).
 
     Args:
         user_id (int): Die ID des Benutzers.
+        von (date, optional): Nur Transaktionen ab diesem Tag.
+        bis (date, optional): Nur Transaktionen bis einschließlich diesem Tag.
+        limit (int, optional): Höchstens so viele Transaktionen.
+        offset (int, optional): So viele (neuere) Transaktionen überspringen, nur mit ``limit``.
 
     Returns:
         list: Eine Liste von Dictionaries, wobei jedes Dictionary eine Transaktion repräsentiert
               (id, beschreibung, saldo_aenderung, timestamp). Gibt None zurück, falls ein Fehler auftritt.
     """
 
-    query = "SELECT id, beschreibung, saldo_aenderung, timestamp FROM transactions WHERE user_id = %s ORDER BY timestamp DESC"
-    return db_utils.fetch_all(query, (user_id,), dictionary=True)
+    query = "SELECT id, beschreibung, saldo_aenderung, timestamp FROM transactions WHERE user_id = %s"
+    params = [user_id]
+    if von:
+        query += " AND timestamp >= %s"
+        params.append(von)
+    if bis:
+        query += " AND timestamp < %s"
+        params.append(bis + timedelta(days=1))
+    query += " ORDER BY timestamp DESC"
+    if limit:
+        # id als zweites Kriterium, damit Seiten bei gleichen Zeitstempeln stabil bleiben
+        query += ", id DESC LIMIT %s OFFSET %s"
+        params += [limit, offset]
+    return db_utils.fetch_all(query, tuple(params), dictionary=True)
 
 
 def add_transaction(user_id, beschreibung, saldo_aenderung):
@@ -740,8 +687,7 @@ def add_transaction(user_id, beschreibung, saldo_aenderung):
         bool: True bei Erfolg, False bei Fehler.
     """
 
-    query = "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung) VALUES (%s, %s, %s)"
-    success, _ = db_utils.execute_commit(query, (user_id, beschreibung, saldo_aenderung))
+    success, _ = ledger.add_transaction(user_id, beschreibung, saldo_aenderung)
     return success
 
 
@@ -756,42 +702,38 @@ def delete_all_transactions(user_id):
         bool: True bei Erfolg, False bei Fehler.
     """
 
-    query = "DELETE FROM transactions WHERE user_id = %s"
-    success, _ = db_utils.execute_commit(query, (user_id,))
-    return success
+    return ledger.delete_user_transactions(user_id)
 
 
-def get_recent_transactions(limit=10):
+def hash_password(password):
     """
-    Ruft die neuesten Transaktionen mit optionalen Benutzerinformationen ab.
+    Berechnet den Hash eines Passworts im Prozess-Pool.
+
+    scrypt ist bewusst rechenintensiv und würde sonst den gevent-Worker blockieren.
 
     Args:
-        limit (int): Maximale Anzahl der zurückzugebenden Transaktionen.
+        password (str): Das Passwort im Klartext.
 
     Returns:
-        list: Liste von Dictionaries mit Feldern wie id, user_id, nachname, vorname, beschreibung, saldo_aenderung, timestamp.
+        str: Der Passwort-Hash.
     """
 
-    query = (
-        "SELECT t.id, t.user_id, u.nachname AS nachname, u.vorname AS vorname, "
-        "t.beschreibung, t.saldo_aenderung, t.timestamp "
-        "FROM transactions t LEFT JOIN users u ON t.user_id = u.id "
-        "ORDER BY t.timestamp DESC LIMIT %s"
-    )
-    rows = db_utils.fetch_all(query, (limit,), dictionary=True)
+    return process_pool.run(generate_password_hash, password)
 
-    # Format timestamps for display
-    for row in rows or []:
-        ts = row.get("timestamp")
-        try:
-            if ts:
-                row["timestamp_display"] = ts.strftime("%d.%m.%Y %H:%M")
-            else:
-                row["timestamp_display"] = ""
-        except (AttributeError, ValueError):
-            # Fallback: use str()
-            row["timestamp_display"] = str(ts) if ts is not None else ""
-    return rows if rows else []
+
+def check_password(password_hash, password):
+    """
+    Prüft ein Passwort gegen seinen Hash im Prozess-Pool (siehe ``hash_password``).
+
+    Args:
+        password_hash (str): Der gespeicherte Hash.
+        password (str): Das eingegebene Passwort.
+
+    Returns:
+        bool: True, wenn das Passwort passt.
+    """
+
+    return process_pool.run(check_password_hash, password_hash, password)
 
 
 def update_password(user_id, new_password_hash):
@@ -832,7 +774,7 @@ def add_regular_user_db(user_data):
         bool: True bei Erfolg, False bei Fehler (z.B. Datenbankfehler, doppelter Code).
     """
 
-    hashed_password = generate_password_hash(user_data["password"])
+    hashed_password = hash_password(user_data["password"])
     query = """
         INSERT INTO users (code, nachname, vorname, password, email, kommentar, acc_duties, acc_privacy_policy, is_locked, is_admin)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
@@ -850,7 +792,9 @@ def add_regular_user_db(user_data):
         1 if user_data.get("is_admin") else 0,
     )
     success, _ = db_utils.execute_commit(query, params)
-    if not success:
+    if success:
+        _epoche_erhoehen("users")
+    else:
         flash("Datenbankfehler beim Hinzufügen des Benutzers.", "error")
     return success
 
@@ -924,67 +868,27 @@ def delete_reset_token(token):
 
 
 # --- E-Mail Hilfsfunktion: Template-Rendering und Versand ---
-def prepare_and_send_email(email_params: dict, smtp_cfg: dict) -> bool:
+def prepare_and_send_email(email_params: dict) -> bool:
     """
-    Rendert HTML- und Text-Templates, baut die E-Mail und versendet sie.
-    Args:
-        email_params (dict):
-            - empfaenger_email (str)
-            - betreff (str)
-            - template_name_html (str)
-            - template_name_text (str)
-            - template_context (dict)
-            - logo_dateipfad (str, optional)
-        smtp_cfg (dict): SMTP-Konfiguration
-    Returns:
-        bool: True bei Erfolg, sonst False
-    """
-    empfaenger_email = email_params.get("empfaenger_email")
-    betreff = email_params.get("betreff")
-    template_name_html = email_params.get("template_name_html")
-    template_name_text = email_params.get("template_name_text")
-    template_context = email_params.get("template_context", {})
-    logo_dateipfad_str = email_params.get("logo_dateipfad")
-
-    # Defensive: Fallback auf leere Strings falls None
-    if not isinstance(empfaenger_email, str):
-        logger.error("empfaenger_email fehlt oder ist kein String")
-        return False
-    if not isinstance(betreff, str):
-        logger.error("betreff fehlt oder ist kein String")
-        return False
-    if not isinstance(template_name_html, str):
-        logger.error("template_name_html fehlt oder ist kein String")
-        return False
-    if not isinstance(template_name_text, str):
-        logger.error("template_name_text fehlt oder ist kein String")
-        return False
+    Legt eine E-Mail zum Versand in der E-Mail-Outbox ab.
 
-    # Render templates
-    try:
-        final_html_body = render_template(template_name_html, **template_context)
-        final_text_body = render_template(template_name_text, **template_context)
-    except TemplateError as err:
-        logger.error("Fehler beim Rendern der E-Mail-Templates: %s", err)
-        return False
+    Die Templates werden erst vom Outbox-Worker gerendert und über eine gemeinsame
+    SMTP-Sitzung versendet (siehe email_outbox). Im Request-Pfad erfolgt nur ein INSERT.
 
-    logo_exists = False
-    if logo_dateipfad_str:
-        logo_path_obj = Path(logo_dateipfad_str)
-        if logo_path_obj.is_file():
-            logo_exists = True
-        else:
-            logger.warning("Logo-Datei nicht gefunden unter: %s", logo_dateipfad_str)
+    Args:
+        email_params: Ein Dictionary mit den E-Mail-Parametern:
+                'empfaenger_email' (str): Empfängeradresse.
+                'betreff' (str): Betreff der E-Mail.
+                'template_name_html' (str): Dateiname des HTML-Templates (im templates Ordner).
+                'template_name_text' (str): Dateiname des Text-Templates (im templates Ordner).
+                'template_context' (dict): Dictionary mit Daten für die Templates.
+                'logo_dateipfad' (str, optional): Pfad zur Logo-Datei.
 
-    email_content_dict = {
-        "html": final_html_body,
-        "text": final_text_body,
-        "logo_pfad": logo_dateipfad_str if logo_exists else None,
-    }
+    Returns:
+        bool: True, wenn die E-Mail in die Outbox geschrieben wurde, sonst False.
+    """
 
-    return email_sender.sende_formatierte_email(
-        empfaenger_email=empfaenger_email, betreff=betreff, content=email_content_dict, smtp_cfg=smtp_cfg
-    )
+    return email_outbox.enqueue(email_params)
 
 
 def _send_user_register_email(vorname: str, email: str, code: str, logo_pfad: str):
@@ -1008,7 +912,7 @@ def _send_user_register_email(vorname: str, email: str, code: str, logo_pfad: st
         "template_context": {"vorname": vorname, "code": code},
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info("Neuer Benutzer Benachrichtigung an %s gesendet.", email)
     else:
         logger.error("Fehler beim Senden der Neuer Benutzer Benachrichtigung an %s.", email)
@@ -1035,30 +939,19 @@ def _send_password_reset_email(email: str, token: str, logo_pfad: str):
         "template_context": {"reset_url": reset_url},
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info("Passwort Reset Benachrichtigung an %s gesendet.", email)
     else:
         logger.error("Fehler beim Senden der Passwort Reset Benachrichtigung an %s.", email)
 
 
-def _send_manual_transaction_email(
+def _manual_transaction_email_params(
     target_user: dict, beschreibung: str, saldo_aenderung_str: str, new_saldo: str, logo_pfad: str
-):
-    """Informiert einen Benutzer per E-Mail über eine manuelle Transaktion.
-
-    Die E-Mail enthält Details zur Buchung. Das Ergebnis des Versands
-    wird geloggt.
-
-    Args:
-        target_user (dict): Benutzer-Dictionary mit 'email' und 'vorname'.
-        beschreibung (str): Beschreibung der Transaktion.
-        saldo_aenderung_str (str): Die formatierte Änderung des Saldos.
-        new_saldo (str): Der formatierte neue Saldo.
-        logo_pfad (str): Der Dateipfad zum E-Mail-Logo.
-    """
+) -> dict:
+    """Baut die E-Mail-Parameter für die Benachrichtigung über eine manuelle Transaktion."""
 
     jetzt = datetime.now()
-    email_params = {
+    return {
         "empfaenger_email": target_user["email"],
         "betreff": "Neue Transaktion auf deinem Konto",
         "template_name_html": "email_neue_transaktion.html",
@@ -1073,7 +966,28 @@ def _send_manual_transaction_email(
         },
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+
+
+def _send_manual_transaction_email(
+    target_user: dict, beschreibung: str, saldo_aenderung_str: str, new_saldo: str, logo_pfad: str
+):
+    """Informiert einen Benutzer per E-Mail über eine manuelle Transaktion.
+
+    Die E-Mail enthält Details zur Buchung. Das Ergebnis des Versands
+    wird geloggt.
+
+    Args:
+        target_user (dict): Benutzer-Dictionary mit 'email' und 'vorname'.
+        beschreibung (str): Beschreibung der Transaktion.
+        saldo_aenderung_str (str): Die formatierte Änderung des Saldos.
+        new_saldo (str): Der formatierte neue Saldo.
+        logo_pfad (str): Der Dateipfad zum E-Mail-Logo.
+    """
+
+    email_params = _manual_transaction_email_params(
+        target_user, beschreibung, saldo_aenderung_str, new_saldo, logo_pfad
+    )
+    if prepare_and_send_email(email_params):
         logger.info("Manuelle Transaktion Benachrichtigung an %s gesendet.", target_user["email"])
     else:
         logger.error("Fehler beim Senden der Manuelle Transaktion Benachrichtigung an %s.", target_user["email"])
@@ -1104,7 +1018,7 @@ def _send_responsible_benachrichtigung(target_user: dict, aktueller_saldo: int,
         },
         "logo_dateipfad": logo_pfad,
     }
-    if prepare_and_send_email(email_params, config.smtp_config):
+    if prepare_and_send_email(email_params):
         logger.info("Info über Saldo-Schwelle-erreicht (ID: %s) an Verantwortliche gesendet.", target_user["id"])
     else:
         logger.error("Fehler beim Senden der Saldo-Schwelle-erreicht-Info an ID: %s.", target_user["id"])
@@ -1164,6 +1078,9 @@ def delete_api_key_db(api_key_id):
     success, _ = db_utils.execute_commit(query, (api_key_id,))
     if not success:
         flash("Datenbankfehler beim Löschen des API-Keys.", "error")
+        return success
+    # gecachte Authentifizierungen der API verwerfen
+    _epoche_erhoehen("api_keys")
     return success
 
 
@@ -1182,6 +1099,8 @@ def delete_api_user_and_keys_db(api_user_id):
     db_utils.execute_commit("DELETE FROM api_keys WHERE user_id = %s", (api_user_id,))
     # Dann den API-Benutzer löschen
     success, _ = db_utils.execute_commit("DELETE FROM api_users WHERE id = %s", (api_user_id,))
+    # auch bei Fehler erhöhen, die Keys können bereits gelöscht sein
+    _epoche_erhoehen("api_keys")
     if not success:
         flash("Datenbankfehler beim Löschen des API-Benutzers.", "error")
     return success
@@ -1201,9 +1120,7 @@ def _handle_delete_all_user_transactions(target_user_id):
     """
 
     # Löscht alle Transaktionen für den angegebenen Benutzer
-    query = "DELETE FROM transactions WHERE user_id = %s"
-    result = db_utils.execute_commit(query, (target_user_id,))
-    success = result[0] if result else False
+    success = ledger.delete_user_transactions(target_user_id)
     if not success:
         logger.error("Fehler beim Löschen der Transaktionen für Benutzer %s", target_user_id)
     return success
@@ -1480,7 +1397,7 @@ def _validate_register_form(form_data):
 def _process_system_setting_update(key, new_value_str):
     """
     Verarbeitet die Aktualisierung einer einzelnen Systemeinstellung.
-    Beinhaltet Validierung für TRANSACTION_SALDO_CHANGE
+    Der Wert wird mit den Typ- und Validierungsregeln aus system_settings geprüft.
 
     Args:
         key (str): Der Schlüssel der Systemeinstellung.
@@ -1490,15 +1407,11 @@ def _process_system_setting_update(key, new_value_str):
         bool: True, wenn die Aktualisierung für diese Einstellung erfolgreich war, sonst False.
     """
 
-    if key == "TRANSACTION_SALDO_CHANGE":
-        try:
-            val_int = int(new_value_str)
-            if val_int >= 0:
-                flash("Der Wert für 'Transaktions-Saldo-Änderung' muss kleiner als 0 sein.", "error")
-                return False
-        except ValueError:
-            flash("Der Wert für 'Maximale Negativsaldo-Grenze' muss eine ganze Zahl sein.", "error")
-            return False
+    try:
+        system_settings.parse_value(key, new_value_str)
+    except system_settings.SettingError as e:
+        flash(str(e), "error")
+        return False
 
     if not update_system_setting(key, new_value_str):
         # Fehler wird bereits in update_system_setting geflasht
@@ -1533,6 +1446,9 @@ def _process_bulk_transactions(user_ids, beschreibung, saldo_aenderung):
     """
     Verarbeitet die Sammelbuchung, fügt Transaktionen hinzu und sendet E-Mails.
 
+    Alle Buchungen laufen in einer Datenbanktransaktion (siehe ``ledger.book_bulk``); die
+    Benachrichtigungen werden gesammelt mit einem INSERT in die E-Mail-Outbox gelegt.
+
     Args:
         user_ids (list[str]): Liste der ausgewählten Benutzer-IDs.
         beschreibung (str): Beschreibung für die Transaktion.
@@ -1542,26 +1458,28 @@ def _process_bulk_transactions(user_ids, beschreibung, saldo_aenderung):
         tuple[int, int]: Ein Tupel mit (Anzahl erfolgreicher, Anzahl fehlgeschlagener Transaktionen).
     """
 
-    successful = 0
-    failed = 0
-    for user_id_str in user_ids:
-        user_id_int = int(user_id_str)
-        if add_transaction(user_id_int, beschreibung, saldo_aenderung):
-            successful += 1
-            target_user = get_user_by_id(user_id_int)
-            if (
-                target_user
-                and target_user.get("email")
-                and get_user_notification_preference(user_id_int, "NEUE_TRANSAKTION")
-            ):
-                new_saldo = get_saldo_for_user(user_id_int)
-                logo_pfad_str = str(Path("static/logo/logo-80x109.png"))
-                _send_manual_transaction_email(
-                    target_user, beschreibung, str(saldo_aenderung), str(new_saldo), logo_pfad_str
-                )
+    ergebnis = ledger.book_bulk([int(user_id_str) for user_id_str in user_ids], beschreibung, saldo_aenderung)
+
+    logo_pfad_str = str(Path("static/logo/logo-80x109.png"))
+    emails = [
+        _manual_transaction_email_params(
+            user, beschreibung, str(saldo_aenderung), str(user["neuer_saldo"]), logo_pfad_str
+        )
+        for user in ergebnis.gebucht
+        if user.get("email") and user["benachrichtigen"]
+    ]
+    if emails:
+        eingereiht = email_outbox.enqueue_many(emails)
+        if eingereiht < len(emails):
+            logger.error(
+                "%s von %s Sammelbuchungs-E-Mails konnten nicht eingereiht werden.",
+                len(emails) - eingereiht,
+                len(emails),
+            )
         else:
-            failed += 1
-    return successful, failed
+            logger.info("%s Sammelbuchungs-E-Mails eingereiht.", eingereiht)
+
+    return len(ergebnis.gebucht), ergebnis.fehlgeschlagen
 
 
 def _process_user_info_form(form, user):
@@ -1583,14 +1501,14 @@ def _process_user_info_form(form, user):
         new_password = form["new_password"]
         confirm_new_password = form["confirm_new_password"]
 
-        if not check_password_hash(user["password"], current_password):
+        if not check_password(user["password"], current_password):
             flash("Falsches aktuelles Passwort.", "error")
         elif new_password != confirm_new_password:
             flash("Die neuen Passwörter stimmen nicht überein.", "error")
         elif len(new_password) < 8:
             flash("Das neue Passwort muss mindestens 8 Zeichen lang sein.", "error")
         else:
-            new_password_hash = generate_password_hash(new_password)
+            new_password_hash = hash_password(new_password)
             if update_password(user_id, new_password_hash):
                 flash("Passwort erfolgreich geändert.", "success")
             else:
@@ -1656,6 +1574,19 @@ def admin_required(f):
     return decorated_function
 
 
+@app.before_request
+def start_background_workers():
+    """
+    Startet die Hintergrunddienste (E-Mail-Outbox-Worker) lazy im aktuellen Prozess.
+
+    Wird vor jeder Anfrage aufgerufen, damit jeder Gunicorn-Worker nach dem Fork seinen
+    eigenen Thread erhält. Ist der Worker bereits aktiv, kostet der Aufruf nur einen PID-Vergleich.
+    """
+
+    if not app.testing:
+        email_outbox.ensure_worker_started()
+
+
 @app.before_request
 def make_session_permanent():
     """
@@ -1685,6 +1616,7 @@ def inject_global_vars():
         "app_slogan": config.app_slogan,
         "version": app.config.get("version", "unbekannt"),
         "theme": session.get("theme", "system"),
+        "qr_style_version": qr_codes.STYLE_VERSION,
     }
 
 
@@ -1732,7 +1664,7 @@ def login():
         code_email = request.form["code_email"]
         password = request.form["password"]
         user = fetch_user(code_email)
-        if user and not user["is_locked"] and check_password_hash(user["password"], password):
+        if user and not user["is_locked"] and check_password(user["password"], password):
             session["user_id"] = user["id"]
             session.permanent = True
             session.modified = True
@@ -1759,6 +1691,15 @@ def health_unprotected_route():
     return render_template("web_healthcheck.html")
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """
+    Liefert Laufzeit-Metriken (u.a. Auslastung des Datenbankpools) im Prometheus-Textformat.
+    """
+
+    return metrics.metrics_response()
+
+
 @app.route("/datenschutz")
 def datenschutz():
     """
@@ -1889,7 +1830,7 @@ def reset_with_token(token):
         elif password != confirm_password:
             flash("Die Passwörter stimmen nicht überein.", "error")
         else:
-            new_password_hash = generate_password_hash(password)
+            new_password_hash = hash_password(password)
             if update_password(user["id"], new_password_hash):
                 delete_reset_token(token)  # Wichtig: Token nach Nutzung entwerten
                 flash("Dein Passwort wurde erfolgreich zurückgesetzt. Du kannst dich nun anmelden.", "success")
@@ -1967,10 +1908,37 @@ def user_info():
     )
 
 
+def _pdf_optionen(args) -> pdf_reports.ReportOptions | None:
+    """
+    Liest Zeitraum und Seite des Transaktionsberichts aus den URL-Parametern.
+
+    Args:
+        args: ``request.args`` mit optional 'von', 'bis' (JJJJ-MM-TT), 'limit' und 'seite'.
+
+    Returns:
+        pdf_reports.ReportOptions | None: Die Optionen oder None bei ungültigen Werten.
+    """
+
+    try:
+        von = datetime.strptime(args["von"], "%Y-%m-%d").date() if args.get("von") else None
+        bis = datetime.strptime(args["bis"], "%Y-%m-%d").date() if args.get("bis") else None
+        limit = int(args["limit"]) if args.get("limit") else None
+        seite = int(args.get("seite") or 1)
+    except ValueError:
+        return None
+    if (von and bis and von > bis) or (limit is not None and limit < 1) or seite < 1:
+        return None
+    return pdf_reports.ReportOptions(von=von, bis=bis, limit=limit, seite=seite if limit else 1)
+
+
 @app.route("/user_info/pdf")
 def user_info_pdf():
     """
-    Generiert einen PDF-Bericht über alle Transaktionen des angemeldeten Benutzers und sendet ihn.
+    Generiert einen PDF-Bericht über die Transaktionen des angemeldeten Benutzers und sendet ihn.
+
+    Optionale URL-Parameter: 'von' und 'bis' (JJJJ-MM-TT) begrenzen den Zeitraum, 'limit' und
+    'seite' teilen lange Historien auf. Der Bericht wird gecacht, bis der Benutzer eine neue
+    Buchung hat (siehe ``pdf_reports``).
     """
     user_id = session.get("user_id")
     if not user_id:
@@ -1983,136 +1951,65 @@ def user_info_pdf():
         flash("Benutzer nicht gefunden oder Konto gesperrt.", "error")
         return redirect(BASE_URL + url_for("login"))
 
-    transactions = get_user_transactions(user_id)
-    saldo = sum(t["saldo_aenderung"] for t in transactions) if transactions else 0
-
-    # PDF generieren
-    pdf = FPDF()
-    pdf.add_page()
+    optionen = _pdf_optionen(request.args)
+    if optionen is None:
+        flash("Ungültiger Zeitraum für den PDF-Bericht.", "error")
+        return redirect(BASE_URL + url_for("user_info"))
 
-    # Lokale Schriftarten laden (DejaVuSans für Unicode-Support)
-    font_path_regular = "static/fonts/DejaVuSans.ttf"
-    font_path_bold = "static/fonts/DejaVuSans-Bold.ttf"
-    font_path_italic = "static/fonts/DejaVuSans-Oblique.ttf"
+    version = ledger.get_user_version(user_id)
+    schluessel = (user_id, user["vorname"], user["nachname"], user["code"], version, optionen)
+    pdf_bytes = pdf_reports.cached_report(schluessel) if version else None
+    if pdf_bytes is None:
+        transactions = get_user_transactions(
+            user_id,
+            von=optionen.von,
+            bis=optionen.bis,
+            limit=optionen.limit + 1 if optionen.limit else None,
+            offset=optionen.offset,
+        )
+        weitere = bool(optionen.limit) and len(transactions) > optionen.limit
+        pdf_bytes = process_pool.run(
+            functools.partial(pdf_reports.transaction_report, stand=version[2] if version else None),
+            user,
+            transactions[: optionen.limit],
+            get_saldo_for_user(user_id),
+            optionen,
+            weitere,
+            lang=True,
+        )
+        if version:
+            pdf_reports.remember_report(schluessel, pdf_bytes)
 
-    has_dejavu = (
-        os.path.exists(font_path_regular) and os.path.exists(font_path_bold) and os.path.exists(font_path_italic)
+    return send_file(
+        io.BytesIO(pdf_bytes),
+        mimetype="application/pdf",
+        as_attachment=False,
+        download_name=f"Transaktionen_{user['vorname']}_{user['nachname']}.pdf",
     )
-    if has_dejavu:
-        pdf.add_font("DejaVu", style="", fname=font_path_regular)
-        pdf.add_font("DejaVu", style="B", fname=font_path_bold)
-        pdf.add_font("DejaVu", style="I", fname=font_path_italic)
-        pdf.set_font("DejaVu", size=10)
-        font_name = "DejaVu"
-    else:
-        pdf.set_font("Helvetica", size=10)
-        font_name = "Helvetica"
-
-    # --- HEADER ---
-    logo_path = "static/logo/logo-120x164.png"
-    if os.path.exists(logo_path):
-        pdf.image(logo_path, x=176, y=8, w=14)
-
-    app_name = config.app_name or "Feuerwehr-Versorgungs-Helfer"
-    app_slogan = config.app_slogan or ""
-    if not has_dejavu:
-        app_name = app_name.encode("latin-1", "replace").decode("latin-1")
-        app_slogan = app_slogan.encode("latin-1", "replace").decode("latin-1")
-
-    pdf.set_font(font_name, style="B", size=16)
-    pdf.cell(100, 10, app_name, new_x="LMARGIN", new_y="NEXT")
-    if app_slogan:
-        pdf.set_font(font_name, style="I", size=9)
-        pdf.cell(100, 5, app_slogan, new_x="LMARGIN", new_y="NEXT")
-    pdf.ln(8)
-
-    # Trennlinie
-    pdf.set_draw_color(220, 220, 220)
-    pdf.line(10, 31, 200, 31)
-    pdf.ln(5)
-
-    # --- INFOS ---
-    pdf.set_font(font_name, style="B", size=12)
-    pdf.cell(100, 8, "Transaktionsbericht", ln=1)
-    pdf.set_font(font_name, size=10)
-    user_name = f"{user['vorname']} {user['nachname']}"
-    if not has_dejavu:
-        user_name = user_name.encode("latin-1", "replace").decode("latin-1")
-    pdf.cell(100, 6, f"Benutzer: {user_name}", ln=1)
-    pdf.cell(100, 6, f"Benutzer-Code: {user['code']}", ln=1)
-    pdf.cell(100, 6, f"Erstellt am: {datetime.now().strftime('%d.%m.%Y um %H:%M Uhr')}", ln=1)
-    pdf.ln(5)
-
-    # --- SALDO ANZEIGE ---
-    pdf.set_fill_color(245, 247, 250)
-    pdf.set_draw_color(226, 232, 240)
-    pdf.rect(10, pdf.get_y(), 190, 12, style="DF")
-    pdf.set_font(font_name, style="B", size=11)
-    pdf.set_y(pdf.get_y() + 2)
-    pdf.cell(10, 8, "")  # Spacer
-    pdf.cell(100, 8, "Aktueller Kontostand (Saldo):")
-    pdf.set_x(150)
-    saldo_unit = "€" if has_dejavu else "EUR"
-    pdf.cell(40, 8, f"{saldo:.2f} {saldo_unit}", align="R", ln=1)
-    pdf.set_font(font_name, size=10)
-    pdf.ln(6)
-
-    # --- TABELLE ---
-    col_widths = [105, 35, 50]  # Summe 190
-    pdf.set_fill_color(220, 38, 38)  # Rote Kopfzeile
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_font(font_name, style="B", size=10)
-    pdf.cell(col_widths[0], 8, " Beschreibung", border=1, fill=True)
-    pdf.cell(col_widths[1], 8, "Betrag ", border=1, fill=True, align="R")
-    pdf.cell(col_widths[2], 8, "Zeitpunkt ", border=1, fill=True, align="R")
-    pdf.ln()
-
-    # Tabelleneinträge
-    pdf.set_text_color(15, 23, 42)
-    pdf.set_font(font_name, size=9)
-    fill_row = False
-
-    for t in transactions:
-        if fill_row:
-            pdf.set_fill_color(248, 250, 252)
-        else:
-            pdf.set_fill_color(255, 255, 255)
 
-        beschreibung = t.get("beschreibung", "") or ""
-        if not has_dejavu:
-            # Helvetica / latin-1 fallback
-            beschreibung = beschreibung.encode("latin-1", "replace").decode("latin-1")
-        if len(beschreibung) > 55:
-            beschreibung = beschreibung[:52] + "..."
 
-        saldo_change = t.get("saldo_aenderung", 0.0)
-        sign = "+" if saldo_change > 0 else ""
+# QR-Codes ändern sich bei gleicher URL nie (siehe qr_codes.STYLE_VERSION)
+QR_CACHE_CONTROL = "private, max-age=31536000, immutable"
 
-        if has_dejavu:
-            amount_str = f"{sign}{saldo_change:.2f} \u20ac"
-        else:
-            amount_str = f"{sign}{saldo_change:.2f} EUR"
 
-        timestamp = t.get("timestamp")
-        if timestamp and hasattr(timestamp, "strftime"):
-            timestamp_str = timestamp.strftime("%d.%m.%Y %H:%M")
-        else:
-            timestamp_str = str(timestamp or "")
+def _qr_code_erlaubt(user_id: int, usercode: str) -> bool:
+    """
+    Prüft, ob der eingeloggte Benutzer den QR-Code zu ``usercode`` abrufen darf.
 
-        pdf.cell(col_widths[0], 8, f" {beschreibung}", border=1, fill=True)
-        pdf.cell(col_widths[1], 8, f"{amount_str} ", border=1, fill=True, align="R")
-        pdf.cell(col_widths[2], 8, f"{timestamp_str} ", border=1, fill=True, align="R")
-        pdf.ln()
-        fill_row = not fill_row
+    Args:
+        user_id (int): Die ID des eingeloggten Benutzers.
+        usercode (str): Der angefragte Benutzercode.
 
-    # Bytes an Flask zurücksenden
-    pdf_bytes = pdf.output()
-    return send_file(
-        io.BytesIO(pdf_bytes),
-        mimetype="application/pdf",
-        as_attachment=False,
-        download_name=f"Transaktionen_{user['vorname']}_{user['nachname']}.pdf",
-    )
+    Returns:
+        bool: True für den eigenen Code, für Admins für den Code jedes vorhandenen Benutzers.
+    """
+
+    benutzer = get_user_by_id(user_id)
+    if not benutzer:
+        return False
+    if usercode == benutzer["code"]:
+        return True
+    return bool(benutzer["is_admin"]) and bool(db_utils.fetch_one("SELECT id FROM users WHERE code = %s", (usercode,)))
 
 
 @app.route("/qr_code")
@@ -2123,7 +2020,8 @@ def generate_qr():
     Diese Route erfordert, dass der Benutzer eingeloggt ist. Andernfalls wird er
     zur Login-Seite weitergeleitet.
     Der Inhalt des QR-Codes wird durch die URL-Parameter 'usercode' und 'aktion' bestimmt.
-    'aktion' wird intern auf einen beschreibenden Text abgebildet.
+    'aktion' wird intern auf einen beschreibenden Text abgebildet. Benutzer erhalten nur ihren
+    eigenen Code, Admins den Code jedes vorhandenen Benutzers; nur diese Codes werden gecacht.
 
         URL-Parameter (Query-Argumente):
         usercode (str): Der Benutzercode, der im QR-Code kodiert werden soll.
@@ -2132,12 +2030,14 @@ def generate_qr():
                       Mögliche Werte:
                         - 'a': Wird zu "Transaktion buchen".
                         - 'k': Wird zu "Kontostand".
-                      Andere Werte führen zu einem Standardtext "hier stimmt was nicht!".
                       Dieser Parameter ist erforderlich.
 
+    Das PNG wird aus dem Cache in ``qr_codes`` geliefert und mit ETag und
+    ``Cache-Control: immutable`` ausgeliefert; bei passendem ``If-None-Match`` folgt 304.
+
     Returns:
         flask.Response: Eine Flask-Antwort, die entweder das generierte QR-Code-Bild
-                        (mimetype 'image/png') enthält oder eine Weiterleitung
+                        (mimetype 'image/png'), eine 304-Antwort oder eine Weiterleitung
                         (redirect) zur Login-Seite oder zur Benutzerinformationsseite,
                         falls Parameter fehlen oder der Benutzer nicht eingeloggt ist.
                         Im Falle eines ungültigen 'aktion'-Parameters wird eine
@@ -2153,29 +2053,28 @@ def generate_qr():
     usercode_to_encode = request.args.get("usercode")
     text_to_add = request.args.get("aktion")
 
-    if not usercode_to_encode or not text_to_add:
+    if not usercode_to_encode or text_to_add not in qr_codes.AKTIONEN:
         flash("Ungültige Aktion für QR-Code.", "error")
         return redirect(BASE_URL + url_for("user_info"))
 
-    if text_to_add == "a":
-        text_to_add = "Transaktion buchen"
-        img = erzeuge_qr_code(usercode_to_encode + "a", text_to_add)
-    elif text_to_add == "k":
-        text_to_add = "Kontostand"
-        img = erzeuge_qr_code(usercode_to_encode + "k", text_to_add)
-    else:
-        text_to_add = "Hier stimmt was nicht!"
-        img = None
-        flash("Ungültige Aktion für QR-Code.", "error")
+    # der QR-Code hängt nur von Code, Aktion und STYLE_VERSION ab und ändert sich daher nie
+    daten = qr_codes.benutzer_daten(usercode_to_encode, text_to_add)
+    etag = qr_codes.etag(*daten)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif not _qr_code_erlaubt(user_id, usercode_to_encode):
+        flash("Kein Zugriff auf diesen QR-Code.", "error")
         return redirect(BASE_URL + url_for("user_info"))
-
-    # Bild in einem In-Memory Bytes-Puffer speichern
-    byte_io = io.BytesIO()
-    img.save(byte_io, "PNG")
-    byte_io.seek(0)  # Wichtig: Den Puffer an den Anfang zurücksetzen
-
-    # Bild als Datei-Antwort senden
-    return send_file(byte_io, mimetype="image/png")
+    else:
+        # nur beim ersten Aufruf wird gerendert, im Prozess-Pool statt im gevent-Worker
+        png_bytes = qr_codes.cached(*daten)
+        if png_bytes is None:
+            png_bytes = process_pool.run(qr_codes.render_png, *daten)
+            qr_codes.remember(*daten, png_bytes)
+        response = Response(png_bytes, mimetype="image/png")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = QR_CACHE_CONTROL
+    return response
 
 
 @app.route("/admin", methods=["GET", "POST"])
@@ -2185,7 +2084,8 @@ def admin_dashboard(admin_user):
     Zeigt das Admin-Dashboard mit einer Benutzerübersicht und deren Salden.
     Ermöglicht Admins zudem die Verwaltung von globalen Systemeinstellungen.
 
-    Bei GET-Anfragen werden Benutzerdaten und aktuelle Systemeinstellungen geladen.
+    Bei GET-Anfragen werden Benutzer mit Salden, die neuesten Transaktionen und die
+    Systemeinstellungen geladen (siehe ``dashboard.load``).
     Bei POST-Anfragen können Systemeinstellungen aktualisiert werden.
 
     Returns:
@@ -2210,21 +2110,13 @@ def admin_dashboard(admin_user):
             # Individuelle Fehler wurden bereits in _process_system_setting_update oder update_system_setting geflasht
         return redirect(BASE_URL + url_for("admin_dashboard"))
 
-    # GET Request - Daten holen
-    users_data = get_all_users()
-    saldo_by_user_data = get_saldo_by_user()
-    system_settings_data = get_all_system_settings()
-    user_saldo_all = sum(saldo_by_user_data.values())
-    recent_transactions = get_recent_transactions(limit=10)
+    # GET Request - Benutzer mit Salden, neueste Buchungen und Einstellungen laden
+    snapshot = dashboard.load(limit=10)
 
     return render_template(
         "web_admin_dashboard.html",
         user=admin_user,
-        users=users_data,
-        saldo_by_user=saldo_by_user_data,
-        user_saldo_all=user_saldo_all,
-        recent_transactions=recent_transactions,
-        system_settings=system_settings_data,
+        dashboard=snapshot,
         version=app.config.get("version", "unbekannt"),
     )
 
@@ -2488,6 +2380,35 @@ def admin_bulk_change(admin_user):
     return render_template("web_admin_bulk_change.html", user=admin_user, users=users_data, form_data=default_form_data)
 
 
+@app.route("/admin/badges", methods=["GET", "POST"])
+@admin_required
+def admin_badges(admin_user):
+    """
+    Erzeugt Etikettenbögen (PDF) mit den QR-Codes der ausgewählten Benutzer zum Ausdrucken.
+    Die Authentifizierung wird durch den @admin_required Decorator gehandhabt.
+    """
+
+    users_data = get_all_users()
+
+    if request.method == "POST":
+        selected_user_ids = set(request.form.getlist("selected_users"))
+        selected_users = [u for u in users_data if str(u["id"]) in selected_user_ids]
+        if not selected_users:
+            flash("Bitte mindestens einen Benutzer für die QR-Code-Bögen auswählen.", "error")
+            return render_template("web_admin_badges.html", user=admin_user, users=users_data)
+
+        pdf_bytes = badges.create_pdf(selected_users)
+        logger.info("Admin %s hat QR-Code-Bögen für %s Benutzer erzeugt.", admin_user["id"], len(selected_users))
+        return send_file(
+            io.BytesIO(pdf_bytes),
+            mimetype="application/pdf",
+            as_attachment=False,
+            download_name=f"QR-Codes_{datetime.now().strftime('%Y-%m-%d')}.pdf",
+        )
+
+    return render_template("web_admin_badges.html", user=admin_user, users=users_data)
+
+
 @app.route("/admin/user/<int:target_user_id>/transactions", methods=["GET", "POST"])
 @admin_required
 def admin_user_modification(admin_user, target_user_id):
@@ -5,6 +5,9 @@ Gunicorn configuration file for Feuerwehr-Versorgungs-Helfer.
 # pylint: disable=invalid-name
 
 import multiprocessing
+import os
+import shutil
+import tempfile
 
 # Bind to all interfaces on the container's port
 # The port will be overridden by the CMD in Dockerfile if needed
@@ -26,3 +29,21 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 
 # Preload app for better performance
 preload_app = True
+
+# Metrics of all workers are collected in a shared directory (prometheus_client multiprocess mode).
+# It has to be set before the app (and prometheus_client) is loaded and is emptied on every start.
+# API and GUI need separate directories when they run on the same host.
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "fvh-metrics")
+)
+shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):  # pylint: disable=unused-argument
+    """Removes live gauges (e.g. DB pool usage) of a stopped worker from the metrics."""
+
+    # imported here so that PROMETHEUS_MULTIPROC_DIR is already set
+    from prometheus_client import multiprocess  # noqa: PLC0415
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,261 @@
+"""
+Idempotenz-Schlüssel für Buchungen der Terminals.
+
+Ein Terminal vergibt für jede Buchung einen eindeutigen Schlüssel. Die Antwort der ersten
+Ausführung wird zusammen mit dem Schlüssel in der Tabelle ``idempotency_keys`` gespeichert,
+und zwar in derselben Datenbanktransaktion wie die Buchung. Wiederholt das Terminal die Anfrage
+(z.B. nach einem Timeout oder beim Nachsenden offline gesammelter Scans), wird die gespeicherte
+Antwort geliefert, ohne erneut zu buchen.
+
+Schlüssel gelten je API-Benutzer; zwei Terminals mit unterschiedlichen API-Benutzern können
+sich nicht in die Quere kommen. Mit dem Schlüssel wird ein Hash aus Methode, Pfad und Body der
+Anfrage gespeichert (``request_hash``). Wird ein Schlüssel für eine andere Anfrage wiederverwendet,
+gibt es statt der gespeicherten Antwort einen Fehler 422 (``conflict_response``).
+
+Gespeicherte Antworten werden zweistufig gelesen: zuerst aus einem prozesslokalen Cache
+(``IDEMPOTENCY_MEMORY_TTL``), dann aus der Datenbank. Einträge, die älter als ``IDEMPOTENCY_TTL``
+sind, werden höchstens einmal pro Stunde und Prozess gelöscht.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+from mysql.connector import errorcode
+
+import cache
+import config
+import db_utils
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+_BEREINIGUNG_INTERVALL = 3600
+
+SCHLUESSEL_MAX_LAENGE = 128
+# druckbare ASCII-Zeichen ohne Leerzeichen, z.B. UUIDs
+_SCHLUESSEL_RE = re.compile(rf"[\x21-\x7e]{{1,{SCHLUESSEL_MAX_LAENGE}}}")
+
+
+class GespeicherteAntwort(NamedTuple):
+    """Die bei der ersten Ausführung gespeicherte Antwort und der Hash ihrer Anfrage (None bei alten Einträgen)."""
+
+    status_code: int
+    antwort: dict
+    anfrage_hash: str | None = None
+
+
+class Anfrage(NamedTuple):
+    """
+    Idempotenz-Daten einer einzelnen Buchung (siehe ``ledger.book_by_token``).
+
+    Attributes:
+        api_user_id: Die ID des API-Benutzers.
+        schluessel: Der Idempotenz-Schlüssel.
+        anfrage_hash: Hash der Anfrage (siehe ``request_hash``).
+        antwort_erstellen: Erzeugt aus dem Buchungsergebnis (JSON-Antwort, HTTP-Status).
+    """
+
+    api_user_id: int
+    schluessel: str
+    anfrage_hash: str
+    antwort_erstellen: Callable[[Any], tuple[dict, int]]
+
+
+_speicher = cache.TTLCache(config.cache_config["maxsize"], config.idempotency_config["memory_ttl"])
+_bereinigung = {"zuletzt": 0.0}
+_bereinigung_lock = threading.Lock()
+
+
+def valid_key(schluessel) -> bool:
+    """
+    Prüft, ob ``schluessel`` als Idempotenz-Schlüssel verwendet werden kann.
+
+    Args:
+        schluessel: Der vom Terminal gesendete Wert.
+
+    Returns:
+        bool: True bei 1-128 druckbaren ASCII-Zeichen ohne Leerzeichen.
+    """
+
+    return isinstance(schluessel, str) and bool(_SCHLUESSEL_RE.fullmatch(schluessel))
+
+
+def request_hash(methode: str, pfad: str, daten) -> str:
+    """
+    Berechnet den Hash einer Anfrage, an den ein Idempotenz-Schlüssel gebunden wird.
+
+    Args:
+        methode (str): Die HTTP-Methode.
+        pfad (str): Der Pfad der Anfrage.
+        daten: Der JSON-Body (bei Sammelbuchungen der einzelne Scan).
+
+    Returns:
+        str: SHA-256 als Hex-String; die Reihenfolge der JSON-Felder spielt keine Rolle.
+    """
+
+    body = json.dumps(daten, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{methode.upper()} {pfad}\n{body}".encode()).hexdigest()
+
+
+def matches(gespeichert: GespeicherteAntwort, anfrage_hash: str) -> bool:
+    """True, wenn die gespeicherte Antwort zu dieser Anfrage gehört (alte Einträge ohne Hash gelten als passend)."""
+
+    return gespeichert.anfrage_hash is None or gespeichert.anfrage_hash == anfrage_hash
+
+
+def conflict_response() -> tuple[dict, int]:
+    """
+    Antwort, wenn ein Schlüssel für eine andere Anfrage wiederverwendet wird.
+
+    Returns:
+        tuple[dict, int]: Die JSON-Antwort und der HTTP-Status 422.
+    """
+
+    return {"error": "Der Idempotenz-Schlüssel wurde bereits für eine andere Anfrage verwendet."}, 422
+
+
+def is_duplicate_error(fehler) -> bool:
+    """True, wenn ein Datenbankfehler auf einen gleichzeitig gespeicherten Schlüssel hindeutet."""
+
+    return getattr(fehler, "errno", None) == errorcode.ER_DUP_ENTRY
+
+
+def lookup(cursor, api_user_id: int, schluessel: list[str]) -> dict[str, GespeicherteAntwort]:
+    """
+    Liest die gespeicherten Antworten zu mehreren Schlüsseln mit einer Abfrage.
+
+    Args:
+        cursor: Cursor einer offenen Transaktion (dictionary=True).
+        api_user_id (int): Die ID des API-Benutzers.
+        schluessel (list[str]): Die Schlüssel.
+
+    Returns:
+        dict[str, GespeicherteAntwort]: Schlüssel -> gespeicherte Antwort (nur bekannte Schlüssel).
+    """
+
+    eindeutig = list(dict.fromkeys(schluessel))
+    if not eindeutig:
+        return {}
+    platzhalter = ", ".join(["%s"] * len(eindeutig))
+    cursor.execute(
+        f"SELECT schluessel, anfrage_hash, status_code, antwort FROM idempotency_keys "
+        f"WHERE api_user_id = %s AND schluessel IN ({platzhalter})",
+        [api_user_id, *eindeutig],
+    )
+    return {row["schluessel"]: _gespeicherte_antwort(row) for row in cursor.fetchall()}
+
+
+def _gespeicherte_antwort(row: dict) -> GespeicherteAntwort:
+    return GespeicherteAntwort(int(row["status_code"]), json.loads(row["antwort"]), row.get("anfrage_hash"))
+
+
+def store_many(cursor, api_user_id: int, eintraege: list[tuple[str, str, int, dict]]):
+    """
+    Speichert Antworten zu neuen Schlüsseln innerhalb der Transaktion der Buchung.
+
+    Wurde ein Schlüssel parallel von einer anderen Anfrage gespeichert, schlägt das INSERT mit
+    ER_DUP_ENTRY fehl und die gesamte Transaktion wird zurückgerollt (siehe ``is_duplicate_error``).
+
+    Args:
+        cursor: Cursor einer offenen Transaktion.
+        api_user_id (int): Die ID des API-Benutzers.
+        eintraege (list[tuple[str, str, int, dict]]): (Schlüssel, Hash der Anfrage, HTTP-Status, JSON-Antwort).
+    """
+
+    if not eintraege:
+        return
+    cursor.executemany(
+        "INSERT INTO idempotency_keys (api_user_id, schluessel, anfrage_hash, status_code, antwort) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [
+            (api_user_id, schluessel, anfrage_hash, status_code, json.dumps(antwort, ensure_ascii=False))
+            for schluessel, anfrage_hash, status_code, antwort in eintraege
+        ],
+    )
+
+
+def store(cursor, anfrage: Anfrage, ergebnis) -> GespeicherteAntwort:
+    """
+    Speichert die Antwort zu einer einzelnen Buchung innerhalb ihrer Transaktion.
+
+    Args:
+        cursor: Cursor einer offenen Transaktion.
+        anfrage (Anfrage): Schlüssel und Antwort-Erzeugung.
+        ergebnis: Das Buchungsergebnis.
+
+    Returns:
+        GespeicherteAntwort: Die gespeicherte Antwort.
+    """
+
+    antwort, status_code = anfrage.antwort_erstellen(ergebnis)
+    store_many(cursor, anfrage.api_user_id, [(anfrage.schluessel, anfrage.anfrage_hash, status_code, antwort)])
+    return GespeicherteAntwort(status_code, antwort, anfrage.anfrage_hash)
+
+
+def remember(api_user_id: int, schluessel: str, gespeichert: GespeicherteAntwort):
+    """
+    Legt eine gespeicherte Antwort nach dem Commit zusätzlich im prozesslokalen Cache ab.
+
+    Args:
+        api_user_id (int): Die ID des API-Benutzers.
+        schluessel (str): Der Idempotenz-Schlüssel.
+        gespeichert (GespeicherteAntwort): Die Antwort.
+    """
+
+    _speicher.set((api_user_id, schluessel), gespeichert)
+    purge_if_due()
+
+
+def get(api_user_id: int, schluessel: str) -> GespeicherteAntwort | None:
+    """
+    Liefert die gespeicherte Antwort zu einem Schlüssel, zuerst aus dem Speicher, dann aus der Datenbank.
+
+    Args:
+        api_user_id (int): Die ID des API-Benutzers.
+        schluessel (str): Der Idempotenz-Schlüssel.
+
+    Returns:
+        GespeicherteAntwort | None: Die Antwort oder None, wenn der Schlüssel neu ist.
+    """
+
+    gespeichert = _speicher.get((api_user_id, schluessel))
+    if gespeichert is not cache.MISSING:
+        return gespeichert
+
+    row = db_utils.fetch_one(
+        "SELECT anfrage_hash, status_code, antwort FROM idempotency_keys WHERE api_user_id = %s AND schluessel = %s",
+        (api_user_id, schluessel),
+        dictionary=True,
+    )
+    if not row:
+        return None
+    gespeichert = _gespeicherte_antwort(row)
+    _speicher.set((api_user_id, schluessel), gespeichert)
+    return gespeichert
+
+
+def purge_expired(ttl: int | None = None) -> bool:
+    """Löscht Schlüssel, die älter als ``ttl`` Sekunden sind (Standard: ``IDEMPOTENCY_TTL``)."""
+
+    success, _ = db_utils.execute_commit(
+        "DELETE FROM idempotency_keys WHERE erstellt_am < NOW() - INTERVAL %s SECOND",
+        (ttl if ttl is not None else config.idempotency_config["ttl"],),
+    )
+    return success
+
+
+def purge_if_due():
+    """Ruft ``purge_expired`` höchstens einmal pro Stunde und Prozess auf."""
+
+    with _bereinigung_lock:
+        if time.monotonic() - _bereinigung["zuletzt"] < _BEREINIGUNG_INTERVALL:
+            return
+        _bereinigung["zuletzt"] = time.monotonic()
+    if not purge_expired():
+        logger.warning("Abgelaufene Idempotenz-Schlüssel konnten nicht gelöscht werden.")
@@ -0,0 +1,733 @@
+"""Verwaltet Buchungen und die materialisierten Kontostände (Tabelle user_balances).
+
+Jede Änderung an ``transactions`` wird in derselben Datenbanktransaktion in ``user_balances``
+nachgezogen, damit Saldo-Abfragen nicht mehr über alle Buchungen eines Benutzers summieren müssen.
+
+Konsistenzprüfung bzw. Reparatur über die Kommandozeile:
+    python ledger.py check
+    python ledger.py repair
+"""
+
+import argparse
+import datetime
+import logging
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from mysql.connector import Error
+
+import cache
+import config
+import db_utils
+import idempotency
+
+logger = logging.getLogger(__name__)
+
+# Wird bei jeder Änderung an Buchungen/Kontoständen erhöht (siehe cache.bump_epoch)
+EPOCH_NAME = "ledger"
+
+_UPSERT_BALANCE_SQL = """
+    INSERT INTO user_balances (user_id, saldo) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE saldo = saldo + VALUES(saldo)
+"""
+
+_REBUILD_BALANCES_SQL = """
+    INSERT INTO user_balances (user_id, saldo)
+    SELECT src.user_id, src.summe FROM (
+        SELECT user_id, COALESCE(SUM(saldo_aenderung), 0) AS summe FROM transactions GROUP BY user_id
+    ) AS src
+    ON DUPLICATE KEY UPDATE saldo = src.summe
+"""
+
+_BOOKING_USER_COLUMNS = """
+    u.id, u.nachname, u.vorname, u.email, u.is_locked,
+    u.infomail_user_threshold, u.infomail_responsible_threshold
+"""
+
+_NOTIFICATION_PREFERENCES_SQL = """
+    SELECT bt.event_schluessel, COALESCE(bba.email_aktiviert, 0) AS email_aktiviert
+    FROM benachrichtigungstypen bt
+    LEFT JOIN benutzer_benachrichtigungseinstellungen bba ON bba.typ_id = bt.id AND bba.benutzer_id = %s
+"""
+
+_MISMATCH_SQL = """
+    SELECT u.id AS user_id, u.nachname, u.vorname,
+           COALESCE(b.saldo, 0) AS gespeichert, COALESCE(s.summe, 0) AS berechnet
+    FROM users u
+    LEFT JOIN user_balances b ON b.user_id = u.id
+    LEFT JOIN (SELECT user_id, SUM(saldo_aenderung) AS summe FROM transactions GROUP BY user_id) s
+        ON s.user_id = u.id
+    WHERE COALESCE(b.saldo, 0) <> COALESCE(s.summe, 0)
+    ORDER BY u.id
+"""
+
+
+def _ledger_geaendert():
+    """Macht gecachte Auswertungen (z.B. /saldo-alle) in allen Prozessen ungültig."""
+
+    cache.bump_epoch(EPOCH_NAME)
+
+
+@dataclass
+class BookingResult:
+    """
+    Ergebnis einer Buchung über ``book_by_token`` bzw. ``book_by_code``.
+
+    Attributes:
+        status: "ok", "unknown" (Token/Code unbekannt), "locked" (Benutzer gesperrt)
+                oder "insufficient" (Limit würde unterschritten).
+        user: Benutzerdaten (id, nachname, vorname, email, is_locked, infomail-Schwellen, ggf. token_id).
+        saldo_vorher: Kontostand vor der Buchung.
+        neuer_saldo: Kontostand nach der Buchung (bei Ablehnung gleich saldo_vorher).
+        transaction_id: ID der angelegten Buchung.
+        benachrichtigungen: event_schluessel -> E-Mail-Benachrichtigung aktiviert.
+    """
+
+    status: str
+    user: dict | None = None
+    saldo_vorher: int = 0
+    neuer_saldo: int = 0
+    transaction_id: int | None = None
+    benachrichtigungen: dict[str, bool] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """True, wenn die Buchung angelegt wurde."""
+        return self.status == "ok"
+
+
+@dataclass
+class BulkBookingResult:
+    """
+    Ergebnis einer Sammelbuchung über ``book_bulk``.
+
+    Attributes:
+        gebucht: Je gebuchtem Benutzer ein Dictionary mit Benutzerdaten (siehe ``BookingResult.user``)
+                 sowie 'neuer_saldo' und 'benachrichtigen' (E-Mail bei NEUE_TRANSAKTION aktiviert).
+        fehlgeschlagen: Anzahl der Benutzer-IDs, für die nicht gebucht wurde.
+    """
+
+    gebucht: list[dict] = field(default_factory=list)
+    fehlgeschlagen: int = 0
+
+
+@dataclass
+class TokenScan:
+    """
+    Ein NFC-Scan aus einer Sammelbuchung eines Terminals (siehe ``book_token_batch``).
+
+    Attributes:
+        idempotency_key: Vom Terminal vergebener, eindeutiger Schlüssel des Scans.
+        token_bytes: Die Rohdaten des NFC-Tokens.
+        beschreibung: Beschreibung der Buchung.
+        timestamp: Zeitpunkt des Scans laut Terminal (wird als Buchungszeitpunkt gespeichert).
+        anfrage_hash: Hash des Scans, an den der Schlüssel gebunden wird (siehe ``idempotency.request_hash``).
+    """
+
+    idempotency_key: str
+    token_bytes: bytes
+    beschreibung: str
+    timestamp: datetime.datetime
+    anfrage_hash: str | None = None
+
+
+@dataclass
+class BatchItemResult:
+    """
+    Ergebnis eines Scans aus ``book_token_batch``.
+
+    Attributes:
+        status_code: HTTP-Status der Antwort für diesen Scan.
+        antwort: JSON-Antwort für diesen Scan.
+        ergebnis: Das Buchungsergebnis; None, wenn der Schlüssel bereits bekannt war.
+        konflikt: Der Schlüssel gehört zu einem anderen Scan (Status 422, nichts gebucht).
+    """
+
+    status_code: int
+    antwort: dict
+    ergebnis: BookingResult | None = None
+    konflikt: bool = False
+
+    @property
+    def wiederholt(self) -> bool:
+        """True, wenn die gespeicherte Antwort einer früheren Ausführung geliefert wurde."""
+        return self.ergebnis is None and not self.konflikt
+
+
+def apply_saldo_change(cursor, user_id: int, saldo_aenderung: int):
+    """
+    Zieht eine Saldo-Änderung in user_balances nach.
+
+    Muss innerhalb derselben Transaktion wie das zugehörige INSERT in ``transactions`` aufgerufen werden.
+
+    Args:
+        cursor: Cursor einer offenen Transaktion (siehe ``db_utils.transaction``).
+        user_id (int): Die ID des Benutzers.
+        saldo_aenderung (int): Die gebuchte Änderung.
+    """
+
+    cursor.execute(_UPSERT_BALANCE_SQL, (user_id, saldo_aenderung))
+
+
+def insert_transaction(cursor, user_id: int, beschreibung: str, saldo_aenderung: int) -> int:
+    """
+    Legt eine Buchung an und aktualisiert den Kontostand innerhalb einer offenen Transaktion.
+
+    Args:
+        cursor: Cursor einer offenen Transaktion.
+        user_id (int): Die ID des Benutzers.
+        beschreibung (str): Beschreibung der Buchung.
+        saldo_aenderung (int): Die Änderung des Saldos.
+
+    Returns:
+        int: Die ID der neuen Buchung.
+    """
+
+    cursor.execute(
+        "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung) VALUES (%s, %s, %s)",
+        (user_id, beschreibung, saldo_aenderung),
+    )
+    transaction_id = cursor.lastrowid
+    apply_saldo_change(cursor, user_id, saldo_aenderung)
+    return transaction_id
+
+
+def add_transaction(user_id: int, beschreibung: str, saldo_aenderung: int) -> tuple[bool, int | None]:
+    """
+    Fügt eine Buchung hinzu und aktualisiert den Kontostand atomar.
+
+    Args:
+        user_id (int): Die ID des Benutzers.
+        beschreibung (str): Beschreibung der Buchung.
+        saldo_aenderung (int): Die Änderung des Saldos.
+
+    Returns:
+        tuple[bool, int | None]: (True, transaction_id) bei Erfolg, (False, None) bei Fehler.
+    """
+
+    try:
+        with db_utils.transaction() as cursor:
+            transaction_id = insert_transaction(cursor, user_id, beschreibung, saldo_aenderung)
+    except Error as e:
+        logger.error("Fehler beim Buchen für Benutzer %s: %s", user_id, e)
+        return False, None
+    _ledger_geaendert()
+    return True, transaction_id
+
+
+def _book_locked_user(
+    cursor, user: dict, beschreibung: str, saldo_aenderung: int, max_negativ_saldo: int | None
+) -> BookingResult:
+    """
+    Führt die Buchung für einen bereits per FOR UPDATE gesperrten Benutzer durch.
+
+    Args:
+        cursor: Cursor einer offenen Transaktion.
+        user (dict): Die gesperrte Benutzerzeile.
+        beschreibung (str): Beschreibung der Buchung.
+        saldo_aenderung (int): Die Änderung des Saldos.
+        max_negativ_saldo (int | None): Untergrenze für den neuen Saldo, None für keine Prüfung.
+
+    Returns:
+        BookingResult: Das Ergebnis der Buchung.
+    """
+
+    if user.get("is_locked"):
+        return BookingResult("locked", user=user)
+
+    cursor.execute("SELECT saldo FROM user_balances WHERE user_id = %s FOR UPDATE", (user["id"],))
+    row = cursor.fetchone()
+    saldo_vorher = int(row["saldo"]) if row else 0
+
+    if max_negativ_saldo is not None and saldo_vorher + saldo_aenderung < max_negativ_saldo:
+        return BookingResult("insufficient", user=user, saldo_vorher=saldo_vorher, neuer_saldo=saldo_vorher)
+
+    if user.get("token_id") is not None:
+        cursor.execute("UPDATE nfc_token SET last_used = NOW() WHERE token_id = %s", (user["token_id"],))
+    transaction_id = insert_transaction(cursor, user["id"], beschreibung, saldo_aenderung)
+
+    cursor.execute(_NOTIFICATION_PREFERENCES_SQL, (user["id"],))
+    benachrichtigungen = {row["event_schluessel"]: bool(row["email_aktiviert"]) for row in cursor.fetchall()}
+
+    return BookingResult(
+        "ok",
+        user=user,
+        saldo_vorher=saldo_vorher,
+        neuer_saldo=saldo_vorher + saldo_aenderung,
+        transaction_id=transaction_id,
+        benachrichtigungen=benachrichtigungen,
+    )
+
+
+def book_by_token(
+    token_bytes: bytes,
+    beschreibung: str,
+    saldo_aenderung: int,
+    max_negativ_saldo: int | None = 0,
+    idempotenz: idempotency.Anfrage | None = None,
+) -> BookingResult:
+    """
+    Bucht einen NFC-Scan in einer einzigen Datenbanktransaktion.
+
+    Token-Suche, Sperren der Benutzerzeile (SELECT ... FOR UPDATE), Limitprüfung, Aktualisierung
+    von last_used, INSERT der Buchung, Kontostand und Benachrichtigungseinstellungen laufen auf
+    derselben Verbindung. Gleichzeitige Scans desselben Benutzers werden dadurch serialisiert und
+    können das Limit nicht gemeinsam unterlaufen.
+
+    Args:
+        token_bytes (bytes): Die Rohdaten des NFC-Tokens.
+        beschreibung (str): Beschreibung der Buchung.
+        saldo_aenderung (int): Die Änderung des Saldos.
+        max_negativ_saldo (int | None): Untergrenze für den neuen Saldo, None für keine Prüfung.
+        idempotenz (idempotency.Anfrage, optional): Speichert die Antwort zum Idempotenz-Schlüssel
+            in derselben Transaktion.
+
+    Returns:
+        BookingResult: Das Ergebnis der Buchung.
+
+    Raises:
+        mysql.connector.Error: Bei Datenbankfehlern (die Transaktion wird zurückgerollt), auch wenn
+            der Idempotenz-Schlüssel gleichzeitig von einer anderen Anfrage gespeichert wurde.
+    """
+
+    with db_utils.transaction() as cursor:
+        # token_daten ist UNIQUE: Token-Suche und Sperre der Benutzerzeile in einer Abfrage
+        cursor.execute(
+            f"SELECT {_BOOKING_USER_COLUMNS}, t.token_id FROM nfc_token AS t "
+            "INNER JOIN users AS u ON t.user_id = u.id WHERE t.token_daten = %s FOR UPDATE",
+            (token_bytes,),
+        )
+        user = cursor.fetchone()
+        if user:
+            ergebnis = _book_locked_user(cursor, user, beschreibung, saldo_aenderung, max_negativ_saldo)
+        else:
+            ergebnis = BookingResult("unknown")
+        if idempotenz is not None:
+            idempotency.store(cursor, idempotenz, ergebnis)
+    if ergebnis.ok:
+        _ledger_geaendert()
+    return ergebnis
+
+
+def book_by_code(
+    code: str,
+    beschreibung: str,
+    saldo_aenderung: int,
+    max_negativ_saldo: int | None = None,
+    idempotenz: idempotency.Anfrage | None = None,
+) -> BookingResult:
+    """
+    Bucht für einen Benutzer anhand seines Codes in einer einzigen Datenbanktransaktion.
+
+    Args:
+        code (str): Der 10-stellige Code des Benutzers.
+        beschreibung (str): Beschreibung der Buchung.
+        saldo_aenderung (int): Die Änderung des Saldos.
+        max_negativ_saldo (int | None): Untergrenze für den neuen Saldo, None für keine Prüfung.
+        idempotenz (idempotency.Anfrage, optional): Speichert die Antwort zum Idempotenz-Schlüssel
+            in derselben Transaktion.
+
+    Returns:
+        BookingResult: Das Ergebnis der Buchung.
+
+    Raises:
+        mysql.connector.Error: Bei Datenbankfehlern (die Transaktion wird zurückgerollt), auch wenn
+            der Idempotenz-Schlüssel gleichzeitig von einer anderen Anfrage gespeichert wurde.
+    """
+
+    with db_utils.transaction() as cursor:
+        cursor.execute(f"SELECT {_BOOKING_USER_COLUMNS} FROM users AS u WHERE u.code = %s FOR UPDATE", (code,))
+        user = cursor.fetchone()
+        if user:
+            ergebnis = _book_locked_user(cursor, user, beschreibung, saldo_aenderung, max_negativ_saldo)
+        else:
+            ergebnis = BookingResult("unknown")
+        if idempotenz is not None:
+            idempotency.store(cursor, idempotenz, ergebnis)
+    if ergebnis.ok:
+        _ledger_geaendert()
+    return ergebnis
+
+
+def book_bulk(user_ids: list[int], beschreibung: str, saldo_aenderung: int) -> BulkBookingResult:
+    """
+    Bucht denselben Betrag für mehrere Benutzer in einer einzigen Datenbanktransaktion.
+
+    Statt pro Benutzer einzeln zu buchen und nachzulesen, werden Benutzer, Benachrichtigungs-
+    einstellungen und neue Kontostände mit je einer Abfrage gelesen; Buchungen und Kontostände
+    werden mit mehrzeiligen INSERTs geschrieben. Unbekannte IDs zählen als fehlgeschlagen.
+    Schlägt ein Statement fehl, wird nichts gebucht.
+
+    Args:
+        user_ids (list[int]): Die IDs der Benutzer (Duplikate werden ignoriert).
+        beschreibung (str): Beschreibung der Buchungen.
+        saldo_aenderung (int): Die Änderung des Saldos je Benutzer.
+
+    Returns:
+        BulkBookingResult: Die gebuchten Benutzer und die Anzahl der Fehlschläge.
+    """
+
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return BulkBookingResult()
+    platzhalter = ", ".join(["%s"] * len(ids))
+
+    try:
+        with db_utils.transaction() as cursor:
+            # Sperren in fester Reihenfolge, damit sich parallele Sammelbuchungen nicht verklemmen
+            cursor.execute(
+                f"SELECT {_BOOKING_USER_COLUMNS} FROM users AS u WHERE u.id IN ({platzhalter}) ORDER BY u.id FOR UPDATE",
+                ids,
+            )
+            users = cursor.fetchall()
+            if not users:
+                return BulkBookingResult(fehlgeschlagen=len(ids))
+            gefunden = [user["id"] for user in users]
+            gefunden_platzhalter = ", ".join(["%s"] * len(gefunden))
+
+            cursor.execute(
+                f"""
+                SELECT bba.benutzer_id FROM benutzer_benachrichtigungseinstellungen bba
+                JOIN benachrichtigungstypen bt ON bba.typ_id = bt.id
+                WHERE bt.event_schluessel = 'NEUE_TRANSAKTION' AND bba.email_aktiviert = 1
+                  AND bba.benutzer_id IN ({gefunden_platzhalter})
+                """,
+                gefunden,
+            )
+            benachrichtigen = {row["benutzer_id"] for row in cursor.fetchall()}
+
+            cursor.executemany(
+                "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung) VALUES (%s, %s, %s)",
+                [(user_id, beschreibung, saldo_aenderung) for user_id in gefunden],
+            )
+            cursor.execute(
+                "INSERT INTO user_balances (user_id, saldo) VALUES "
+                + ", ".join(["(%s, %s)"] * len(gefunden))
+                + " ON DUPLICATE KEY UPDATE saldo = saldo + VALUES(saldo)",
+                [wert for user_id in gefunden for wert in (user_id, saldo_aenderung)],
+            )
+
+            cursor.execute(
+                f"SELECT user_id, saldo FROM user_balances WHERE user_id IN ({gefunden_platzhalter})", gefunden
+            )
+            salden = {row["user_id"]: int(row["saldo"]) for row in cursor.fetchall()}
+    except Error as e:
+        logger.error("Fehler bei der Sammelbuchung für %s Benutzer: %s", len(ids), e)
+        return BulkBookingResult(fehlgeschlagen=len(ids))
+
+    _ledger_geaendert()
+    gebucht = [
+        {**user, "neuer_saldo": salden.get(user["id"], 0), "benachrichtigen": user["id"] in benachrichtigen}
+        for user in users
+    ]
+    return BulkBookingResult(gebucht=gebucht, fehlgeschlagen=len(ids) - len(gebucht))
+
+
+def book_token_batch(
+    api_user_id: int,
+    scans: list[TokenScan],
+    saldo_aenderung: int,
+    antwort_erstellen: Callable[[BookingResult], tuple[dict, int]],
+    max_negativ_saldo: int | None = 0,
+) -> list[BatchItemResult]:
+    """
+    Bucht offline gesammelte NFC-Scans eines Terminals in einer einzigen Datenbanktransaktion.
+
+    Bereits gespeicherte Idempotenz-Schlüssel, alle Token samt Benutzern (FOR UPDATE), die
+    Kontostände und die Benachrichtigungseinstellungen werden mit je einer Abfrage gelesen.
+    Die Scans werden in der übergebenen Reihenfolge geprüft (Sperre, Limit mit laufendem
+    Kontostand); Buchungen, Kontostände, last_used und die Antworten zu den Schlüsseln werden
+    gesammelt geschrieben. Kommt ein Schlüssel mehrfach vor, zählt nur der erste Scan. Gehört ein
+    Schlüssel zu einem anderen Scan (abweichender ``anfrage_hash``), ergibt er Status 422.
+
+    Args:
+        api_user_id (int): Die ID des API-Benutzers (Geltungsbereich der Schlüssel).
+        scans (list[TokenScan]): Die Scans.
+        saldo_aenderung (int): Die Änderung des Saldos je Scan.
+        antwort_erstellen (Callable): Erzeugt aus dem Buchungsergebnis (JSON-Antwort, HTTP-Status).
+        max_negativ_saldo (int | None): Untergrenze für den neuen Saldo, None für keine Prüfung.
+
+    Returns:
+        list[BatchItemResult]: Ein Ergebnis je Scan, in derselben Reihenfolge.
+
+    Raises:
+        mysql.connector.Error: Bei Datenbankfehlern (die Transaktion wird zurückgerollt), auch wenn
+            ein Schlüssel gleichzeitig von einer anderen Anfrage gespeichert wurde.
+    """
+
+    if not scans:
+        return []
+
+    ergebnisse: dict[str, BatchItemResult] = {}
+    hashes: dict[str, str | None] = {}
+    with db_utils.transaction() as cursor:
+        for schluessel, gespeichert in idempotency.lookup(
+            cursor, api_user_id, [scan.idempotency_key for scan in scans]
+        ).items():
+            ergebnisse[schluessel] = BatchItemResult(gespeichert.status_code, gespeichert.antwort)
+            hashes[schluessel] = gespeichert.anfrage_hash
+
+        neu: dict[str, TokenScan] = {}
+        for scan in scans:
+            if scan.idempotency_key not in ergebnisse and scan.idempotency_key not in neu:
+                neu[scan.idempotency_key] = scan
+                hashes[scan.idempotency_key] = scan.anfrage_hash
+        tokens = list(dict.fromkeys(scan.token_bytes for scan in neu.values()))
+
+        benutzer_je_token: dict[bytes, dict] = {}
+        salden: dict[int, int] = {}
+        if tokens:
+            platzhalter = ", ".join(["%s"] * len(tokens))
+            cursor.execute(
+                f"SELECT {_BOOKING_USER_COLUMNS}, t.token_id, t.token_daten FROM nfc_token AS t "
+                f"INNER JOIN users AS u ON t.user_id = u.id WHERE t.token_daten IN ({platzhalter}) "
+                "ORDER BY u.id FOR UPDATE",
+                tokens,
+            )
+            for row in cursor.fetchall():
+                benutzer_je_token[bytes(row.pop("token_daten"))] = row
+            user_ids = sorted({user["id"] for user in benutzer_je_token.values()})
+            if user_ids:
+                cursor.execute(
+                    f"SELECT user_id, saldo FROM user_balances WHERE user_id IN ({', '.join(['%s'] * len(user_ids))}) "
+                    "ORDER BY user_id FOR UPDATE",
+                    user_ids,
+                )
+                salden = {row["user_id"]: int(row["saldo"]) for row in cursor.fetchall()}
+
+        buchungen: list[tuple[TokenScan, BookingResult]] = []
+        neue_ergebnisse: list[tuple[TokenScan, BookingResult]] = []
+        for scan in neu.values():
+            user = benutzer_je_token.get(scan.token_bytes)
+            if user is None:
+                ergebnis = BookingResult("unknown")
+            elif user.get("is_locked"):
+                ergebnis = BookingResult("locked", user=user)
+            else:
+                saldo_vorher = salden.get(user["id"], 0)
+                if max_negativ_saldo is not None and saldo_vorher + saldo_aenderung < max_negativ_saldo:
+                    ergebnis = BookingResult(
+                        "insufficient", user=user, saldo_vorher=saldo_vorher, neuer_saldo=saldo_vorher
+                    )
+                else:
+                    salden[user["id"]] = saldo_vorher + saldo_aenderung
+                    ergebnis = BookingResult(
+                        "ok", user=user, saldo_vorher=saldo_vorher, neuer_saldo=saldo_vorher + saldo_aenderung
+                    )
+                    buchungen.append((scan, ergebnis))
+            neue_ergebnisse.append((scan, ergebnis))
+
+        if buchungen:
+            gebuchte_ids = sorted({ergebnis.user["id"] for _, ergebnis in buchungen})
+            id_platzhalter = ", ".join(["%s"] * len(gebuchte_ids))
+            cursor.executemany(
+                "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung, timestamp) VALUES (%s, %s, %s, %s)",
+                [
+                    (ergebnis.user["id"], scan.beschreibung, saldo_aenderung, scan.timestamp)
+                    for scan, ergebnis in buchungen
+                ],
+            )
+            summen: dict[int, int] = {}
+            for _, ergebnis in buchungen:
+                summen[ergebnis.user["id"]] = summen.get(ergebnis.user["id"], 0) + saldo_aenderung
+            cursor.execute(
+                "INSERT INTO user_balances (user_id, saldo) VALUES "
+                + ", ".join(["(%s, %s)"] * len(summen))
+                + " ON DUPLICATE KEY UPDATE saldo = saldo + VALUES(saldo)",
+                [wert for user_id, summe in summen.items() for wert in (user_id, summe)],
+            )
+            token_ids = sorted({ergebnis.user["token_id"] for _, ergebnis in buchungen})
+            cursor.execute(
+                f"UPDATE nfc_token SET last_used = NOW() WHERE token_id IN ({', '.join(['%s'] * len(token_ids))})",
+                token_ids,
+            )
+
+            cursor.execute(
+                f"""
+                SELECT bba.benutzer_id, bt.event_schluessel, bba.email_aktiviert
+                FROM benutzer_benachrichtigungseinstellungen bba
+                JOIN benachrichtigungstypen bt ON bba.typ_id = bt.id
+                WHERE bba.benutzer_id IN ({id_platzhalter})
+                """,
+                gebuchte_ids,
+            )
+            praeferenzen: dict[int, dict[str, bool]] = {}
+            for row in cursor.fetchall():
+                praeferenzen.setdefault(row["benutzer_id"], {})[row["event_schluessel"]] = bool(row["email_aktiviert"])
+            for _, ergebnis in buchungen:
+                ergebnis.benachrichtigungen = praeferenzen.get(ergebnis.user["id"], {})
+
+        zu_speichern = []
+        for scan, ergebnis in neue_ergebnisse:
+            antwort, status_code = antwort_erstellen(ergebnis)
+            ergebnisse[scan.idempotency_key] = BatchItemResult(status_code, antwort, ergebnis)
+            zu_speichern.append((scan.idempotency_key, scan.anfrage_hash, status_code, antwort))
+        idempotency.store_many(cursor, api_user_id, zu_speichern)
+
+    if buchungen:
+        _ledger_geaendert()
+    # doppelte Schlüssel innerhalb der Anfrage liefern das Ergebnis des ersten Scans als Wiederholung
+    konflikt_antwort, konflikt_status = idempotency.conflict_response()
+    konflikt = BatchItemResult(konflikt_status, konflikt_antwort, konflikt=True)
+    gesehen: set[str] = set()
+    ausgabe = []
+    for scan in scans:
+        eintrag = ergebnisse[scan.idempotency_key]
+        gespeichert_hash = hashes[scan.idempotency_key]
+        if scan.anfrage_hash and gespeichert_hash and scan.anfrage_hash != gespeichert_hash:
+            eintrag = konflikt
+        elif scan.idempotency_key in gesehen and eintrag.ergebnis is not None:
+            eintrag = BatchItemResult(eintrag.status_code, eintrag.antwort)
+        gesehen.add(scan.idempotency_key)
+        ausgabe.append(eintrag)
+    return ausgabe
+
+
+def delete_user_transactions(user_id: int) -> bool:
+    """
+    Löscht alle Buchungen eines Benutzers und setzt seinen Kontostand zurück.
+
+    Args:
+        user_id (int): Die ID des Benutzers.
+
+    Returns:
+        bool: True bei Erfolg, False bei Fehler.
+    """
+
+    try:
+        with db_utils.transaction() as cursor:
+            cursor.execute("DELETE FROM transactions WHERE user_id = %s", (user_id,))
+            cursor.execute("DELETE FROM user_balances WHERE user_id = %s", (user_id,))
+    except Error as e:
+        logger.error("Fehler beim Löschen der Buchungen für Benutzer %s: %s", user_id, e)
+        return False
+    _ledger_geaendert()
+    return True
+
+
+def delete_all_transactions() -> bool:
+    """
+    Leert die Tabelle transactions und setzt alle Kontostände zurück.
+
+    TRUNCATE führt in MySQL einen impliziten Commit aus und kann daher nicht mit dem
+    Zurücksetzen von user_balances in einer Transaktion laufen. Schlägt der zweite Schritt fehl,
+    bringt ``python ledger.py repair`` die Tabellen wieder in Einklang.
+
+    Returns:
+        bool: True bei Erfolg, False bei Fehler.
+    """
+
+    success, _ = db_utils.execute_commit("TRUNCATE TABLE transactions")
+    if not success:
+        return False
+    _ledger_geaendert()
+    success, _ = db_utils.execute_commit("DELETE FROM user_balances")
+    if not success:
+        logger.error("Kontostände konnten nach dem Leeren der Buchungen nicht zurückgesetzt werden.")
+    return success
+
+
+def get_saldo(user_id: int) -> int:
+    """
+    Liefert den aktuellen Kontostand eines Benutzers.
+
+    Args:
+        user_id (int): Die ID des Benutzers.
+
+    Returns:
+        int: Der Kontostand, 0 falls keine Buchungen vorhanden sind.
+    """
+
+    row = db_utils.fetch_one("SELECT saldo FROM user_balances WHERE user_id = %s", (user_id,), dictionary=True)
+    return int(row["saldo"]) if row and row.get("saldo") is not None else 0
+
+
+def get_user_version(user_id: int) -> tuple | None:
+    """
+    Liefert einen Stand der Buchungen eines Benutzers, der sich mit jeder Änderung ändert.
+
+    Buchungen werden nur angefügt oder komplett gelöscht; Anzahl, höchste ID und jüngster
+    Zeitstempel ändern sich daher bei jeder Änderung (der Zeitstempel auch nach einem TRUNCATE,
+    das die IDs zurücksetzt). Die Abfrage nutzt nur den Index auf (user_id, timestamp).
+
+    Args:
+        user_id (int): Die ID des Benutzers.
+
+    Returns:
+        tuple | None: (Anzahl, höchste ID, jüngster Zeitstempel) oder None bei Datenbankfehlern.
+    """
+
+    row = db_utils.fetch_one(
+        "SELECT COUNT(*) AS anzahl, MAX(id) AS max_id, MAX(timestamp) AS max_ts FROM transactions WHERE user_id = %s",
+        (user_id,),
+        dictionary=True,
+    )
+    return (row["anzahl"], row["max_id"], row["max_ts"]) if row else None
+
+
+def check_balances() -> list[dict]:
+    """
+    Vergleicht user_balances mit der Summe der Buchungen.
+
+    Returns:
+        list[dict]: Alle Benutzer, deren gespeicherter Kontostand abweicht
+                    (user_id, nachname, vorname, gespeichert, berechnet).
+    """
+
+    return db_utils.fetch_all(_MISMATCH_SQL, dictionary=True)
+
+
+def repair_balances() -> bool:
+    """
+    Berechnet user_balances vollständig aus transactions neu.
+
+    Returns:
+        bool: True bei Erfolg, False bei Fehler.
+    """
+
+    try:
+        with db_utils.transaction() as cursor:
+            cursor.execute("DELETE FROM user_balances WHERE user_id NOT IN (SELECT DISTINCT user_id FROM transactions)")
+            cursor.execute(_REBUILD_BALANCES_SQL)
+    except Error as e:
+        logger.error("Fehler beim Neuaufbau der Kontostände: %s", e)
+        return False
+    _ledger_geaendert()
+    return True
+
+
+def main(argv=None) -> int:
+    """Kommandozeilen-Einstieg für Konsistenzprüfung und Reparatur der Kontostände."""
+
+    parser = argparse.ArgumentParser(description="Prüft bzw. repariert die Tabelle user_balances.")
+    parser.add_argument("aktion", choices=["check", "repair"], help="check: nur prüfen, repair: neu berechnen")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s", handlers=[logging.StreamHandler()])
+    db_utils.DatabaseConnectionPool.initialize_pool(config.db_config, config.db_pool_timeout)
+
+    if args.aktion == "repair":
+        if not repair_balances():
+            return 1
+        logger.info("Kontostände wurden aus den Buchungen neu berechnet.")
+
+    abweichungen = check_balances()
+    for row in abweichungen:
+        logger.warning(
+            "Abweichung bei %s %s (ID %s): gespeichert %s, berechnet %s",
+            row["vorname"],
+            row["nachname"],
+            row["user_id"],
+            row["gespeichert"],
+            row["berechnet"],
+        )
+    if abweichungen:
+        logger.error("%s Kontostände weichen von der Summe der Buchungen ab.", len(abweichungen))
+        return 1
+    logger.info("Alle Kontostände stimmen mit der Summe der Buchungen überein.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
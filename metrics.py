@@ -0,0 +1,251 @@
+"""
+Laufzeit-Metriken im Prometheus-Textformat.
+
+Die Metriken werden von API und GUI unter ``/metrics`` ausgeliefert. Läuft die Anwendung unter
+Gunicorn mit mehreren Workern, schreibt jeder Worker seine Werte in das Verzeichnis
+``PROMETHEUS_MULTIPROC_DIR`` (siehe gunicorn_config.py); beim Abruf werden die Werte aller
+Worker zusammengefasst, egal welcher Worker die Anfrage beantwortet.
+"""
+
+import contextlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter as Zaehler
+from collections.abc import Callable
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Wartezeiten beim Ausleihen einer Verbindung: von "sofort frei" bis an das Pool-Timeout heran
+_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_QUERIES_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "fvh_db_pool_checkout_seconds",
+    "Wartezeit beim Ausleihen einer Verbindung aus dem Datenbankpool.",
+    buckets=_CHECKOUT_BUCKETS,
+)
+DB_POOL_IN_USE = Gauge(
+    "fvh_db_pool_connections_in_use",
+    "Aktuell ausgeliehene Verbindungen des Datenbankpools.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_IDLE = Gauge(
+    "fvh_db_pool_connections_idle",
+    "Aktuell freie Verbindungen des Datenbankpools.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITS = Counter(
+    "fvh_db_pool_waits_total",
+    "Ausleihvorgänge, bei denen der Pool erschöpft war und gewartet werden musste.",
+)
+DB_POOL_TIMEOUTS = Counter(
+    "fvh_db_pool_timeouts_total",
+    "Ausleihvorgänge, die nach Ablauf von MYSQL_POOL_TIMEOUT ohne Verbindung abgebrochen wurden.",
+)
+DB_QUERY_SECONDS = Histogram(
+    "fvh_db_query_duration_seconds",
+    "Dauer von Datenbankoperationen inklusive Ausleihen der Verbindung.",
+    ["operation"],
+    buckets=_QUERY_BUCKETS,
+)
+
+HTTP_REQUESTS = Counter(
+    "fvh_http_requests_total",
+    "Beantwortete HTTP-Anfragen.",
+    ["endpoint", "method", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "fvh_http_request_duration_seconds",
+    "Bearbeitungsdauer von HTTP-Anfragen bis zur fertigen Response (ohne Streaming des Bodys).",
+    ["endpoint", "method"],
+    buckets=_REQUEST_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "fvh_http_request_db_queries",
+    "Anzahl der Datenbankoperationen pro HTTP-Anfrage.",
+    ["endpoint"],
+    buckets=_QUERIES_PER_REQUEST_BUCKETS,
+)
+
+
+class _ScrapeCollector:
+    """Fragt beim Abruf von ``/metrics`` registrierte Werte ab (z.B. die Länge der E-Mail-Warteschlange)."""
+
+    def __init__(self):
+        self._gauges: list[tuple[str, str, str, Callable[[], dict[str, float]]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, beschreibung: str, label: str, callback: Callable[[], dict[str, float]]):
+        with self._lock:
+            self._gauges.append((name, beschreibung, label, callback))
+
+    def collect(self):
+        with self._lock:
+            gauges = list(self._gauges)
+        for name, beschreibung, label, callback in gauges:
+            familie = GaugeMetricFamily(name, beschreibung, labels=[label])
+            try:
+                werte = callback()
+            except Exception as e:  # pylint: disable=W0718
+                logger.warning("Metrik %s konnte nicht ermittelt werden: %s", name, e)
+                continue
+            for label_wert, wert in werte.items():
+                familie.add_metric([str(label_wert)], wert)
+            yield familie
+
+
+_scrape_collector = _ScrapeCollector()
+_scrape_registry = CollectorRegistry(auto_describe=False)
+_scrape_registry.register(_scrape_collector)
+
+
+def register_scrape_gauge(name: str, beschreibung: str, label: str, callback: Callable[[], dict[str, float]]):
+    """
+    Registriert einen Messwert, der erst beim Abruf von ``/metrics`` ermittelt wird.
+
+    Geeignet für Werte, die aus der Datenbank gelesen werden und für alle Worker gleich sind.
+
+    Args:
+        name (str): Name der Metrik.
+        beschreibung (str): Hilfetext.
+        label (str): Name des Labels.
+        callback (Callable): Liefert Label-Wert -> Messwert.
+    """
+
+    _scrape_collector.add(name, beschreibung, label, callback)
+
+
+@contextlib.contextmanager
+def db_operation(operation: str, query: str | None = None, params=None):
+    """
+    Misst eine Datenbankoperation und zählt sie der laufenden HTTP-Anfrage zu.
+
+    Ist die Abfrage-Protokollierung aktiv (``DB_QUERY_DEBUG`` oder Debug-Modus), wird das
+    Statement zusätzlich in ``flask.g`` gesammelt und am Ende der Anfrage zusammengefasst.
+
+    Args:
+        operation (str): Art der Operation (z.B. 'fetch_one').
+        query (str, optional): Das SQL-Statement.
+        params (optional): Die Parameter des Statements (werden nicht geloggt).
+    """
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        dauer = time.perf_counter() - start
+        DB_QUERY_SECONDS.labels(operation).observe(dauer)
+        if has_request_context():
+            g.metrics_db_queries = g.get("metrics_db_queries", 0) + 1
+            g.metrics_db_seconds = g.get("metrics_db_seconds", 0.0) + dauer
+            query_log = g.get("metrics_query_log")
+            if query_log is not None:
+                query_log.append((query or f"<{operation}>", repr(params), dauer))
+
+
+def _normalisieren(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def _query_log_zusammenfassen(query_log: list[tuple[str, str, float]]):
+    """Loggt Anzahl und Dauer aller Abfragen der Anfrage und warnt vor Duplikaten und N+1-Mustern."""
+
+    endpunkt = f"{request.method} {request.path}"
+    gesamt_ms = sum(dauer for _, _, dauer in query_log) * 1000
+    logger.info("%s: %s Datenbankabfragen in %.1f ms.", endpunkt, len(query_log), gesamt_ms)
+
+    formen = Zaehler(_normalisieren(query) for query, _, _ in query_log)
+    identisch = Zaehler((_normalisieren(query), params) for query, params, _ in query_log)
+    schwelle = config.query_debug_config["repeat_threshold"]
+
+    for (query, _), anzahl in identisch.items():
+        if anzahl > 1:
+            logger.warning("%s: identische Abfrage %sx ausgeführt: %s", endpunkt, anzahl, query)
+    for query, anzahl in formen.items():
+        if anzahl >= schwelle:
+            logger.warning("%s: Abfrage %sx ausgeführt (N+1?): %s", endpunkt, anzahl, query)
+
+
+def _request_start():
+    g.metrics_start = time.perf_counter()
+    g.metrics_db_queries = 0
+    g.metrics_db_seconds = 0.0
+    if config.query_debug_config["enabled"] or current_app.debug:
+        g.metrics_query_log = []
+
+
+def _request_ende(response: Response) -> Response:
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    dauer = time.perf_counter() - start
+    anzahl = g.get("metrics_db_queries", 0)
+    endpoint = request.endpoint or "unbekannt"
+    HTTP_REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    HTTP_REQUEST_SECONDS.labels(endpoint, request.method).observe(dauer)
+    HTTP_REQUEST_DB_QUERIES.labels(endpoint).observe(anzahl)
+
+    query_log = g.pop("metrics_query_log", None)
+    if query_log:
+        _query_log_zusammenfassen(query_log)
+    if config.query_debug_config["server_timing"]:
+        db_ms = g.get("metrics_db_seconds", 0.0) * 1000
+        response.headers.add(
+            "Server-Timing", f'db;dur={db_ms:.1f};desc="{anzahl} Abfragen", app;dur={dauer * 1000:.1f}'
+        )
+    return response
+
+
+def init_app(app: Flask):
+    """
+    Erfasst Anzahl, Status und Dauer aller Anfragen der Flask-App je Endpunkt.
+
+    Args:
+        app (Flask): Die zu instrumentierende Anwendung.
+    """
+
+    app.before_request(_request_start)
+    app.after_request(_request_ende)
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Erzeugt die Ausgabe aller Metriken.
+
+    Returns:
+        tuple[bytes, str]: Die Metriken im Textformat und der zugehörige Content-Type.
+    """
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_scrape_registry), CONTENT_TYPE_LATEST
+
+
+def metrics_response() -> Response:
+    """Liefert die Metriken als Flask-Response für den Endpunkt ``/metrics``."""
+
+    daten, content_type = render()
+    return Response(daten, content_type=content_type)
@@ -0,0 +1,207 @@
+"""
+Versionierte Datenbank-Migrationen.
+
+Die SQL-Skripte in ``migrations/`` (``NNNN_beschreibung.sql``) werden in der Reihenfolge ihrer
+Nummer eingespielt. Bereits angewendete Versionen stehen in der Tabelle ``schema_version``.
+Die Migrationen laufen beim Start von API und GUI (abschaltbar über ``DB_AUTO_MIGRATE``)
+oder manuell:
+
+    python3 migrate.py status
+    python3 migrate.py apply
+"""
+
+import argparse
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+from mysql.connector import Error, errorcode
+
+import config
+import db_utils
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+_DATEINAME_RE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+_LOCK_NAME = "fvh_schema_migration"
+_LOCK_TIMEOUT = 60
+
+# Fehler, die bedeuten, dass die Änderung bereits (z.B. manuell) eingespielt wurde
+_BEREITS_VORHANDEN = {
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_DUP_FIELDNAME,
+    # DROP KEY/COLUMN auf etwas, das nicht (mehr) existiert
+    errorcode.ER_CANT_DROP_FIELD_OR_KEY,
+}
+
+_SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+      version int NOT NULL,
+      name varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+      applied_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (version)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+class Migration(NamedTuple):
+    """Eine Migrationsdatei."""
+
+    version: int
+    name: str
+    pfad: Path
+
+
+def discover(verzeichnis: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """
+    Findet alle Migrationsdateien, sortiert nach Version.
+
+    Raises:
+        ValueError: Wenn eine Versionsnummer doppelt vergeben ist.
+    """
+
+    migrationen: dict[int, Migration] = {}
+    for pfad in sorted(verzeichnis.glob("*.sql")):
+        treffer = _DATEINAME_RE.match(pfad.name)
+        if not treffer:
+            logger.warning("Ignoriere Datei mit ungültigem Namen in %s: %s", verzeichnis, pfad.name)
+            continue
+        version = int(treffer.group(1))
+        if version in migrationen:
+            raise ValueError(f"Migrationsversion {version} ist doppelt vergeben ({pfad.name}).")
+        migrationen[version] = Migration(version, treffer.group(2), pfad)
+    return [migrationen[version] for version in sorted(migrationen)]
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Zerlegt ein SQL-Skript in einzelne Statements.
+
+    Zeilenkommentare (``--``) werden entfernt; Statements enden mit ``;`` am Zeilenende.
+    """
+
+    statements, aktuell = [], []
+    for zeile in sql.splitlines():
+        if zeile.strip().startswith("--"):
+            continue
+        aktuell.append(zeile)
+        if zeile.rstrip().endswith(";"):
+            statement = "\n".join(aktuell).strip().rstrip(";").strip()
+            if statement:
+                statements.append(statement)
+            aktuell = []
+    rest = "\n".join(aktuell).strip()
+    if rest:
+        statements.append(rest)
+    return statements
+
+
+def _applied_versions(cursor) -> set[int]:
+    cursor.execute(_SCHEMA_VERSION_SQL)
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _apply_one(cnx, cursor, migration: Migration):
+    logger.info("Spiele Migration %04d_%s ein.", migration.version, migration.name)
+    for statement in split_statements(migration.pfad.read_text(encoding="utf-8")):
+        try:
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
+        except Error as e:
+            if e.errno in _BEREITS_VORHANDEN:
+                logger.warning(
+                    "Migration %04d: Änderung bereits vorhanden, übersprungen (%s).", migration.version, e.msg
+                )
+                continue
+            raise
+    cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (migration.version, migration.name))
+    cnx.commit()
+
+
+def status() -> list[tuple[Migration, bool]]:
+    """
+    Liefert alle Migrationen mit der Information, ob sie bereits angewendet wurden.
+
+    Raises:
+        mysql.connector.Error: Bei Datenbankfehlern.
+    """
+
+    with db_utils.DatabaseConnectionPool.connection_manager() as cnx:
+        if not cnx:
+            raise Error(msg="Keine Datenbankverbindung aus dem Pool verfügbar.")
+        with cnx.cursor() as cursor:
+            angewendet = _applied_versions(cursor)
+        cnx.commit()
+    return [(migration, migration.version in angewendet) for migration in discover()]
+
+
+def apply_pending() -> list[Migration]:
+    """
+    Spielt alle noch nicht angewendeten Migrationen der Reihe nach ein.
+
+    Ein Datenbank-Lock (GET_LOCK) verhindert, dass API und GUI gleichzeitig migrieren.
+    DDL-Statements werden von MySQL sofort committet; schlägt eine Migration fehl, wird
+    abgebrochen und die Version nicht eingetragen.
+
+    Returns:
+        list[Migration]: Die eingespielten Migrationen.
+
+    Raises:
+        mysql.connector.Error: Wenn eine Migration fehlschlägt oder der Lock nicht erlangt wird.
+    """
+
+    eingespielt = []
+    with db_utils.DatabaseConnectionPool.connection_manager() as cnx:
+        if not cnx:
+            raise Error(msg="Keine Datenbankverbindung aus dem Pool verfügbar.")
+        with cnx.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, _LOCK_TIMEOUT))
+            if cursor.fetchone()[0] != 1:
+                raise Error(msg="Lock für Datenbank-Migrationen konnte nicht erlangt werden.")
+            try:
+                angewendet = _applied_versions(cursor)
+                for migration in discover():
+                    if migration.version in angewendet:
+                        continue
+                    _apply_one(cnx, cursor, migration)
+                    eingespielt.append(migration)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+                cursor.fetchall()
+    if eingespielt:
+        logger.info("%s Datenbank-Migration(en) eingespielt.", len(eingespielt))
+    else:
+        logger.debug("Datenbankschema ist aktuell.")
+    return eingespielt
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Kommandozeilen-Einstieg: ``status`` oder ``apply``."""
+
+    parser = argparse.ArgumentParser(description="Datenbank-Migrationen anzeigen oder einspielen.")
+    parser.add_argument("befehl", choices=["status", "apply"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    db_utils.DatabaseConnectionPool.initialize_pool(config.db_config, config.db_pool_timeout)
+
+    try:
+        if args.befehl == "status":
+            for migration, angewendet in status():
+                print(f"{migration.version:04d}_{migration.name}: {'angewendet' if angewendet else 'ausstehend'}")
+        else:
+            apply_pending()
+    except (Error, ValueError) as e:
+        logger.error("Migration fehlgeschlagen: %s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+-- Materialisierte Kontostände pro Benutzer.
+-- Wird bei jeder Buchung in derselben Transaktion wie das INSERT in transactions aktualisiert.
+
+CREATE TABLE IF NOT EXISTS user_balances (
+  user_id int NOT NULL,
+  saldo int NOT NULL DEFAULT '0',
+  updated_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id),
+  CONSTRAINT user_balances_ibfk_1 FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill aus den vorhandenen Buchungen
+INSERT INTO user_balances (user_id, saldo)
+SELECT src.user_id, src.summe FROM (
+  SELECT user_id, COALESCE(SUM(saldo_aenderung), 0) AS summe FROM transactions GROUP BY user_id
+) AS src
+ON DUPLICATE KEY UPDATE saldo = src.summe;
@@ -0,0 +1,8 @@
+-- Versionszähler zur Invalidierung der prozesslokalen Caches von API und GUI.
+-- Ein Prozess, der gecachte Daten ändert, erhöht die Version; alle anderen verwerfen daraufhin ihre Einträge.
+
+CREATE TABLE IF NOT EXISTS cache_epochs (
+  name varchar(50) COLLATE utf8mb4_unicode_ci NOT NULL,
+  version bigint NOT NULL DEFAULT '0',
+  PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
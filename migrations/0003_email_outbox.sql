@@ -0,0 +1,21 @@
+-- Persistente Warteschlange für ausgehende E-Mails.
+-- API und GUI legen E-Mails hier ab, der Outbox-Worker (email_outbox.py) versendet sie.
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id bigint NOT NULL AUTO_INCREMENT,
+  empfaenger varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  betreff varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  template_html varchar(100) COLLATE utf8mb4_unicode_ci NOT NULL,
+  template_text varchar(100) COLLATE utf8mb4_unicode_ci NOT NULL,
+  context mediumtext COLLATE utf8mb4_unicode_ci NOT NULL,
+  logo_pfad varchar(255) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  status enum('pending','sending','sent','failed') COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT 'pending',
+  versuche int NOT NULL DEFAULT '0',
+  naechster_versuch datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  gesperrt_bis datetime DEFAULT NULL,
+  letzter_fehler varchar(1000) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  erstellt_am datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  gesendet_am datetime DEFAULT NULL,
+  PRIMARY KEY (id),
+  KEY idx_email_outbox_faellig (status, naechster_versuch)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,3 @@
+-- Index für die Keyset-Pagination von GET /transaktionen (ORDER BY timestamp DESC, id DESC).
+
+CREATE INDEX idx_transactions_timestamp_id ON transactions (timestamp, id);
@@ -0,0 +1,10 @@
+-- Abdeckender Index für die Abfragen pro Benutzer (Buchungsliste sortiert nach timestamp, Summen
+-- über saldo_aenderung). Ersetzt den bisherigen Index user_id, der ein Präfix davon ist; der
+-- Fremdschlüssel transactions_ibfk_1 nutzt danach den neuen Index.
+-- Zwei Statements: existiert der neue Index bereits, wird nur das erste übersprungen.
+
+ALTER TABLE transactions
+  ADD KEY idx_transactions_user_ts_saldo (user_id, timestamp, saldo_aenderung);
+
+ALTER TABLE transactions
+  DROP KEY user_id;
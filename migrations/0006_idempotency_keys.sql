@@ -0,0 +1,13 @@
+-- Idempotenz-Schlüssel der Terminals (siehe idempotency.py).
+-- Gespeichert wird die Antwort der ersten Ausführung; Wiederholungen mit demselben Schlüssel
+-- liefern sie erneut, ohne noch einmal zu buchen.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  api_user_id int NOT NULL,
+  schluessel varchar(128) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  status_code smallint NOT NULL,
+  antwort text COLLATE utf8mb4_unicode_ci NOT NULL,
+  erstellt_am datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (api_user_id, schluessel),
+  KEY idx_idempotency_keys_erstellt_am (erstellt_am)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
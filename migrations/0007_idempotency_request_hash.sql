@@ -0,0 +1,5 @@
+-- Bindet Idempotenz-Schlüssel an ihre Anfrage (siehe idempotency.request_hash).
+-- Ältere Einträge ohne Hash werden weiterhin ohne Prüfung wiederholt.
+
+ALTER TABLE idempotency_keys
+  ADD COLUMN anfrage_hash char(64) CHARACTER SET ascii COLLATE ascii_bin DEFAULT NULL AFTER schluessel;
@@ -0,0 +1,6 @@
+-- Entfernt den Index user_id, falls Migration 0005 ihn nicht gelöscht hat: In der ersten
+-- Fassung standen ADD KEY und DROP KEY in einem Statement, das komplett übersprungen wurde,
+-- wenn idx_transactions_user_ts_saldo schon vorhanden war.
+
+ALTER TABLE transactions
+  DROP KEY user_id;
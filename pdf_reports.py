@@ -0,0 +1,263 @@
+"""
+PDF-Erzeugung der GUI: Transaktionsbericht und gemeinsame Vorlage mit Schriftarten und Logo.
+
+Welche Schriftarten vorhanden sind und das Logo werden einmal pro Prozess ermittelt bzw. geladen.
+Die Schriftarten selbst bindet jedes PDF über ``FPDF.add_font`` ein (siehe ``new_pdf``), weil fpdf2
+sie beim Speichern auf die benutzten Zeichen verkleinert und dafür eigene Objekte je PDF braucht.
+
+Fertige Transaktionsberichte werden prozesslokal gecacht. Der Schlüssel enthält den Stand der
+Buchungen des Benutzers (``ledger.get_user_version``), sodass ein Bericht nach jeder Buchung neu
+erzeugt wird. Der Cache ist auf ``PDF_CACHE_MB`` begrenzt; ältere Berichte werden verdrängt.
+"""
+
+import functools
+import io
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from fpdf import FPDF
+
+import cache
+import config
+
+logger = logging.getLogger(__name__)
+
+SCHRIFTARTEN = {
+    "": "static/fonts/DejaVuSans.ttf",
+    "B": "static/fonts/DejaVuSans-Bold.ttf",
+    "I": "static/fonts/DejaVuSans-Oblique.ttf",
+}
+LOGO_PFAD = "static/logo/logo-120x164.png"
+
+_berichte = cache.TTLCache(config.cache_config["maxsize"], float("inf"), config.pdf_config["cache_mb"] * 1024 * 1024)
+
+
+class _Vorlage(NamedTuple):
+    schriften: dict  # style -> Pfad der TTF-Datei
+    font_name: str
+    logo: bytes | None
+
+
+@dataclass(frozen=True)
+class ReportOptions:
+    """
+    Auswahl der Buchungen für einen Transaktionsbericht.
+
+    Attributes:
+        von: Erster Tag (einschließlich) oder None.
+        bis: Letzter Tag (einschließlich) oder None.
+        limit: Buchungen pro Bericht oder None für alle.
+        seite: Seite (ab 1), nur mit ``limit``.
+    """
+
+    von: date | None = None
+    bis: date | None = None
+    limit: int | None = None
+    seite: int = 1
+
+    @property
+    def offset(self) -> int:
+        """Anzahl der übersprungenen (neueren) Buchungen."""
+        return (self.seite - 1) * self.limit if self.limit else 0
+
+
+@functools.lru_cache(maxsize=1)
+def _vorlage() -> _Vorlage:
+    """Prüft die Schriftarten und lädt das Logo einmal pro Prozess."""
+
+    schriften = {}
+    if all(os.path.exists(pfad) for pfad in SCHRIFTARTEN.values()):
+        schriften = dict(SCHRIFTARTEN)
+        font_name = "DejaVu"
+    else:
+        logger.warning("DejaVu-Schriftarten nicht gefunden, PDFs verwenden Helvetica.")
+        font_name = "Helvetica"
+
+    logo = Path(LOGO_PFAD).read_bytes() if os.path.exists(LOGO_PFAD) else None
+    return _Vorlage(schriften, font_name, logo)
+
+
+def preload():
+    """Prüft Schriftarten und lädt das Logo vorab (beim Start der GUI)."""
+
+    _vorlage()
+
+
+def new_pdf() -> tuple[FPDF, str]:
+    """
+    Liefert ein leeres PDF (A4, mm) mit eingebundenen Schriftarten.
+
+    Returns:
+        tuple[FPDF, str]: Das PDF und der Name der Schriftart ('DejaVu' oder 'Helvetica').
+    """
+
+    vorlage = _vorlage()
+    pdf = FPDF()
+    for style, pfad in vorlage.schriften.items():
+        pdf.add_font(vorlage.font_name, style=style, fname=pfad)
+    return pdf, vorlage.font_name
+
+
+def unicode_text(text: str, font_name: str) -> str:
+    """Ersetzt Zeichen, die die Fallback-Schriftart Helvetica (latin-1) nicht darstellen kann."""
+
+    if font_name == "DejaVu":
+        return text
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def cached_report(schluessel: tuple) -> bytes | None:
+    """Liefert einen gecachten Bericht oder None."""
+
+    pdf_bytes = _berichte.get(schluessel)
+    return None if pdf_bytes is cache.MISSING else pdf_bytes
+
+
+def remember_report(schluessel: tuple, pdf_bytes: bytes):
+    """Legt einen Bericht im Cache ab (Berichte über ``PDF_CACHE_MB`` werden nicht gecacht)."""
+
+    _berichte.set(schluessel, pdf_bytes)
+
+
+def _betrag(saldo_aenderung, font_name: str) -> str:
+    sign = "+" if saldo_aenderung > 0 else ""
+    einheit = "€" if font_name == "DejaVu" else "EUR"
+    return f"{sign}{saldo_aenderung:.2f} {einheit}"
+
+
+def _zeitraum(optionen: ReportOptions) -> str | None:
+    if not optionen.von and not optionen.bis:
+        return None
+    von = optionen.von.strftime("%d.%m.%Y") if optionen.von else "Beginn"
+    bis = optionen.bis.strftime("%d.%m.%Y") if optionen.bis else "heute"
+    return f"{von} bis {bis}"
+
+
+def transaction_report(
+    user: dict,
+    transactions: list[dict],
+    saldo,
+    optionen: ReportOptions,
+    weitere: bool,
+    *,
+    stand: datetime | None = None,
+) -> bytes:
+    """
+    Erzeugt den Transaktionsbericht eines Benutzers.
+
+    Args:
+        user (dict): Der Benutzer (vorname, nachname, code).
+        transactions (list[dict]): Die Buchungen des Berichts, neueste zuerst.
+        saldo: Der aktuelle Kontostand.
+        optionen (ReportOptions): Zeitraum und Seite des Berichts.
+        weitere (bool): True, wenn es auf der nächsten Seite weitere Buchungen gibt.
+        stand (datetime, optional): Zeitpunkt der jüngsten Buchung des Benutzers. Er ist Teil des
+            Cache-Schlüssels; ein Erstellungszeitpunkt wäre im gecachten PDF veraltet.
+
+    Returns:
+        bytes: Das PDF.
+    """
+
+    pdf, font_name = new_pdf()
+    pdf.add_page()
+    pdf.set_font(font_name, size=10)
+
+    # --- HEADER ---
+    logo = _vorlage().logo
+    if logo:
+        pdf.image(io.BytesIO(logo), x=176, y=8, w=14)
+
+    app_name = unicode_text(config.app_name or "Feuerwehr-Versorgungs-Helfer", font_name)
+    app_slogan = unicode_text(config.app_slogan or "", font_name)
+
+    pdf.set_font(font_name, style="B", size=16)
+    pdf.cell(100, 10, app_name, new_x="LMARGIN", new_y="NEXT")
+    if app_slogan:
+        pdf.set_font(font_name, style="I", size=9)
+        pdf.cell(100, 5, app_slogan, new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(8)
+
+    # Trennlinie
+    pdf.set_draw_color(220, 220, 220)
+    pdf.line(10, 31, 200, 31)
+    pdf.ln(5)
+
+    # --- INFOS ---
+    pdf.set_font(font_name, style="B", size=12)
+    pdf.cell(100, 8, "Transaktionsbericht", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font(font_name, size=10)
+    user_name = unicode_text(f"{user['vorname']} {user['nachname']}", font_name)
+    pdf.cell(100, 6, f"Benutzer: {user_name}", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(100, 6, f"Benutzer-Code: {user['code']}", new_x="LMARGIN", new_y="NEXT")
+    if stand is not None:
+        pdf.cell(100, 6, f"Stand: {stand.strftime('%d.%m.%Y um %H:%M Uhr')}", new_x="LMARGIN", new_y="NEXT")
+    zeitraum = _zeitraum(optionen)
+    if zeitraum:
+        pdf.cell(100, 6, f"Zeitraum: {zeitraum}", new_x="LMARGIN", new_y="NEXT")
+    if optionen.limit:
+        pdf.cell(100, 6, f"Seite {optionen.seite} ({optionen.limit} Buchungen je Seite)", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+
+    # --- SALDO ANZEIGE ---
+    pdf.set_fill_color(245, 247, 250)
+    pdf.set_draw_color(226, 232, 240)
+    pdf.rect(10, pdf.get_y(), 190, 12, style="DF")
+    pdf.set_font(font_name, style="B", size=11)
+    pdf.set_y(pdf.get_y() + 2)
+    pdf.cell(10, 8, "")  # Spacer
+    pdf.cell(100, 8, "Aktueller Kontostand (Saldo):")
+    pdf.set_x(150)
+    saldo_unit = "€" if font_name == "DejaVu" else "EUR"
+    pdf.cell(40, 8, f"{saldo:.2f} {saldo_unit}", align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font(font_name, size=10)
+    pdf.ln(6)
+
+    # --- TABELLE ---
+    col_widths = [105, 35, 50]  # Summe 190
+    pdf.set_fill_color(220, 38, 38)  # Rote Kopfzeile
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font(font_name, style="B", size=10)
+    pdf.cell(col_widths[0], 8, " Beschreibung", border=1, fill=True)
+    pdf.cell(col_widths[1], 8, "Betrag ", border=1, fill=True, align="R")
+    pdf.cell(col_widths[2], 8, "Zeitpunkt ", border=1, fill=True, align="R")
+    pdf.ln()
+
+    # Tabelleneinträge
+    pdf.set_text_color(15, 23, 42)
+    pdf.set_font(font_name, size=9)
+    fill_row = False
+
+    for t in transactions:
+        if fill_row:
+            pdf.set_fill_color(248, 250, 252)
+        else:
+            pdf.set_fill_color(255, 255, 255)
+
+        beschreibung = unicode_text(t.get("beschreibung", "") or "", font_name)
+        if len(beschreibung) > 55:
+            beschreibung = beschreibung[:52] + "..."
+
+        timestamp = t.get("timestamp")
+        if timestamp and hasattr(timestamp, "strftime"):
+            timestamp_str = timestamp.strftime("%d.%m.%Y %H:%M")
+        else:
+            timestamp_str = str(timestamp or "")
+
+        pdf.cell(col_widths[0], 8, f" {beschreibung}", border=1, fill=True)
+        pdf.cell(
+            col_widths[1], 8, f"{_betrag(t.get('saldo_aenderung', 0.0), font_name)} ", border=1, fill=True, align="R"
+        )
+        pdf.cell(col_widths[2], 8, f"{timestamp_str} ", border=1, fill=True, align="R")
+        pdf.ln()
+        fill_row = not fill_row
+
+    if weitere:
+        pdf.ln(4)
+        pdf.set_font(font_name, style="I", size=9)
+        pdf.cell(190, 6, f"Ältere Buchungen folgen auf Seite {optionen.seite + 1}.", new_x="LMARGIN", new_y="NEXT")
+
+    return bytes(pdf.output())
@@ -0,0 +1,134 @@
+"""
+Gemeinsamer Prozess-Pool für rechenintensive Arbeit der GUI (PDFs, QR-Codes, Passwort-Hashes).
+
+gunicorn betreibt die GUI mit gevent-Workern. Reine Rechenarbeit im Worker blockiert dessen
+Event-Loop und damit alle anderen Requests des Workers. ``run`` und ``run_all`` geben die Arbeit
+deshalb an einen ``ProcessPoolExecutor`` mit ``PROCESS_POOL_WORKERS`` Prozessen ab, der beim
+ersten Bedarf gestartet wird. Unter gevent (``monkey.patch_all`` im gunicorn-Worker) wartet der
+Request kooperativ auf das Ergebnis, andere Greenlets laufen in der Zwischenzeit weiter.
+
+Lange Aufgaben (``run(..., lang=True)``, z.B. PDFs) belegen höchstens ``workers - 1`` Prozesse,
+damit kurze Aufgaben wie eine Passwortprüfung beim Login nicht hinter ihnen warten.
+
+Ist der Pool abgeschaltet (``PROCESS_POOL_WORKERS=0``) oder nicht nutzbar, wird im aufrufenden
+Prozess gerechnet. Funktionen und Argumente müssen sich pickeln lassen, die Funktion muss also
+auf Modulebene definiert sein.
+"""
+
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_pool: dict = {"executor": None, "lang": None}
+_pool_lock = threading.Lock()
+
+# Fehler beim Starten des Pools oder beim Übergeben einer Aufgabe (z.B. keine Prozesse startbar,
+# Pool bereits beendet). Ausnahmen der Aufgabe selbst gehören nicht dazu und werden weitergereicht;
+# danach zählt nur noch BrokenProcessPool (ein Prozess ist abgestürzt) als Fehler des Pools.
+_START_FEHLER = (RuntimeError, OSError)
+
+
+def _executor() -> ProcessPoolExecutor | None:
+    """Startet den Prozess-Pool beim ersten Bedarf (je Worker-Prozess einmal)."""
+
+    anzahl = config.process_pool_config["workers"]
+    if anzahl < 1:
+        return None
+    with _pool_lock:
+        if _pool["executor"] is None:
+            # "spawn" statt fork: die Prozesse erben so weder gevent noch offene Datenbankverbindungen
+            _pool["executor"] = ProcessPoolExecutor(max_workers=anzahl, mp_context=multiprocessing.get_context("spawn"))
+            # erst hier angelegt, damit es im gunicorn-Worker nach monkey.patch_all ein gevent-Semaphor ist
+            _pool["lang"] = threading.BoundedSemaphore(max(1, anzahl - 1))
+            logger.info("Prozess-Pool mit %s Prozessen gestartet.", anzahl)
+        return _pool["executor"]
+
+
+def _verwerfen(fehler: Exception):
+    logger.warning("Prozess-Pool nicht nutzbar, rechne im Worker: %s", fehler)
+    with _pool_lock:
+        executor, _pool["executor"] = _pool["executor"], None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run(funktion: Callable, *args, lang: bool = False):
+    """
+    Führt ``funktion(*args)`` im Prozess-Pool aus und wartet auf das Ergebnis.
+
+    Args:
+        funktion (Callable): Eine Funktion auf Modulebene.
+        *args: Ihre Argumente.
+        lang (bool, optional): True für lange Aufgaben, die einen Prozess für kurze freilassen.
+
+    Returns:
+        Das Ergebnis der Funktion. Ausnahmen der Funktion werden unverändert weitergereicht.
+    """
+
+    try:
+        executor = _executor()
+    except _START_FEHLER as e:
+        _verwerfen(e)
+        executor = None
+    if executor is not None:
+        with _pool["lang"] if lang else nullcontext():
+            try:
+                future = executor.submit(funktion, *args)
+            except _START_FEHLER as e:
+                _verwerfen(e)
+            else:
+                try:
+                    return future.result()
+                except BrokenProcessPool as e:
+                    _verwerfen(e)
+    return funktion(*args)
+
+
+def run_all(funktion: Callable, argumente: Iterable[tuple], chunksize: int = 1) -> list:
+    """
+    Führt ``funktion`` für alle Argument-Tupel im Prozess-Pool aus (alle Prozesse, ohne Reserve).
+
+    Args:
+        funktion (Callable): Eine Funktion auf Modulebene.
+        argumente (Iterable[tuple]): Je Aufruf ein Tupel mit Argumenten.
+        chunksize (int, optional): So viele Aufrufe werden zusammen an einen Prozess übergeben.
+
+    Returns:
+        list: Die Ergebnisse in der Reihenfolge der Argumente.
+    """
+
+    argumente = list(argumente)
+    try:
+        executor = _executor() if argumente else None
+    except _START_FEHLER as e:
+        _verwerfen(e)
+        executor = None
+    if executor is not None:
+        try:
+            # map übergibt alle Aufgaben sofort, Ausnahmen der Aufgaben kommen erst beim Lesen
+            ergebnisse = executor.map(funktion, *zip(*argumente, strict=True), chunksize=chunksize)
+        except _START_FEHLER as e:
+            _verwerfen(e)
+        else:
+            try:
+                return list(ergebnisse)
+            except BrokenProcessPool as e:
+                _verwerfen(e)
+    return [funktion(*eintrag) for eintrag in argumente]
+
+
+def shutdown():
+    """Beendet den Pool dieses Prozesses (er wird beim nächsten Bedarf neu gestartet)."""
+
+    with _pool_lock:
+        executor, _pool["executor"] = _pool["executor"], None
+    if executor is not None:
+        executor.shutdown(wait=True)
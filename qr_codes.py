@@ -0,0 +1,313 @@
+"""
+Erzeugung der QR-Codes für Benutzer (Buchen/Kontostand) als PNG.
+
+Ein QR-Code hängt nur von den codierten Daten und dem Infotext ab. Die fertigen PNG-Bytes werden
+deshalb prozesslokal in einem LRU-Cache gehalten und optional zusätzlich in ``QR_CACHE_DIR``
+abgelegt, damit auch neu gestartete Worker nicht erneut rendern müssen. Das Verzeichnis enthält
+höchstens ``QR_CACHE_MAX_FILES`` Dateien, die ältesten werden beim Schreiben gelöscht. Die
+Schriftart wird einmal pro Prozess gesucht und geladen.
+
+Ändert sich das Aussehen der QR-Codes, muss ``STYLE_VERSION`` erhöht werden: Sie ist Teil des
+Cache-Schlüssels, des ETags und der URL in den Templates.
+"""
+
+import functools
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from contextlib import suppress
+
+import qrcode
+import qrcode.constants
+from PIL import Image, ImageDraw, ImageFont
+from qrcode.image.pil import PilImage
+
+import cache
+import config
+
+logger = logging.getLogger(__name__)
+
+STYLE_VERSION = 2
+
+AKTIONEN = {
+    "a": "Transaktion buchen",
+    "k": "Kontostand",
+}
+
+SCHRIFTGROESSE = 22
+_SCHRIFTARTEN = ["Hack-Bold.ttf", "DejaVuSans-Bold.ttf", "NotoSans-Bold.ttf"]
+
+_png_cache = cache.TTLCache(config.qr_config["cache_size"], float("inf"))
+
+
+@functools.lru_cache(maxsize=1)
+def _schriftart() -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """Sucht die erste verfügbare bevorzugte Schriftart (einmal pro Prozess)."""
+
+    for font_name in _SCHRIFTARTEN:
+        try:
+            schriftart = ImageFont.truetype(font_name, SCHRIFTGROESSE)
+            logger.info("Schriftart '%s' geladen.", font_name)
+            return schriftart
+        except OSError:
+            logger.debug("Schriftart '%s' nicht gefunden.", font_name)
+
+    logger.error("Keine der bevorzugten Schriftarten gefunden. Lade Standardschriftart.")
+    return ImageFont.load_default(size=SCHRIFTGROESSE)
+
+
+def erzeuge_qr_code(daten, text):
+    """
+    Erzeugt einen QR-Code mit zusätzlichem Infotext als Bild.
+
+    Args:
+        daten (str): Die zu codierenden Daten, hier unser User-Code.
+        text (str): Wird als zusätzlicher Text unterhalb des QR-Codes hinzugefügt.
+
+    Returns:
+        Image: Bilddaten
+    """
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+
+    qr.add_data(daten)
+    qr.make(fit=True)
+
+    img = qr.make_image(image_factory=PilImage, fill_color="black", back_color="white").convert("L")
+
+    qr_breite, qr_hoehe = img.size
+    text_farbe = "black"
+    hintergrund_farbe = "white"
+    text_abstand_unten = 40
+    schriftart = _schriftart()
+
+    # getbbox() gibt (x1, y1, x2, y2) relativ zum Ankerpunkt (0,0)
+    # Standardanker für getbbox ist 'la' (left-ascent), d.h. (0,0) ist links auf der Grundlinie.
+    # text_box[1] ist der y-Wert des höchsten Pixels (negativ für Aufstrich).
+    # text_box[3] ist der y-Wert des tiefsten Pixels (positiv für Abstriche).
+    text_box = schriftart.getbbox(text)
+    text_breite_val = text_box[2] - text_box[0]
+    text_hoehe_val = text_box[3] - text_box[1]  # Gesamthöhe des Textes
+
+    tatsaechliche_gesamthoehe_textbereich = max(text_abstand_unten, text_hoehe_val)
+
+    # Berechne den Abstand über dem Text, um ihn im tatsaechliche_gesamthoehe_textbereich zu zentrieren.
+    # Wenn tatsaechliche_gesamthoehe_textbereich == text_hoehe_val, ist dieser Abstand 0.
+    abstand_ueber_text = (tatsaechliche_gesamthoehe_textbereich - text_hoehe_val) // 15
+
+    # Neue Gesamthöhe des Bildes
+    neue_bild_hoehe = qr_hoehe + tatsaechliche_gesamthoehe_textbereich
+
+    # Neues Bild erstellen
+    # Graustufen statt RGBA: gleiches Aussehen, halb so große PNGs, die fpdf2 deutlich schneller einbettet
+    neues_bild = Image.new("L", (qr_breite, neue_bild_hoehe), hintergrund_farbe)
+    neues_bild.paste(img, (0, 0))  # QR-Code auf das neue Bild kopieren
+
+    # Text auf das neue Bild zeichnen
+    zeichne_neu = ImageDraw.Draw(neues_bild)
+
+    text_x = (qr_breite - text_breite_val) // 2
+    # text_y ist die y-Koordinate für die Oberkante des Textes.
+    # Die text() Funktion von Pillow (ohne expliziten Anker) erwartet die obere linke Ecke.
+    text_y = qr_hoehe + abstand_ueber_text
+
+    zeichne_neu.text((text_x, text_y), text, fill=text_farbe, font=schriftart)
+
+    return neues_bild
+
+
+def etag(daten: str, text: str) -> str:
+    """
+    Liefert den ETag eines QR-Codes, ohne ihn zu rendern.
+
+    Args:
+        daten (str): Die codierten Daten.
+        text (str): Der Infotext.
+
+    Returns:
+        str: Hex-Hash über Daten, Text und ``STYLE_VERSION``.
+    """
+
+    return hashlib.sha256(f"{STYLE_VERSION}|{daten}|{text}".encode()).hexdigest()[:32]
+
+
+def _datei(schluessel: str) -> str | None:
+    verzeichnis = config.qr_config["cache_dir"]
+    return os.path.join(verzeichnis, f"{schluessel}.png") if verzeichnis else None
+
+
+def _von_platte_lesen(schluessel: str) -> bytes | None:
+    pfad = _datei(schluessel)
+    if not pfad:
+        return None
+    try:
+        with open(pfad, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning("QR-Code konnte nicht aus dem Cache-Verzeichnis gelesen werden: %s", e)
+        return None
+
+
+def _auf_platte_schreiben(schluessel: str, daten: bytes):
+    pfad = _datei(schluessel)
+    if not pfad:
+        return
+    # erst temporär schreiben und dann umbenennen, damit andere Worker nie eine halbe Datei lesen
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(pfad), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(daten)
+        os.replace(tmp, pfad)
+    except OSError as e:
+        logger.warning("QR-Code konnte nicht im Cache-Verzeichnis gespeichert werden: %s", e)
+        if tmp is not None:
+            with suppress(OSError):
+                os.unlink(tmp)
+        return
+    _verzeichnis_begrenzen(os.path.dirname(pfad))
+
+
+def _verzeichnis_begrenzen(verzeichnis: str):
+    """Löscht die ältesten PNGs, sobald das Cache-Verzeichnis mehr als ``QR_CACHE_MAX_FILES`` enthält."""
+
+    try:
+        with os.scandir(verzeichnis) as eintraege:
+            dateien = [e for e in eintraege if e.name.endswith(".png") and e.is_file()]
+        ueberzaehlig = len(dateien) - config.qr_config["cache_max_files"]
+        if ueberzaehlig <= 0:
+            return
+        dateien.sort(key=lambda e: e.stat().st_mtime)
+    except OSError as e:
+        logger.warning("Cache-Verzeichnis für QR-Codes konnte nicht gelesen werden: %s", e)
+        return
+    for eintrag in dateien[:ueberzaehlig]:
+        # ein anderer Worker kann die Datei bereits gelöscht haben
+        with suppress(OSError):
+            os.unlink(eintrag.path)
+
+
+def render_png(daten: str, text: str) -> bytes:
+    """
+    Rendert einen QR-Code ohne Cache (auch in Prozessen eines Pools verwendbar).
+
+    Args:
+        daten (str): Die zu codierenden Daten.
+        text (str): Der Infotext unterhalb des QR-Codes.
+
+    Returns:
+        bytes: Das PNG.
+    """
+
+    puffer = io.BytesIO()
+    erzeuge_qr_code(daten, text).save(puffer, "PNG")
+    return puffer.getvalue()
+
+
+def cached(daten: str, text: str) -> bytes | None:
+    """
+    Liefert einen QR-Code aus dem Speicher oder dem Cache-Verzeichnis, ohne zu rendern.
+
+    Args:
+        daten (str): Die codierten Daten.
+        text (str): Der Infotext.
+
+    Returns:
+        bytes | None: Das PNG oder None, wenn es noch nicht gerendert wurde.
+    """
+
+    schluessel = etag(daten, text)
+    png_bytes = _png_cache.get(schluessel)
+    if png_bytes is not cache.MISSING:
+        return png_bytes
+
+    png_bytes = _von_platte_lesen(schluessel)
+    if png_bytes is not None:
+        _png_cache.set(schluessel, png_bytes)
+    return png_bytes
+
+
+def remember(daten: str, text: str, png_bytes: bytes):
+    """
+    Legt einen gerenderten QR-Code im Speicher und ggf. im Cache-Verzeichnis ab.
+
+    Args:
+        daten (str): Die codierten Daten.
+        text (str): Der Infotext.
+        png_bytes (bytes): Das PNG.
+    """
+
+    schluessel = etag(daten, text)
+    _png_cache.set(schluessel, png_bytes)
+    _auf_platte_schreiben(schluessel, png_bytes)
+
+
+def png(daten: str, text: str) -> bytes:
+    """
+    Liefert einen QR-Code als PNG-Bytes, bei Bedarf aus dem Cache.
+
+    Args:
+        daten (str): Die zu codierenden Daten.
+        text (str): Der Infotext unterhalb des QR-Codes.
+
+    Returns:
+        bytes: Das PNG.
+    """
+
+    png_bytes = cached(daten, text)
+    if png_bytes is None:
+        png_bytes = render_png(daten, text)
+        remember(daten, text, png_bytes)
+    return png_bytes
+
+
+def benutzer_daten(usercode: str, aktion: str) -> tuple[str, str]:
+    """
+    Liefert codierte Daten und Infotext des QR-Codes eines Benutzers.
+
+    Args:
+        usercode (str): Der Code des Benutzers.
+        aktion (str): 'a' (Transaktion buchen) oder 'k' (Kontostand).
+
+    Returns:
+        tuple[str, str]: (Daten, Text).
+
+    Raises:
+        KeyError: Bei unbekannter Aktion.
+    """
+
+    return usercode + aktion, AKTIONEN[aktion]
+
+
+def png_fuer_benutzer(usercode: str, aktion: str) -> bytes:
+    """
+    Liefert den QR-Code eines Benutzers für eine Aktion.
+
+    Args:
+        usercode (str): Der Code des Benutzers.
+        aktion (str): 'a' (Transaktion buchen) oder 'k' (Kontostand).
+
+    Returns:
+        bytes: Das PNG.
+
+    Raises:
+        KeyError: Bei unbekannter Aktion.
+    """
+
+    return png(*benutzer_daten(usercode, aktion))
+
+
+def clear_cache():
+    """Leert den prozesslokalen Cache (das Cache-Verzeichnis bleibt unverändert)."""
+
+    _png_cache.clear()
@@ -0,0 +1,202 @@
+"""Gecachte, typisierte Systemeinstellungen aus der Tabelle system_einstellungen."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from mysql.connector import Error
+
+import cache
+import config
+import db_utils
+
+logger = logging.getLogger(__name__)
+
+EPOCH_NAME = "system_settings"
+
+
+class SettingError(ValueError):
+    """Ein Einstellungswert ist nicht gesetzt, hat den falschen Typ oder ist ungültig."""
+
+
+@dataclass(frozen=True)
+class SettingSpec:
+    """
+    Beschreibt Typ und Validierung einer Systemeinstellung.
+
+    Attributes:
+        typ: int, bool oder str.
+        label: Anzeigename für Fehlermeldungen.
+        validator: Optionale Prüfung des geparsten Werts.
+        fehlermeldung: Meldung, falls ``validator`` False liefert.
+    """
+
+    typ: type
+    label: str
+    validator: Callable[[Any], bool] | None = None
+    fehlermeldung: str = ""
+
+
+SETTINGS: dict[str, SettingSpec] = {
+    "TRANSACTION_SALDO_CHANGE": SettingSpec(
+        int, "Transaktions-Saldo-Änderung", lambda wert: wert < 0, "muss kleiner als 0 sein"
+    ),
+}
+
+_BOOL_TRUE = {"true", "1", "yes", "ja", "on"}
+_BOOL_FALSE = {"false", "0", "no", "nein", "off"}
+
+
+def parse_value(schluessel: str, wert: str) -> Any:
+    """
+    Wandelt den gespeicherten String einer Einstellung in ihren Typ um und validiert ihn.
+
+    Unbekannte Schlüssel werden als String zurückgegeben.
+
+    Args:
+        schluessel (str): Der Schlüssel der Einstellung.
+        wert (str): Der gespeicherte Wert.
+
+    Returns:
+        Any: Der typisierte Wert.
+
+    Raises:
+        SettingError: Wenn der Wert nicht umgewandelt werden kann oder die Validierung fehlschlägt.
+    """
+
+    spec = SETTINGS.get(schluessel)
+    if spec is None:
+        return wert
+
+    if spec.typ is int:
+        try:
+            typisiert = int(wert)
+        except (TypeError, ValueError) as e:
+            raise SettingError(f"Der Wert für '{spec.label}' muss eine ganze Zahl sein.") from e
+    elif spec.typ is bool:
+        normalisiert = str(wert).strip().lower()
+        if normalisiert not in _BOOL_TRUE | _BOOL_FALSE:
+            raise SettingError(f"Der Wert für '{spec.label}' muss ein Wahrheitswert sein.")
+        typisiert = normalisiert in _BOOL_TRUE
+    else:
+        typisiert = str(wert)
+
+    if spec.validator is not None and not spec.validator(typisiert):
+        raise SettingError(f"Der Wert für '{spec.label}' {spec.fehlermeldung}.")
+    return typisiert
+
+
+class SettingsRegistry:
+    """
+    Lädt alle Systemeinstellungen auf einmal und hält sie prozesslokal vor.
+
+    Neu geladen wird nach Ablauf von ``ttl`` Sekunden oder wenn sich die Epoche
+    'system_settings' geändert hat (siehe ``cache.EpochTracker``). Schlägt das Laden fehl, bleiben
+    bereits geladene Werte erhalten und der nächste Zugriff lädt erneut; ohne geladene Werte
+    erreicht der Datenbankfehler den Aufrufer.
+    """
+
+    def __init__(self, ttl: float):
+        """
+        Args:
+            ttl (float): Maximales Alter der geladenen Einstellungen in Sekunden.
+        """
+
+        self.ttl = ttl
+        self._roh: dict[str, dict] = {}
+        self._werte: dict[str, Any] = {}
+        self._fehler: dict[str, SettingError] = {}
+        self._geladen_um: float | None = None
+        self._epoche = -1
+        self._lock = threading.Lock()
+
+    def _laden(self, epoche: int):
+        try:
+            with db_utils.transaction() as cursor:
+                cursor.execute(
+                    "SELECT einstellung_schluessel, einstellung_wert, beschreibung FROM system_einstellungen"
+                )
+                rows = cursor.fetchall()
+        except Error as e:
+            if self._geladen_um is None and not self._roh:
+                raise
+            # bisherige Werte behalten; _geladen_um und _epoche bleiben veraltet, der nächste Zugriff lädt erneut
+            logger.warning("Systemeinstellungen konnten nicht neu geladen werden, verwende bisherige Werte: %s", e)
+            return
+        roh, werte, fehler = {}, {}, {}
+        for row in rows:
+            schluessel = row["einstellung_schluessel"]
+            roh[schluessel] = {"wert": row["einstellung_wert"], "beschreibung": row["beschreibung"]}
+            try:
+                werte[schluessel] = parse_value(schluessel, row["einstellung_wert"])
+            except SettingError as e:
+                logger.error(
+                    "Ungültiger Wert für %s ('%s') in system_einstellungen.", schluessel, row["einstellung_wert"]
+                )
+                fehler[schluessel] = e
+        self._roh, self._werte, self._fehler = roh, werte, fehler
+        self._geladen_um = time.monotonic()
+        self._epoche = epoche
+
+    def _aktualisieren(self):
+        epoche = cache.current_epoch(EPOCH_NAME)
+        with self._lock:
+            if self._geladen_um is None or epoche != self._epoche or time.monotonic() - self._geladen_um >= self.ttl:
+                self._laden(epoche)
+
+    def get(self, schluessel: str, default: Any = None) -> Any:
+        """
+        Liefert den typisierten Wert einer Einstellung.
+
+        Args:
+            schluessel (str): Der Schlüssel der Einstellung.
+            default (Any): Rückgabewert, wenn die Einstellung nicht existiert.
+
+        Returns:
+            Any: Der typisierte Wert oder ``default``.
+
+        Raises:
+            SettingError: Wenn der gespeicherte Wert ungültig ist.
+            mysql.connector.Error: Wenn die Einstellungen noch nie geladen werden konnten.
+        """
+
+        self._aktualisieren()
+        if schluessel in self._fehler:
+            raise SettingError(str(self._fehler[schluessel]))
+        return self._werte.get(schluessel, default)
+
+    def get_raw(self, schluessel: str) -> str | None:
+        """Liefert den gespeicherten String einer Einstellung oder None."""
+
+        self._aktualisieren()
+        eintrag = self._roh.get(schluessel)
+        return eintrag["wert"] if eintrag else None
+
+    def all(self) -> dict[str, dict]:
+        """
+        Liefert alle Einstellungen.
+
+        Returns:
+            dict: einstellung_schluessel -> {'wert': str, 'beschreibung': str}.
+        """
+
+        self._aktualisieren()
+        return {schluessel: dict(eintrag) for schluessel, eintrag in self._roh.items()}
+
+    def invalidate(self):
+        """Verwirft die geladenen Einstellungen in allen Prozessen (lokal sofort, sonst über die Epoche)."""
+
+        with self._lock:
+            self._geladen_um = None
+        cache.bump_epoch(EPOCH_NAME)
+
+
+registry = SettingsRegistry(config.cache_config["settings_ttl"])
+
+get = registry.get
+get_raw = registry.get_raw
+get_all = registry.all
+invalidate = registry.invalidate
@@ -3,6 +3,8 @@ import sys
 
 # Set TESTING env var before importing modules that have side effects
 os.environ["TESTING"] = "True"
+# CPU-Arbeit im Testprozess rechnen, damit Patches greifen (tests/test_process_pool.py startet den Pool selbst)
+os.environ["PROCESS_POOL_WORKERS"] = "0"
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -1,7 +1,9 @@
 import base64
+import json
 import os
 import sys
-from unittest.mock import patch
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -60,11 +62,12 @@ def test_nfc_transaction_missing_data(client, mock_db):
 def test_nfc_transaction_unknown_token(client, mock_db):
     with (
         patch("api.get_user_by_api_key") as mock_get_user,
-        patch("api.finde_benutzer_zu_nfc_token") as mock_find_user,
+        patch("api.system_settings.get", return_value=-1),
+        patch("api.ledger.book_by_token") as mock_book,
         patch("api.prepare_and_send_email") as mock_send_email,
     ):
         mock_get_user.return_value = (1, "testuser")
-        mock_find_user.return_value = None
+        mock_book.return_value = api.ledger.BookingResult("unknown")
 
         token_base64 = base64.b64encode(b"\x01\x02\x03\x04").decode("utf-8")
         payload = {"token": token_base64, "beschreibung": "Test Reader"}
@@ -80,3 +83,255 @@ def test_nfc_transaction_unknown_token(client, mock_db):
         assert email_params["template_name_html"] == "email_unknown_token.html"
         assert email_params["template_context"]["token_hex"] == "01020304"
         assert email_params["template_context"]["terminal"] == "Test Reader"
+
+
+def test_transaktionen_streamed_as_json_array(client):
+    rows = [{"id": i, "nachname": "M", "vorname": "Max", "beschreibung": "Kaffee", "timestamp": None} for i in range(3)]
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("db_utils.iter_rows", return_value=iter(rows)),
+    ):
+        response = client.get("/transaktionen", headers={"X-API-Key": "valid-key"})
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.json == rows
+
+        with patch("db_utils.iter_rows", return_value=iter(rows)):
+            response = client.get("/transaktionen?format=ndjson", headers={"X-API-Key": "valid-key"})
+        assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == rows
+
+
+def test_transaktionen_keyset_page(client):
+    cursor = MagicMock()
+    cursor.fetchone.return_value = {"timestamp": "2026-01-01 12:00:00"}
+    cursor.fetchall.return_value = [{"id": i} for i in (9, 8, 7)]
+
+    @contextmanager
+    def fake_transaction():
+        yield cursor
+
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("db_utils.transaction", side_effect=fake_transaction),
+    ):
+        response = client.get("/transaktionen?after_id=10&limit=2", headers={"X-API-Key": "valid-key"})
+
+    assert response.status_code == 200
+    assert response.json == {"transaktionen": [{"id": 9}, {"id": 8}], "next_after_id": 8}
+    assert cursor.execute.call_args.args[1][-2:] == (10, 3)
+
+
+def test_transaktionen_page_database_error_returns_500_without_etag(client):
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("cache.current_epoch", return_value=3),
+        patch("db_utils.transaction", side_effect=api.Error("weg")),
+    ):
+        response = client.get("/transaktionen?after_id=10&limit=2", headers={"X-API-Key": "valid-key"})
+
+    assert response.status_code == 500
+    assert "ETag" not in response.headers
+
+
+def test_metrics_endpoint_exposes_pool_metrics(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    assert b"fvh_db_pool_checkout_seconds" in response.data
+
+
+def test_metrics_count_requests_per_endpoint(client):
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert b'fvh_http_requests_total{endpoint="health_unprotected_route",method="GET",status="200"}' in response.data
+    assert b'fvh_http_request_duration_seconds_count{endpoint="health_unprotected_route",method="GET"}' in response.data
+
+
+def test_saldo_alle_cached_with_etag_and_304(client):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [{"id": 1, "nachname": "M", "vorname": "Max", "saldo": 5}]
+    api._saldo_alle_cache.invalidate()
+
+    @contextmanager
+    def fake_transaction():
+        yield cursor
+
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("cache.current_epoch", return_value=7) as mock_epoch,
+        patch("db_utils.transaction", side_effect=fake_transaction) as mock_tx,
+    ):
+        response = client.get("/saldo-alle", headers={"X-API-Key": "valid-key"})
+        assert response.status_code == 200
+        assert response.json == [{"id": 1, "nachname": "M", "vorname": "Max", "saldo": "5"}]
+        etag = response.headers["ETag"]
+
+        response = client.get("/saldo-alle", headers={"X-API-Key": "valid-key", "If-None-Match": etag})
+        assert response.status_code == 304
+        assert mock_tx.call_count == 1
+
+        mock_epoch.return_value = 8
+        response = client.get("/saldo-alle", headers={"X-API-Key": "valid-key", "If-None-Match": etag})
+        assert mock_tx.call_count == 2
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+def test_conditional_get_skips_view_when_etag_matches(client):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [{"code": "1234567890", "nachname": "M", "vorname": "Max"}]
+
+    @contextmanager
+    def fake_transaction():
+        yield cursor
+
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("cache.current_epoch", return_value=3) as mock_epoch,
+        patch("db_utils.transaction", side_effect=fake_transaction) as mock_fetch,
+    ):
+        response = client.get("/users", headers={"X-API-Key": "valid-key"})
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == api.CONDITIONAL_CACHE_CONTROL
+        etag = response.headers["ETag"]
+
+        response = client.get("/users", headers={"X-API-Key": "valid-key", "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert mock_fetch.call_count == 1
+
+        # andere URL bzw. neue Epoche ergeben einen anderen ETag
+        response = client.get("/users?x=1", headers={"X-API-Key": "valid-key", "If-None-Match": etag})
+        assert response.status_code == 200
+        mock_epoch.return_value = 4
+        response = client.get("/users", headers={"X-API-Key": "valid-key", "If-None-Match": etag})
+        assert response.status_code == 200
+
+
+def test_users_database_error_returns_500_without_etag(client):
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("cache.current_epoch", return_value=3),
+        patch("db_utils.transaction", side_effect=api.Error("weg")),
+    ):
+        response = client.get("/users", headers={"X-API-Key": "valid-key"})
+
+    assert response.status_code == 500
+    assert "ETag" not in response.headers
+
+
+def test_conditional_get_no_etag_on_error(client):
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("cache.current_epoch", return_value=3),
+        patch("db_utils.fetch_one", return_value=None),
+    ):
+        response = client.get("/person/0000000000", headers={"X-API-Key": "valid-key"})
+
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
+
+
+def test_nfc_batch_returns_per_item_results(client):
+    token = base64.b64encode(b"\x0a\x0b").decode()
+    scans = [
+        {"idempotency_key": "k1", "token": token, "beschreibung": "Terminal", "timestamp": "2026-05-01T18:30:00"},
+        {"idempotency_key": "k2", "token": token, "beschreibung": "Terminal"},
+        {"idempotency_key": "k3", "token": token, "beschreibung": "Terminal", "timestamp": "2026-05-01T18:31:00"},
+    ]
+    gebucht = api.ledger.BookingResult("ok", user={"id": 3, "vorname": "Max", "email": None}, neuer_saldo=4)
+    antwort, status_code = api._nfc_antwort(gebucht)
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("api.system_settings.get", return_value=-1),
+        patch("api.ledger.book_token_batch") as mock_batch,
+        patch("api.aktuellen_saldo_pruefen_und_benachrichtigen") as mock_schwelle,
+    ):
+        mock_batch.return_value = [
+            api.ledger.BatchItemResult(status_code, antwort, gebucht),
+            api.ledger.BatchItemResult(200, {"saldo": 5}),
+        ]
+        response = client.post("/nfc-transaktionen/batch", headers={"X-API-Key": "valid-key"}, json=scans)
+
+    assert response.status_code == 200
+    assert response.json["gebucht"] == 1
+    assert [(e["idempotency_key"], e["status_code"], e["wiederholt"]) for e in response.json["ergebnisse"]] == [
+        ("k1", 200, False),
+        ("k2", 400, False),
+        ("k3", 200, True),
+    ]
+    assert response.json["ergebnisse"][0]["antwort"]["saldo"] == "4"
+    gebuchte_scans = mock_batch.call_args.args[1]
+    assert [scan.idempotency_key for scan in gebuchte_scans] == ["k1", "k3"]
+    assert gebuchte_scans[0].token_bytes == b"\x0a\x0b"
+    mock_schwelle.assert_called_once()
+
+
+def test_nfc_transaction_idempotency_key_replays_without_booking(client):
+    api.idempotency._speicher.clear()
+    gebucht = api.ledger.BookingResult(
+        "ok", user={"id": 3, "vorname": "Max", "nachname": "M", "token_id": 5}, neuer_saldo=4
+    )
+    payload = {"token": base64.b64encode(b"\x0a").decode(), "beschreibung": "Terminal"}
+    headers = {"X-API-Key": "valid-key", "Idempotency-Key": "scan-0001"}
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("api.system_settings.get", return_value=-1),
+        patch("api.ledger.book_by_token", return_value=gebucht) as mock_book,
+        patch("api._benachrichtigen_nach_buchung") as mock_benachrichtigen,
+        patch("idempotency.purge_if_due"),
+        patch("db_utils.fetch_one", return_value=None),
+    ):
+        erste = client.put("/nfc-transaktion", headers=headers, json=payload)
+        zweite = client.put("/nfc-transaktion", headers=headers, json=payload)
+        ungueltig = client.put("/nfc-transaktion", headers={**headers, "Idempotency-Key": "a b"}, json=payload)
+        anderer_body = client.put("/nfc-transaktion", headers=headers, json={**payload, "beschreibung": "Andere"})
+
+    assert erste.status_code == zweite.status_code == 200
+    assert zweite.json == erste.json
+    assert zweite.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in erste.headers
+    mock_book.assert_called_once()
+    assert mock_book.call_args.kwargs["idempotenz"].schluessel == "scan-0001"
+    mock_benachrichtigen.assert_called_once()
+    assert ungueltig.status_code == 400
+    assert anderer_body.status_code == 422
+    assert "Idempotent-Replayed" not in anderer_body.headers
+
+
+def test_nfc_transaction_settings_database_error_returns_500(client):
+    payload = {"token": base64.b64encode(b"\x0a").decode(), "beschreibung": "Terminal"}
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("api.system_settings.get", side_effect=api.Error("weg")),
+        patch("api.ledger.book_by_token") as mock_book,
+    ):
+        response = client.put("/nfc-transaktion", headers={"X-API-Key": "valid-key"}, json=payload)
+
+    assert response.status_code == 500
+    mock_book.assert_not_called()
+
+
+def test_saldo_keeps_string_wire_format(client):
+    # vor user_balances kam der Kontostand als Decimal aus SUM() und wurde als String ausgeliefert
+    person = {"id": 3, "nachname": "M", "vorname": "Max", "saldo": -3}
+    gebucht = api.ledger.BookingResult("ok", user={"id": 3, "vorname": "Max"}, neuer_saldo=-4)
+    with (
+        patch("api.get_user_by_api_key", return_value=(1, "testuser")),
+        patch("db_utils.fetch_one", return_value=person),
+    ):
+        response = client.get("/person/1000000000", headers={"X-API-Key": "valid-key"})
+
+    assert response.json["saldo"] == "-3"
+    assert api._nfc_antwort(gebucht)[0]["saldo"] == "-4"
+    assert api._person_antwort(gebucht, "1000000000")[0]["saldo"] == "-4"
+
+
+def test_api_key_database_error_returns_500(client):
+    with patch("api.get_user_by_api_key", side_effect=api.Error("weg")):
+        response = client.get("/users", headers={"X-API-Key": "valid-key"})
+
+    assert response.status_code == 500
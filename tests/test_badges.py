@@ -0,0 +1,43 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import badges
+import config
+import qr_codes
+
+BENUTZER = [{"code": f"{1000000000 + i}", "vorname": "Jörg", "nachname": f"Müller {i}"} for i in range(9)]
+
+
+def test_load_qr_codes_reuses_cache():
+    qr_codes.clear_cache()
+    qr_codes.remember(*qr_codes.benutzer_daten("1000000000", "a"), b"gecacht")
+
+    with (
+        patch.dict(config.qr_config, {"cache_dir": None}),
+        patch("qr_codes.render_png", return_value=b"neu") as mock_render,
+    ):
+        pngs = badges.load_qr_codes(["1000000000", "1000000001"])
+
+    assert pngs == {
+        ("1000000000", "a"): b"gecacht",
+        ("1000000000", "k"): b"neu",
+        ("1000000001", "a"): b"neu",
+        ("1000000001", "k"): b"neu",
+    }
+    assert mock_render.call_count == 3
+    assert qr_codes.cached(*qr_codes.benutzer_daten("1000000001", "k")) == b"neu"
+    qr_codes.clear_cache()
+
+
+def test_create_pdf_eight_labels_per_page():
+    qr_codes.clear_cache()
+
+    with patch.dict(config.qr_config, {"cache_dir": None}), patch("badges._MIN_PARALLEL", 1000):
+        pdf = badges.create_pdf(BENUTZER)
+
+    assert pdf.startswith(b"%PDF")
+    assert pdf.count(b"/Type /Page\n") == 2
+    qr_codes.clear_cache()
@@ -0,0 +1,127 @@
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import api
+import cache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    c = cache.TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "a" wird dadurch zuletzt genutzt
+    c.set("c", 3)
+
+    assert c.get("b") is cache.MISSING
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+
+
+def test_ttl_cache_evicts_by_total_bytes():
+    c = cache.TTLCache(maxsize=10, ttl=60, maxbytes=10)
+    c.set("a", b"1234")
+    c.set("b", b"5678")
+    c.set("a", b"12")  # ersetzt, zählt nur noch 2 Bytes
+    c.set("c", b"abcd")
+    c.set("zu_gross", b"x" * 11)
+
+    assert len(c) == 3
+    c.set("d", b"efg")
+
+    assert c.get("b") is cache.MISSING
+    assert [c.get(k) for k in ("a", "c", "d")] == [b"12", b"abcd", b"efg"]
+    assert c.get("zu_gross") is cache.MISSING
+
+
+def test_ttl_cache_expires_entries_and_caches_none():
+    c = cache.TTLCache(maxsize=10, ttl=60)
+    with patch("cache.time.monotonic", return_value=100.0):
+        c.set("key", None, ttl=5)
+        assert c.get("key") is None
+    with patch("cache.time.monotonic", return_value=106.0):
+        assert c.get("key") is cache.MISSING
+
+
+def test_epoch_versions_never_go_backwards():
+    tracker = cache.EpochTracker(interval=0)
+    with patch("db_utils.fetch_all", return_value=[{"name": "api_keys", "version": 3}]):
+        assert tracker.current("api_keys") == 3
+    with patch("db_utils.fetch_all", return_value=[]):
+        assert tracker.current("api_keys") == 3
+
+
+def _fake_transaction(cursor):
+    @contextmanager
+    def fake_transaction():
+        yield cursor
+
+    return fake_transaction
+
+
+def test_epoch_bump_retries_and_stays_local_on_failure():
+    tracker = cache.EpochTracker(interval=60)
+    with patch("cache.time.sleep"):
+        with patch("db_utils.execute_commit", side_effect=[(False, None), (True, None)]) as mock_commit:
+            assert tracker.bump("api_keys") is True
+        assert mock_commit.call_count == 2
+        assert tracker._versionen["api_keys"] == 1
+
+        with patch("db_utils.execute_commit", return_value=(False, None)) as mock_commit:
+            assert tracker.bump("api_keys") is False
+        assert mock_commit.call_count == cache._BUMP_VERSUCHE
+        assert tracker._versionen["api_keys"] == 1
+
+
+def test_api_key_lookup_is_cached_and_invalidated_by_epoch():
+    api._api_key_cache.clear()
+    cursor = MagicMock()
+    cursor.fetchone.return_value = {"id": 5, "username": "terminal"}
+    with (
+        patch("cache.current_epoch", return_value=1) as mock_epoch,
+        patch("db_utils.transaction", side_effect=_fake_transaction(cursor)),
+    ):
+        assert api.get_user_by_api_key("secret") == (5, "terminal")
+        assert api.get_user_by_api_key("secret") == (5, "terminal")
+        assert cursor.execute.call_count == 1
+
+        mock_epoch.return_value = 2
+        cursor.fetchone.return_value = None
+        assert api.get_user_by_api_key("secret") is None
+        assert api.get_user_by_api_key("secret") is None
+        assert cursor.execute.call_count == 2
+
+
+def test_api_key_lookup_does_not_cache_database_errors():
+    api._api_key_cache.clear()
+    cursor = MagicMock()
+    cursor.fetchone.return_value = {"id": 5, "username": "terminal"}
+    with patch("cache.current_epoch", return_value=1):
+        with patch("db_utils.transaction", side_effect=api.Error("weg")), pytest.raises(api.Error):
+            api.get_user_by_api_key("secret")
+        with patch("db_utils.transaction", side_effect=_fake_transaction(cursor)):
+            assert api.get_user_by_api_key("secret") == (5, "terminal")
+
+
+def test_versioned_value_recomputes_once_per_version():
+    aufrufe = []
+
+    def laden():
+        aufrufe.append(1)
+        time.sleep(0.05)
+        return len(aufrufe)
+
+    wert = cache.VersionedValue(laden)
+    ergebnisse = []
+    threads = [threading.Thread(target=lambda: ergebnisse.append(wert.get(1))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ergebnisse == [1] * 5
+    assert wert.get(2) == 2
+    assert len(aufrufe) == 2
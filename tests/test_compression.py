@@ -0,0 +1,77 @@
+import gzip
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, Response, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import compression
+import config
+
+GROSS = [{"id": i, "beschreibung": "Getränk", "saldo_aenderung": -1} for i in range(500)]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/gross")
+    def gross():
+        response = jsonify(GROSS)
+        response.set_etag("abc")
+        return response
+
+    @app.route("/klein")
+    def klein():
+        return jsonify({"ok": True})
+
+    @app.route("/bild")
+    def bild():
+        return Response(b"\x89PNG" * 1000, mimetype="image/png")
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"zeile {i}\n" for i in range(1000)), mimetype="application/x-ndjson")
+
+    compression.init_app(app)
+    konfig = {**config.compression_config, "enabled": True, "min_size": 1024}
+    with patch.dict(config.compression_config, konfig), app.test_client() as client:
+        yield client
+
+
+def test_large_json_is_gzipped_and_etag_weakened(client):
+    response = client.get("/gross", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == 'W/"abc"'
+    assert int(response.headers["Content-Length"]) < len(gzip.decompress(response.data))
+    assert gzip.decompress(response.data) == client.get("/gross").data
+
+
+@pytest.mark.parametrize(
+    ("pfad", "accept"),
+    [("/klein", "gzip"), ("/bild", "gzip"), ("/gross", "identity"), ("/gross", "gzip;q=0")],
+)
+def test_not_compressed(client, pfad, accept):
+    response = client.get(pfad, headers={"Accept-Encoding": accept})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_disabled_by_default(client):
+    with patch.dict(config.compression_config, {"enabled": False}):
+        response = client.get("/gross", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streamed_response_is_compressed_in_chunks(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.data).decode() == "".join(f"zeile {i}\n" for i in range(1000))
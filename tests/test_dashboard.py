@@ -0,0 +1,90 @@
+import os
+import sys
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import dashboard
+
+BENUTZER = [
+    {
+        "id": 1,
+        "code": "111",
+        "nachname": "Müller",
+        "vorname": "Jörg",
+        "email": None,
+        "kommentar": None,
+        "is_locked": 0,
+        "is_admin": 1,
+        "saldo": -3,
+    },
+    {
+        "id": 2,
+        "code": "222",
+        "nachname": "Schmidt",
+        "vorname": "Anna",
+        "email": "anna@example.org",
+        "kommentar": "Kasse",
+        "is_locked": 1,
+        "is_admin": 0,
+        "saldo": 10,
+    },
+]
+BUCHUNGEN = [
+    {
+        "id": 7,
+        "user_id": 2,
+        "nachname": "Schmidt",
+        "vorname": "Anna",
+        "beschreibung": "Einzahlung",
+        "saldo_aenderung": 10,
+        "timestamp": datetime(2026, 2, 1, 12, 30),
+    },
+    {
+        "id": 6,
+        "user_id": 9,
+        "nachname": None,
+        "vorname": None,
+        "beschreibung": None,
+        "saldo_aenderung": -1,
+        "timestamp": datetime(2026, 2, 1, 12, 0),
+    },
+]
+EINSTELLUNGEN = {"TRANSACTION_SALDO_CHANGE": {"wert": "-1", "beschreibung": "Betrag"}}
+
+
+def _fetch_all(query, params=None, dictionary=True):
+    return BUCHUNGEN if "FROM transactions" in query else BENUTZER
+
+
+def test_load_formats_snapshot():
+    with (
+        patch("db_utils.fetch_all", side_effect=_fetch_all) as mock_fetch,
+        patch("system_settings.get_all", return_value=EINSTELLUNGEN),
+    ):
+        snapshot = dashboard.load(limit=10)
+
+    # Benutzer mit Salden in einer Abfrage, dazu die neuesten Buchungen
+    assert mock_fetch.call_count == 2
+    assert [u.name for u in snapshot.users] == ["Müller, Jörg", "Schmidt, Anna"]
+    assert snapshot.users[0].saldo_display == "-3.00 €"
+    assert snapshot.users[0].saldo_negativ
+    assert snapshot.users[0].email == ""
+    assert snapshot.users[1].is_locked
+    assert snapshot.saldo_gesamt_display == "7.00 €"
+
+    assert [t.betrag_display for t in snapshot.recent_transactions] == ["+10.00 €", "-1.00 €"]
+    assert snapshot.recent_transactions[0].timestamp_display == "01.02.2026 12:30"
+    assert snapshot.recent_transactions[1].benutzer == "-"
+    assert snapshot.recent_transactions[1].beschreibung == ""
+    assert snapshot.system_settings == EINSTELLUNGEN
+
+
+def test_load_with_database_errors_is_empty():
+    with patch("db_utils.fetch_all", return_value=[]), patch("system_settings.get_all", return_value={}):
+        snapshot = dashboard.load()
+
+    assert snapshot.users == ()
+    assert snapshot.recent_transactions == ()
+    assert snapshot.saldo_gesamt_display == "0.00 €"
@@ -0,0 +1,69 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+import db_utils
+import metrics
+from db_utils import DatabaseConnectionPool
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+@pytest.fixture
+def small_pool():
+    fake_pool = MagicMock()
+    fake_pool.pool_size = 1
+    with patch("db_utils.pooling.MySQLConnectionPool", return_value=fake_pool):
+        DatabaseConnectionPool._connection_pool = None
+        DatabaseConnectionPool.initialize_pool({"pool_size": 1}, checkout_timeout=0.05)
+        yield fake_pool
+    DatabaseConnectionPool._connection_pool = None
+    DatabaseConnectionPool.checkout_timeout = 5.0
+
+
+def test_exhausted_pool_times_out_and_counts(small_pool):
+    timeouts_vorher = sample("fvh_db_pool_timeouts_total")
+
+    cnx = DatabaseConnectionPool.get_connection()
+    assert cnx is small_pool.get_connection.return_value
+    assert sample("fvh_db_pool_connections_in_use") == 1
+
+    assert DatabaseConnectionPool.get_connection() is None
+    assert sample("fvh_db_pool_timeouts_total") == timeouts_vorher + 1
+
+    DatabaseConnectionPool.close_connection(cnx)
+    assert sample("fvh_db_pool_connections_idle") == 1
+
+
+def test_exhausted_pool_waits_for_released_connection(small_pool):
+    DatabaseConnectionPool.checkout_timeout = 2.0
+    cnx = DatabaseConnectionPool.get_connection()
+    threading.Timer(0.05, DatabaseConnectionPool.close_connection, args=(cnx,)).start()
+
+    zweite = DatabaseConnectionPool.get_connection()
+
+    assert zweite is not None
+    DatabaseConnectionPool.close_connection(zweite)
+
+
+def test_fetch_one_records_query_duration(small_pool):
+    labels = {"operation": "fetch_one"}
+    vorher = sample("fvh_db_query_duration_seconds_count", labels)
+
+    db_utils.fetch_one("SELECT 1")
+
+    assert sample("fvh_db_query_duration_seconds_count", labels) == vorher + 1
+
+
+def test_render_merges_worker_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    with patch("metrics.multiprocess.MultiProcessCollector") as mock_collector:
+        daten, content_type = metrics.render()
+
+    mock_collector.assert_called_once()
+    assert content_type.startswith("text/plain")
+    assert isinstance(daten, bytes)
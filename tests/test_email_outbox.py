@@ -0,0 +1,77 @@
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import email_outbox
+
+ROW = {
+    "id": 1,
+    "empfaenger": "max@example.org",
+    "betreff": "Dein Kontostand hat Null erreicht",
+    "template_html": "email_saldo_null.html",
+    "template_text": "email_saldo_null.txt",
+    "context": json.dumps({"vorname": "Max", "saldo": 0}),
+    "logo_pfad": None,
+    "versuche": 0,
+}
+
+
+def test_enqueue_is_a_single_insert():
+    params = {
+        "empfaenger_email": "max@example.org",
+        "betreff": "Test",
+        "template_name_html": "email_saldo_null.html",
+        "template_name_text": "email_saldo_null.txt",
+        "template_context": {"vorname": "Max"},
+    }
+    with patch("db_utils.execute_commit", return_value=(True, 1)) as mock_commit:
+        assert email_outbox.enqueue(params) is True
+
+    mock_commit.assert_called_once()
+    query, values = mock_commit.call_args.args
+    assert "INSERT INTO email_outbox" in query
+    assert json.loads(values[4]) == {"vorname": "Max"}
+
+
+def test_enqueue_rejects_incomplete_params():
+    with patch("db_utils.execute_commit") as mock_commit:
+        assert email_outbox.enqueue({"empfaenger_email": "max@example.org"}) is False
+    mock_commit.assert_not_called()
+
+
+def test_process_batch_renders_and_marks_rows():
+    failed_row = dict(ROW, id=2, versuche=1)
+    with (
+        patch("email_outbox._claim_batch", return_value=[ROW, failed_row]),
+        patch("email_sender.sende_formatierte_emails", return_value=[True, False]) as mock_send,
+        patch("db_utils.execute_commit", return_value=(True, None)) as mock_commit,
+    ):
+        assert email_outbox.process_batch() == 2
+
+    nachrichten = mock_send.call_args.args[0]
+    assert "Max" in nachrichten[0]["content"]["text"]
+    queries = [c.args for c in mock_commit.call_args_list]
+    assert any("status = 'pending'" in q and params[1] == 60 for q, params in queries)  # 2. Versuch: 30 s * 2
+    assert any("status = 'sent'" in q and params == (1,) for q, params in queries)
+
+
+def test_enqueue_many_skips_invalid_and_inserts_once():
+    params = {
+        "empfaenger_email": "max@example.org",
+        "betreff": "Neue Transaktion auf deinem Konto",
+        "template_name_html": "email_neue_transaktion.html",
+        "template_name_text": "email_neue_transaktion.txt",
+        "template_context": {"vorname": "Max"},
+    }
+    cursor = MagicMock()
+
+    @contextmanager
+    def fake_transaction():
+        yield cursor
+
+    with patch("db_utils.transaction", return_value=fake_transaction()):
+        anzahl = email_outbox.enqueue_many([params, {"betreff": "ohne Empfänger"}, params])
+
+    assert anzahl == 2
+    cursor.executemany.assert_called_once()
+    assert len(cursor.executemany.call_args.args[1]) == 2
@@ -0,0 +1,69 @@
+import smtplib
+from email.mime.multipart import MIMEMultipart
+from unittest.mock import MagicMock, patch
+
+import email_sender
+
+SMTP_CFG = {"host": "smtp.example.org", "port": 587, "user": "u", "password": "p", "sender": "fvh@example.org"}
+
+
+def _fake_smtp():
+    server = MagicMock()
+    server.noop.return_value = (250, b"OK")
+    return server
+
+
+def test_pool_reuses_authenticated_connection():
+    server = _fake_smtp()
+    pool = email_sender.SMTPConnectionPool(SMTP_CFG, size=1)
+    with patch("smtplib.SMTP", return_value=server) as mock_smtp:
+        assert pool.send_many([(MIMEMultipart(), "a@example.org"), (MIMEMultipart(), "b@example.org")]) == [True, True]
+        assert pool.send(MIMEMultipart(), "c@example.org") is True
+
+    mock_smtp.assert_called_once()
+    server.login.assert_called_once()
+    assert server.sendmail.call_count == 3
+    server.noop.assert_called_once()
+
+
+def test_pool_reconnects_after_disconnect():
+    alt, neu = _fake_smtp(), _fake_smtp()
+    alt.noop.side_effect = smtplib.SMTPServerDisconnected()
+    pool = email_sender.SMTPConnectionPool(SMTP_CFG, size=1)
+    pool._zurueckgeben(alt)
+
+    with patch("smtplib.SMTP", return_value=neu):
+        assert pool.send(MIMEMultipart(), "a@example.org") is True
+
+    alt.sendmail.assert_not_called()
+    neu.sendmail.assert_called_once()
+
+
+def test_send_many_continues_after_refused_recipient():
+    server = _fake_smtp()
+    server.sendmail.side_effect = [smtplib.SMTPRecipientsRefused({"a@example.org": (550, b"no")}), {}]
+    pool = email_sender.SMTPConnectionPool(SMTP_CFG, size=1)
+    with patch("smtplib.SMTP", return_value=server):
+        assert pool.send_many([(MIMEMultipart(), "a@example.org"), (MIMEMultipart(), "b@example.org")]) == [
+            False,
+            True,
+        ]
+
+
+def test_logo_is_read_once_and_shared_between_messages():
+    email_sender._logo_mime_part.cache_clear()
+    content = {
+        "smtp_sender_for_header": SMTP_CFG["sender"],
+        "html": '<img src="cid:logo">',
+        "text": "",
+        "logo_pfad": "static/logo/logo-80x109.png",
+    }
+    with patch("pathlib.Path.read_bytes", autospec=True, side_effect=lambda _: b"\x89PNG\r\n\x1a\n") as mock_read:
+        erste = email_sender._create_mime_message("a@example.org", "Test", content)
+        zweite = email_sender._create_mime_message("b@example.org", "Test", content)
+
+    mock_read.assert_called_once()
+    assert erste.get_payload()[1] is zweite.get_payload()[1]
+    html_part = erste.get_payload()[0].get_payload()[1]
+    assert "cid:logoimage_cid_01" in html_part.get_payload(decode=True).decode("utf-8")
+    email_sender._logo_mime_part.cache_clear()
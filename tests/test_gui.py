@@ -1,9 +1,11 @@
+import datetime
 from unittest.mock import patch
 
 import pytest
 from PIL import Image
 
 import gui
+import qr_codes
 
 
 @pytest.fixture
@@ -33,12 +35,67 @@ def test_qr_code_with_login(client_gui):
         sess["user_id"] = 1
 
     # Mock erzeuge_qr_code to return a dummy image
-    with patch("gui.erzeuge_qr_code") as mock_qr:
+    qr_codes.clear_cache()
+    with (
+        patch("gui.get_user_by_id", return_value={"code": "123", "is_admin": 0}),
+        patch("qr_codes.erzeuge_qr_code") as mock_qr,
+    ):
         mock_qr.return_value = Image.new("RGB", (10, 10))
 
         response = client_gui.get("/qr_code?usercode=123&aktion=a")
         assert response.status_code == 200
         assert response.mimetype == "image/png"
+        assert "immutable" in response.headers["Cache-Control"]
+        mock_qr.assert_called_once_with("123a", "Transaktion buchen")
+
+
+def test_qr_code_cached_and_not_modified(client_gui):
+    with client_gui.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    qr_codes.clear_cache()
+    with (
+        patch("gui.get_user_by_id", return_value={"code": "123", "is_admin": 0}),
+        patch("qr_codes.erzeuge_qr_code", return_value=Image.new("RGB", (10, 10))) as mock_qr,
+    ):
+        erste = client_gui.get("/qr_code?usercode=123&aktion=k")
+        zweite = client_gui.get("/qr_code?usercode=123&aktion=k")
+        nicht_geaendert = client_gui.get(
+            "/qr_code?usercode=123&aktion=k", headers={"If-None-Match": erste.headers["ETag"]}
+        )
+
+    assert mock_qr.call_count == 1
+    assert zweite.data == erste.data
+    assert nicht_geaendert.status_code == 304
+    assert nicht_geaendert.data == b""
+
+
+def test_qr_code_only_for_own_code_or_admin(client_gui):
+    with client_gui.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    qr_codes.clear_cache()
+    with (
+        patch("gui.get_user_by_id", return_value={"code": "123", "is_admin": 0}),
+        patch("qr_codes.remember") as mock_remember,
+    ):
+        fremd = client_gui.get("/qr_code?usercode=999&aktion=a")
+    with (
+        patch("gui.get_user_by_id", return_value={"code": "123", "is_admin": 1}),
+        patch("db_utils.fetch_one", return_value=None),
+    ):
+        unbekannt = client_gui.get("/qr_code?usercode=999&aktion=a")
+    with (
+        patch("gui.get_user_by_id", return_value={"code": "123", "is_admin": 1}),
+        patch("db_utils.fetch_one", return_value={"id": 2}),
+        patch("qr_codes.erzeuge_qr_code", return_value=Image.new("RGB", (10, 10))),
+    ):
+        admin = client_gui.get("/qr_code?usercode=999&aktion=a")
+
+    assert fremd.status_code == unbekannt.status_code == 302
+    mock_remember.assert_not_called()
+    assert admin.status_code == 200
+    assert qr_codes.cached("999a", "Transaktion buchen") == admin.data
 
 
 def test_handle_add_user_transaction_formatting():
@@ -88,3 +145,104 @@ def test_set_theme(client_gui):
     assert response.headers["Location"] == "http://localhost/"
     with client_gui.session_transaction() as sess:
         assert sess.get("theme") == "light"
+
+
+def test_admin_badges_returns_pdf_for_selected_users(client_gui):
+    with client_gui.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    admin = {"id": 1, "is_admin": True, "is_locked": False}
+    users = [
+        {"id": 1, "code": "111", "vorname": "Anna", "nachname": "A", "is_locked": False},
+        {"id": 2, "code": "222", "vorname": "Ben", "nachname": "B", "is_locked": False},
+    ]
+    with (
+        patch("gui.get_user_by_id", return_value=admin),
+        patch("gui.get_all_users", return_value=users),
+        patch("badges.create_pdf", return_value=b"%PDF-1.4") as mock_pdf,
+    ):
+        response = client_gui.post("/admin/badges", data={"selected_users": ["2"]})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/pdf"
+    assert response.data == b"%PDF-1.4"
+    assert [u["id"] for u in mock_pdf.call_args.args[0]] == [2]
+
+
+def test_user_info_pdf_is_cached_until_next_booking(client_gui):
+    with client_gui.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    user = {"id": 1, "code": "111", "vorname": "Anna", "nachname": "A", "is_locked": False}
+    with (
+        patch("gui.get_user_by_id", return_value=user),
+        patch("gui.get_saldo_for_user", return_value=0),
+        patch("gui.get_user_transactions", return_value=[]) as mock_transaktionen,
+        patch(
+            "ledger.get_user_version",
+            side_effect=[(3, 30, None), (3, 30, None), (4, 31, datetime.datetime(2026, 1, 31, 18, 0))],
+        ),
+        patch("pdf_reports.transaction_report", return_value=b"%PDF-1.4") as mock_report,
+    ):
+        for _ in range(3):
+            response = client_gui.get("/user_info/pdf?von=2026-01-01&bis=2026-01-31")
+            assert response.status_code == 200
+            assert response.data == b"%PDF-1.4"
+
+    assert mock_report.call_count == 2
+    assert mock_report.call_args.kwargs["stand"] == datetime.datetime(2026, 1, 31, 18, 0)
+    assert mock_transaktionen.call_args.kwargs["von"].isoformat() == "2026-01-01"
+
+
+def test_user_info_pdf_rejects_invalid_period(client_gui):
+    with client_gui.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    user = {"id": 1, "code": "111", "vorname": "Anna", "nachname": "A", "is_locked": False}
+    with (
+        patch("gui.get_user_by_id", return_value=user),
+        patch("pdf_reports.transaction_report") as mock_report,
+    ):
+        response = client_gui.get("/user_info/pdf?von=2026-02-01&bis=2026-01-01")
+
+    assert response.status_code == 302
+    mock_report.assert_not_called()
+
+
+def test_admin_dashboard_renders_snapshot(client_gui):
+    with client_gui.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    admin = {"id": 1, "vorname": "Anna", "nachname": "A", "is_admin": True, "is_locked": False}
+    benutzer = {
+        "id": 1,
+        "code": "111",
+        "nachname": "A",
+        "vorname": "Anna",
+        "email": None,
+        "kommentar": None,
+        "is_locked": 0,
+        "is_admin": 1,
+        "saldo": -5,
+    }
+    with (
+        patch("gui.get_user_by_id", return_value=admin),
+        patch("dashboard.load_users", return_value=[benutzer]),
+        patch("dashboard.load_recent_transactions", return_value=[]),
+        patch("system_settings.get_all", return_value={}),
+    ):
+        response = client_gui.get("/admin")
+
+    assert response.status_code == 200
+    assert "-5.00 €" in response.get_data(as_text=True)
+
+
+def test_failed_epoch_bump_warns_admin():
+    with (
+        gui.app.test_request_context(),
+        patch("cache.bump_epoch", return_value=False),
+        patch("gui.flash") as mock_flash,
+    ):
+        gui._epoche_erhoehen("api_keys")
+
+    assert mock_flash.call_args.args[1] == "warning"
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import idempotency
+
+
+def test_valid_key():
+    assert idempotency.valid_key("3f2b8c1e-6d1a-4c5e-9f7a-0b1c2d3e4f50")
+    assert not idempotency.valid_key("")
+    assert not idempotency.valid_key("mit leerzeichen")
+    assert not idempotency.valid_key("x" * (idempotency.SCHLUESSEL_MAX_LAENGE + 1))
+    assert not idempotency.valid_key(None)
+
+
+def test_get_reads_database_once_then_memory():
+    idempotency._speicher.clear()
+    row = {"status_code": 200, "antwort": '{"saldo": 4}'}
+
+    with patch("db_utils.fetch_one", return_value=row) as mock_fetch:
+        assert idempotency.get(1, "k1") == idempotency.GespeicherteAntwort(200, {"saldo": 4})
+        assert idempotency.get(1, "k1") == idempotency.GespeicherteAntwort(200, {"saldo": 4})
+
+    mock_fetch.assert_called_once()
+
+
+def test_get_unknown_key_is_not_cached():
+    idempotency._speicher.clear()
+
+    with patch("db_utils.fetch_one", return_value=None) as mock_fetch:
+        assert idempotency.get(1, "neu") is None
+        assert idempotency.get(1, "neu") is None
+
+    assert mock_fetch.call_count == 2
+
+
+def test_request_hash_binds_method_path_and_body():
+    basis = idempotency.request_hash("PUT", "/nfc-transaktion", {"token": "AQ==", "beschreibung": "Terminal"})
+
+    assert basis == idempotency.request_hash("PUT", "/nfc-transaktion", {"beschreibung": "Terminal", "token": "AQ=="})
+    assert basis != idempotency.request_hash("PUT", "/nfc-transaktion", {"token": "AQ==", "beschreibung": "Essen"})
+    assert basis != idempotency.request_hash(
+        "PUT", "/person/1/transaktion", {"token": "AQ==", "beschreibung": "Terminal"}
+    )
+    assert idempotency.matches(idempotency.GespeicherteAntwort(200, {}, basis), basis)
+    assert not idempotency.matches(idempotency.GespeicherteAntwort(200, {}, "anders"), basis)
+    # Einträge aus der Zeit vor anfrage_hash
+    assert idempotency.matches(idempotency.GespeicherteAntwort(200, {}), basis)
@@ -0,0 +1,171 @@
+import datetime
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import ledger
+
+
+@contextmanager
+def fake_transaction(cursor):
+    yield cursor
+
+
+def test_add_transaction_updates_balance_in_same_transaction():
+    cursor = MagicMock()
+    cursor.lastrowid = 99
+
+    with patch("db_utils.transaction", return_value=fake_transaction(cursor)) as mock_tx:
+        success, transaction_id = ledger.add_transaction(7, "Kaffee", -1)
+
+    assert success is True
+    assert transaction_id == 99
+    mock_tx.assert_called_once()
+    statements = [c.args[0] for c in cursor.execute.call_args_list]
+    assert "INSERT INTO transactions" in statements[0]
+    assert "INSERT INTO user_balances" in statements[1]
+    assert cursor.execute.call_args_list[1].args[1] == (7, -1)
+
+
+def test_get_saldo_defaults_to_zero_without_row():
+    with patch("db_utils.fetch_one", return_value=None):
+        assert ledger.get_saldo(1) == 0
+
+    with patch("db_utils.fetch_one", return_value={"saldo": 12}):
+        assert ledger.get_saldo(1) == 12
+
+
+def test_book_by_token_blocks_below_limit_without_insert():
+    cursor = MagicMock()
+    cursor.fetchone.side_effect = [
+        {"id": 3, "vorname": "Max", "nachname": "M", "email": None, "is_locked": 0, "token_id": 5},
+        {"saldo": 0},
+    ]
+
+    with patch("db_utils.transaction", return_value=fake_transaction(cursor)):
+        ergebnis = ledger.book_by_token(b"\x01", "Terminal", -1)
+
+    assert ergebnis.status == "insufficient"
+    assert ergebnis.saldo_vorher == 0
+    assert "FOR UPDATE" in cursor.execute.call_args_list[0].args[0]
+    assert not any("INSERT" in c.args[0] for c in cursor.execute.call_args_list)
+
+
+def test_book_by_token_returns_new_saldo_and_preferences():
+    cursor = MagicMock()
+    cursor.lastrowid = 42
+    cursor.fetchone.side_effect = [
+        {"id": 3, "vorname": "Max", "nachname": "M", "email": "m@example.org", "is_locked": 0, "token_id": 5},
+        {"saldo": 10},
+    ]
+    cursor.fetchall.return_value = [{"event_schluessel": "NEUE_TRANSAKTION", "email_aktiviert": 1}]
+
+    with patch("db_utils.transaction", return_value=fake_transaction(cursor)):
+        ergebnis = ledger.book_by_token(b"\x01", "Terminal", -1)
+
+    assert ergebnis.ok
+    assert ergebnis.transaction_id == 42
+    assert ergebnis.neuer_saldo == 9
+    assert ergebnis.benachrichtigungen == {"NEUE_TRANSAKTION": True}
+
+
+def test_book_bulk_uses_one_query_per_step():
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = [
+        [
+            {"id": 3, "vorname": "Max", "nachname": "M", "email": "m@example.org", "is_locked": 0},
+            {"id": 4, "vorname": "Eva", "nachname": "E", "email": None, "is_locked": 0},
+        ],
+        [{"benutzer_id": 3}],
+        [{"user_id": 3, "saldo": 7}, {"user_id": 4, "saldo": -3}],
+    ]
+
+    with patch("db_utils.transaction", return_value=fake_transaction(cursor)):
+        ergebnis = ledger.book_bulk([3, 4, 4, 99], "Essen", -3)
+
+    assert ergebnis.fehlgeschlagen == 1
+    assert [(u["id"], u["neuer_saldo"], u["benachrichtigen"]) for u in ergebnis.gebucht] == [
+        (3, 7, True),
+        (4, -3, False),
+    ]
+    assert cursor.execute.call_count == 4
+    cursor.executemany.assert_called_once()
+    assert cursor.executemany.call_args.args[1] == [(3, "Essen", -3), (4, "Essen", -3)]
+    upsert = cursor.execute.call_args_list[2]
+    assert "(%s, %s), (%s, %s)" in upsert.args[0]
+    assert upsert.args[1] == [3, -3, 4, -3]
+
+
+def test_book_token_batch_bulk_lookups_running_balance_and_idempotency():
+    cursor = MagicMock()
+    max_user = {"id": 3, "vorname": "Max", "nachname": "M", "email": None, "is_locked": 0, "token_id": 5}
+    cursor.fetchall.side_effect = [
+        [{"schluessel": "k1", "status_code": 200, "antwort": '{"saldo": 4}'}],
+        [{**max_user, "token_daten": bytearray(b"\x0a")}],
+        [{"user_id": 3, "saldo": 1}],
+        [{"benutzer_id": 3, "event_schluessel": "NEUE_TRANSAKTION", "email_aktiviert": 1}],
+    ]
+    zeit = datetime.datetime(2026, 5, 1, 18, 30)
+    scans = [
+        ledger.TokenScan("k1", b"\x0a", "Terminal", zeit),
+        ledger.TokenScan("k2", b"\x0a", "Terminal", zeit),
+        ledger.TokenScan("k3", b"\x0a", "Terminal", zeit),
+        ledger.TokenScan("k4", b"\x0b", "Terminal", zeit),
+        ledger.TokenScan("k2", b"\x0a", "Terminal", zeit),
+    ]
+
+    with (
+        patch("db_utils.transaction", return_value=fake_transaction(cursor)),
+        patch("ledger._ledger_geaendert") as mock_bump,
+    ):
+        ergebnisse = ledger.book_token_batch(1, scans, -1, lambda e: ({"status": e.status}, 200))
+
+    assert [(e.antwort, e.wiederholt) for e in ergebnisse] == [
+        ({"saldo": 4}, True),
+        ({"status": "ok"}, False),
+        ({"status": "insufficient"}, False),
+        ({"status": "unknown"}, False),
+        ({"status": "ok"}, True),
+    ]
+    assert ergebnisse[1].ergebnis.neuer_saldo == 0
+    assert ergebnisse[1].ergebnis.benachrichtigungen == {"NEUE_TRANSAKTION": True}
+    transaktionen, schluessel = (c.args[1] for c in cursor.executemany.call_args_list)
+    assert transaktionen == [(3, "Terminal", -1, zeit)]
+    assert [eintrag[1] for eintrag in schluessel] == ["k2", "k3", "k4"]
+    mock_bump.assert_called_once()
+
+
+def test_book_token_batch_rejects_key_reused_for_other_scan():
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = [
+        [{"schluessel": "k1", "anfrage_hash": "alt", "status_code": 200, "antwort": '{"saldo": 4}'}],
+        [],
+    ]
+    zeit = datetime.datetime(2026, 5, 1, 18, 30)
+    scans = [
+        ledger.TokenScan("k1", b"\x0a", "Terminal", zeit, "neu"),
+        ledger.TokenScan("k2", b"\x0b", "Terminal", zeit, "a"),
+        ledger.TokenScan("k2", b"\x0c", "Terminal", zeit, "b"),
+    ]
+
+    with patch("db_utils.transaction", return_value=fake_transaction(cursor)):
+        ergebnisse = ledger.book_token_batch(1, scans, -1, lambda e: ({"status": e.status}, 200))
+
+    assert [(e.status_code, e.wiederholt) for e in ergebnisse] == [(422, False), (200, False), (422, False)]
+    gespeichert = cursor.executemany.call_args.args[1]
+    assert [(eintrag[1], eintrag[2]) for eintrag in gespeichert] == [("k2", "a")]
+
+
+def test_book_by_token_finds_and_locks_user_in_one_query():
+    cursor = MagicMock()
+    cursor.fetchone.side_effect = [
+        {"id": 3, "vorname": "Max", "nachname": "M", "email": None, "is_locked": 1, "token_id": 5},
+    ]
+
+    with patch("db_utils.transaction", return_value=fake_transaction(cursor)):
+        ergebnis = ledger.book_by_token(b"\x01", "Terminal", -1)
+
+    assert ergebnis.status == "locked"
+    query, params = cursor.execute.call_args_list[0].args
+    assert "t.token_daten = %s FOR UPDATE" in query
+    assert params == (b"\x01",)
+    assert cursor.execute.call_count == 1
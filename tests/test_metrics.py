@@ -0,0 +1,43 @@
+import logging
+from unittest.mock import patch
+
+from flask import Flask
+
+import metrics
+
+
+def make_app():
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @app.route("/n-plus-eins")
+    def n_plus_eins():
+        for user_id in (1, 2, 3, 3):
+            with metrics.db_operation("fetch_one", "SELECT * FROM users\n WHERE id = %s", (user_id,)):
+                pass
+        return "ok"
+
+    return app
+
+
+def test_query_log_flags_duplicates_and_repeated_shapes(caplog):
+    app = make_app()
+
+    with patch.dict(metrics.config.query_debug_config, {"enabled": True, "repeat_threshold": 3}):
+        with caplog.at_level(logging.INFO, logger="metrics"):
+            app.test_client().get("/n-plus-eins")
+
+    meldungen = [r.getMessage() for r in caplog.records]
+    assert "GET /n-plus-eins: 4 Datenbankabfragen" in meldungen[0]
+    assert any("identische Abfrage 2x ausgeführt: SELECT * FROM users WHERE id = %s" in m for m in meldungen)
+    assert any("Abfrage 4x ausgeführt (N+1?)" in m for m in meldungen)
+
+
+def test_server_timing_header():
+    app = make_app()
+
+    with patch.dict(metrics.config.query_debug_config, {"enabled": False, "server_timing": True}):
+        response = app.test_client().get("/n-plus-eins")
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="4 Abfragen"' in response.headers["Server-Timing"]
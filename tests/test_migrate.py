@@ -0,0 +1,45 @@
+"""Tests für die Migrationsverwaltung (ohne Datenbank)."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from mysql.connector import Error, errorcode
+
+import migrate
+
+
+def test_split_statements_ignoriert_kommentare():
+    sql = "-- Kommentar\nCREATE TABLE a (\n  id int\n);\n\nALTER TABLE a ADD KEY k (id);\n"
+    assert migrate.split_statements(sql) == ["CREATE TABLE a (\n  id int\n)", "ALTER TABLE a ADD KEY k (id)"]
+
+
+def test_discover_sortiert_und_erkennt_doppelte_versionen(tmp_path):
+    (tmp_path / "0002_zwei.sql").write_text("SELECT 2;")
+    (tmp_path / "0001_eins.sql").write_text("SELECT 1;")
+    (tmp_path / "readme.txt").write_text("")
+    assert [(m.version, m.name) for m in migrate.discover(tmp_path)] == [(1, "eins"), (2, "zwei")]
+
+    (tmp_path / "0002_doppelt.sql").write_text("SELECT 2;")
+    with pytest.raises(ValueError):
+        migrate.discover(tmp_path)
+
+
+def test_repository_migrationen_sind_fortlaufend():
+    versionen = [m.version for m in migrate.discover()]
+    assert versionen == list(range(1, len(versionen) + 1))
+
+
+def test_apply_one_ueberspringt_vorhandene_aenderungen_einzeln(tmp_path):
+    pfad = tmp_path / "0005_index.sql"
+    pfad.write_text("ALTER TABLE t ADD KEY neu (a, b);\n\nALTER TABLE t DROP KEY alt;\n")
+    cnx, cursor = MagicMock(), MagicMock()
+    cursor.with_rows = False
+    # der neue Index existiert schon, der alte wird trotzdem gelöscht
+    cursor.execute.side_effect = [Error(errno=errorcode.ER_DUP_KEYNAME), None, None]
+
+    migrate._apply_one(cnx, cursor, migrate.Migration(5, "index", pfad))
+
+    ausgefuehrt = [c.args[0] for c in cursor.execute.call_args_list]
+    assert ausgefuehrt[1] == "ALTER TABLE t DROP KEY alt"
+    assert errorcode.ER_CANT_DROP_FIELD_OR_KEY in migrate._BEREITS_VORHANDEN
+    cnx.commit.assert_called_once()
@@ -0,0 +1,74 @@
+import os
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pdf_reports
+
+USER = {"vorname": "Jörg", "nachname": "Müller", "code": "1000000000"}
+TRANSAKTIONEN = [
+    {"id": i, "beschreibung": f"Getränk {i}", "saldo_aenderung": -1.5, "timestamp": datetime(2026, 1, 1, 12, i)}
+    for i in range(5)
+]
+
+
+def test_new_pdf_fonts_are_independent():
+    erstes, font_name = pdf_reports.new_pdf()
+    zweites, _ = pdf_reports.new_pdf()
+
+    for pdf, text in ((erstes, "äöü"), (zweites, "€ß")):
+        pdf.add_page()
+        pdf.set_font(font_name, size=10)
+        pdf.cell(50, 10, text)
+
+    # jedes PDF bindet die Schriftarten selbst ein und verkleinert sie beim Speichern
+    assert erstes.fonts.keys() == zweites.fonts.keys()
+    assert all(erstes.fonts[key] is not zweites.fonts[key] for key in erstes.fonts)
+    for pdf in (erstes, zweites):
+        daten = bytes(pdf.output())
+        assert daten.startswith(b"%PDF")
+        assert (b"/FontFile2" in daten) == (font_name == "DejaVu")
+
+
+def test_transaction_report_mentions_period_and_next_page():
+    optionen = pdf_reports.ReportOptions(von=date(2026, 1, 1), bis=date(2026, 1, 31), limit=5, seite=2)
+
+    pdf = pdf_reports.transaction_report(USER, TRANSAKTIONEN, -7.5, optionen, weitere=True)
+
+    assert pdf.startswith(b"%PDF")
+    assert optionen.offset == 5
+
+
+def test_transaction_report_shows_latest_booking_instead_of_render_time():
+    texte = []
+    new_pdf = pdf_reports.new_pdf
+
+    def new_pdf_mit_protokoll():
+        pdf, font_name = new_pdf()
+        cell = pdf.cell
+
+        def protokollieren(*args, **kwargs):
+            texte.append(str(args[2] if len(args) > 2 else kwargs.get("text", "")))
+            return cell(*args, **kwargs)
+
+        pdf.cell = protokollieren
+        return pdf, font_name
+
+    with patch("pdf_reports.new_pdf", side_effect=new_pdf_mit_protokoll):
+        pdf_reports.transaction_report(
+            USER, TRANSAKTIONEN, -7.5, pdf_reports.ReportOptions(), False, stand=TRANSAKTIONEN[-1]["timestamp"]
+        )
+
+    # das PDF wird gecacht, ein Erstellungszeitpunkt wäre bei späteren Abrufen falsch
+    assert "Stand: 01.01.2026 um 12:04 Uhr" in texte
+    assert not any(text.startswith("Erstellt am") for text in texte)
+
+
+def test_report_cache_roundtrip():
+    schluessel = (1, "Jörg", "Müller", "1000000000", (5, 4, None), pdf_reports.ReportOptions())
+
+    assert pdf_reports.cached_report(schluessel) is None
+    pdf_reports.remember_report(schluessel, b"%PDF-1.4")
+    assert pdf_reports.cached_report(schluessel) == b"%PDF-1.4"
@@ -0,0 +1,67 @@
+import operator
+import os
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import config
+import process_pool
+
+
+@pytest.fixture
+def pool():
+    with patch.dict(config.process_pool_config, {"workers": 1}):
+        yield
+        process_pool.shutdown()
+
+
+def test_run_in_process_pool(pool):
+    assert process_pool.run(operator.mul, 6, 7) == 42
+    assert process_pool.run(operator.mul, 6, 7, lang=True) == 42
+    assert process_pool.run_all(operator.add, [(1, 2), (3, 4), (5, 6)]) == [3, 7, 11]
+    assert process_pool._pool["executor"] is not None
+
+
+def test_run_passes_exceptions_through(pool):
+    with pytest.raises(ValueError):
+        process_pool.run(int, "keine Zahl")
+
+
+def test_run_without_workers_computes_locally():
+    with patch.dict(config.process_pool_config, {"workers": 0}):
+        assert process_pool.run(operator.mul, 6, 7) == 42
+    assert process_pool._pool["executor"] is None
+
+
+def test_broken_pool_falls_back_to_local(pool):
+    kaputt = MagicMock()
+    kaputt.submit.side_effect = BrokenProcessPool("weg")
+    process_pool._pool["executor"] = kaputt
+
+    assert process_pool.run(operator.mul, 6, 7) == 42
+    kaputt.shutdown.assert_called_once()
+    assert process_pool._pool["executor"] is None
+
+
+def test_task_oserror_keeps_pool(pool):
+    with pytest.raises(FileNotFoundError):
+        process_pool.run(os.stat, "/gibt/es/nicht")
+    executor = process_pool._pool["executor"]
+    with pytest.raises(FileNotFoundError):
+        process_pool.run_all(os.stat, [("/gibt/es/nicht",)])
+
+    assert executor is not None
+    assert process_pool._pool["executor"] is executor
+
+
+def test_pool_crash_during_task_falls_back_to_local(pool):
+    kaputt = MagicMock()
+    kaputt.submit.return_value.result.side_effect = BrokenProcessPool("abgestürzt")
+    process_pool._pool["executor"] = kaputt
+
+    assert process_pool.run(operator.mul, 6, 7) == 42
+    assert process_pool._pool["executor"] is None
@@ -0,0 +1,68 @@
+import os
+import sys
+from unittest.mock import patch
+
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import config
+import qr_codes
+
+
+def test_png_is_rendered_once_and_stored_on_disk(tmp_path):
+    qr_codes.clear_cache()
+    with (
+        patch.dict(config.qr_config, {"cache_dir": str(tmp_path)}),
+        patch("qr_codes.erzeuge_qr_code", return_value=Image.new("RGB", (10, 10))) as mock_qr,
+    ):
+        erstes = qr_codes.png_fuer_benutzer("123", "a")
+        zweites = qr_codes.png_fuer_benutzer("123", "a")
+        qr_codes.clear_cache()
+        von_platte = qr_codes.png_fuer_benutzer("123", "a")
+
+    assert mock_qr.call_count == 1
+    assert erstes == zweites == von_platte
+    assert erstes.startswith(b"\x89PNG")
+    assert [p.name for p in tmp_path.iterdir()] == [f"{qr_codes.etag('123a', 'Transaktion buchen')}.png"]
+
+
+def test_disk_cache_keeps_newest_files(tmp_path):
+    for i, name in enumerate(["alt", "mittel", "neu"]):
+        datei = tmp_path / f"{name}.png"
+        datei.write_bytes(b"png")
+        os.utime(datei, (1000 + i, 1000 + i))
+
+    with patch.dict(config.qr_config, {"cache_dir": str(tmp_path), "cache_max_files": 2}):
+        qr_codes._auf_platte_schreiben("frisch", b"png")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["frisch.png", "neu.png"]
+
+
+def test_failed_disk_write_removes_temp_file(tmp_path):
+    with (
+        patch.dict(config.qr_config, {"cache_dir": str(tmp_path)}),
+        patch("qr_codes.os.replace", side_effect=OSError("voll")),
+    ):
+        qr_codes._auf_platte_schreiben("k", b"png")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_etag_depends_on_style_version():
+    etag = qr_codes.etag("123a", "Transaktion buchen")
+
+    with patch("qr_codes.STYLE_VERSION", qr_codes.STYLE_VERSION + 1):
+        assert qr_codes.etag("123a", "Transaktion buchen") != etag
+
+
+def test_font_is_resolved_once():
+    qr_codes._schriftart.cache_clear()
+    with patch("qr_codes.ImageFont.truetype", wraps=qr_codes.ImageFont.truetype) as mock_truetype:
+        qr_codes.erzeuge_qr_code("123a", "Transaktion buchen")
+        aufrufe = mock_truetype.call_count
+        qr_codes.erzeuge_qr_code("123k", "Kontostand")
+
+    assert aufrufe >= 1
+    assert mock_truetype.call_count == aufrufe
+    qr_codes._schriftart.cache_clear()
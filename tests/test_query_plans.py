@@ -0,0 +1,100 @@
+"""
+Prüft per EXPLAIN, dass die häufigsten Abfragen die vorgesehenen Indizes nutzen.
+
+Benötigt eine Wegwerf-Datenbank (z.B. ein lokaler MySQL-Container). Der Test lädt
+docker-init/schema.sql und legt damit alle Tabellen neu an. Ohne EXPLAIN_MYSQL_DB wird er übersprungen.
+"""
+
+import os
+from pathlib import Path
+
+import mysql.connector
+import pytest
+from mysql.connector import Error
+
+import api
+import ledger
+import migrate
+
+EXPLAIN_DB = os.environ.get("EXPLAIN_MYSQL_DB")
+
+pytestmark = pytest.mark.skipif(not EXPLAIN_DB, reason="EXPLAIN_MYSQL_DB nicht gesetzt")
+
+SCHEMA = Path(__file__).resolve().parent.parent / "docker-init" / "schema.sql"
+
+USER_TS = "idx_transactions_user_ts_saldo"
+TS_ID = "idx_transactions_timestamp_id"
+
+# (Beschreibung, Query, Parameter, erwartete Indizes für die Tabelle transactions)
+HOT_QUERIES = [
+    (
+        "gui.get_user_transactions",
+        "SELECT id, beschreibung, saldo_aenderung, timestamp FROM transactions WHERE user_id = %s ORDER BY timestamp DESC",
+        (7,),
+        {USER_TS},
+    ),
+    (
+        "dashboard.load_recent_transactions",
+        "SELECT t.id, t.user_id, u.nachname AS nachname, u.vorname AS vorname, t.beschreibung, t.saldo_aenderung, "
+        "t.timestamp FROM transactions t LEFT JOIN users u ON t.user_id = u.id ORDER BY t.timestamp DESC LIMIT %s",
+        (20,),
+        {TS_ID},
+    ),
+    (
+        "api GET /transaktionen (Seite)",
+        api._TRANSAKTIONEN_QUERY
+        + " WHERE t.timestamp < %s OR (t.timestamp = %s AND t.id < %s)"
+        + api._TRANSAKTIONEN_ORDER
+        + " LIMIT %s",
+        ("2026-01-01 00:00:00", "2026-01-01 00:00:00", 2500, 101),
+        {TS_ID},
+    ),
+    ("Summe pro Benutzer", "SELECT SUM(saldo_aenderung) FROM transactions WHERE user_id = %s", (7,), {USER_TS}),
+    ("ledger.check_balances", ledger._MISMATCH_SQL, (), {USER_TS}),
+]
+
+
+@pytest.fixture(scope="module")
+def cursor():
+    try:
+        cnx = mysql.connector.connect(
+            host=os.environ.get("MYSQL_HOST", "127.0.0.1"),
+            port=int(os.environ.get("MYSQL_PORT", "3306")),
+            user=os.environ.get("MYSQL_USER"),
+            password=os.environ.get("MYSQL_PASSWORD"),
+            database=EXPLAIN_DB,
+        )
+    except Error as e:
+        pytest.skip(f"Keine Datenbank für EXPLAIN erreichbar: {e}")
+
+    cur = cnx.cursor(dictionary=True, buffered=True)
+    for statement in migrate.split_statements(SCHEMA.read_text(encoding="utf-8")):
+        cur.execute(statement)
+
+    cur.executemany(
+        "INSERT INTO users (id, code, nachname, vorname, password, email) VALUES (%s, %s, %s, %s, '', %s)",
+        [(i, f"{i:010d}", f"Nachname{i}", f"Vorname{i}", f"user{i}@example.org") for i in range(2, 51)],
+    )
+    cur.executemany(
+        "INSERT INTO transactions (user_id, beschreibung, saldo_aenderung, timestamp) "
+        "VALUES (%s, 'Test', -1, '2025-01-01' + INTERVAL %s MINUTE)",
+        [(i % 50 + 1, i) for i in range(5000)],
+    )
+    cnx.commit()
+    cur.execute("ANALYZE TABLE transactions, users")
+    cur.fetchall()
+
+    yield cur
+    cur.close()
+    cnx.close()
+
+
+@pytest.mark.parametrize(("beschreibung", "query", "params", "indizes"), HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(cursor, beschreibung, query, params, indizes):
+    cursor.execute("EXPLAIN " + query, params)
+    plan = [row for row in cursor.fetchall() if row["table"] in ("transactions", "t")]
+
+    assert plan, f"{beschreibung}: transactions nicht im Plan"
+    for row in plan:
+        assert row["type"] != "ALL", f"{beschreibung}: Full Table Scan ({row})"
+        assert row["key"] in indizes, f"{beschreibung}: Index {row['key']} statt {indizes}"
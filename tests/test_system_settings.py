@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mysql.connector import Error
+
+import system_settings
+
+ROWS = [
+    {"einstellung_schluessel": "TRANSACTION_SALDO_CHANGE", "einstellung_wert": "-2", "beschreibung": "Abzug"},
+    {"einstellung_schluessel": "SONSTIGES", "einstellung_wert": "abc", "beschreibung": None},
+]
+
+
+def test_parse_value_validates_transaction_saldo_change():
+    assert system_settings.parse_value("TRANSACTION_SALDO_CHANGE", "-1") == -1
+    with pytest.raises(system_settings.SettingError):
+        system_settings.parse_value("TRANSACTION_SALDO_CHANGE", "1")
+    with pytest.raises(system_settings.SettingError):
+        system_settings.parse_value("TRANSACTION_SALDO_CHANGE", "x")
+
+
+def _fake_transaction(rows):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = rows
+
+    @contextmanager
+    def fake_transaction():
+        yield cursor
+
+    return fake_transaction
+
+
+def test_registry_loads_once_and_reloads_on_epoch_change():
+    registry = system_settings.SettingsRegistry(ttl=60)
+    with (
+        patch("cache.current_epoch", return_value=1) as mock_epoch,
+        patch("db_utils.transaction", side_effect=_fake_transaction(ROWS)) as mock_transaction,
+    ):
+        assert registry.get("TRANSACTION_SALDO_CHANGE") == -2
+        assert registry.get_raw("SONSTIGES") == "abc"
+        assert registry.all()["TRANSACTION_SALDO_CHANGE"]["beschreibung"] == "Abzug"
+        assert mock_transaction.call_count == 1
+
+        mock_epoch.return_value = 2
+        assert registry.get("FEHLT", "default") == "default"
+        assert mock_transaction.call_count == 2
+
+
+def test_registry_failed_load_raises_and_retries():
+    registry = system_settings.SettingsRegistry(ttl=60)
+    with patch("cache.current_epoch", return_value=1):
+        with patch("db_utils.transaction", side_effect=Error("weg")), pytest.raises(Error):
+            registry.get("TRANSACTION_SALDO_CHANGE")
+        # der Fehler wurde nicht als leerer Stand gespeichert
+        with patch("db_utils.transaction", side_effect=_fake_transaction(ROWS)):
+            assert registry.get("TRANSACTION_SALDO_CHANGE") == -2
+
+        with patch("cache.bump_epoch"):
+            registry.invalidate()
+        with patch("db_utils.transaction", side_effect=Error("weg")) as mock_transaction:
+            assert registry.get("TRANSACTION_SALDO_CHANGE") == -2
+            assert registry.get("TRANSACTION_SALDO_CHANGE") == -2
+        assert mock_transaction.call_count == 2